@@ -0,0 +1,307 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import stream_decode_response_unicode
+
+import utilities.custom_logger as cl
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class CassetteMismatchError(requests.exceptions.ConnectionError):
+    """
+    The request is not found in the cassette in strict replay mode
+    """
+
+
+class Cassette(object):
+    """
+    *****
+
+    The cassette stores the API requests and responses on disk.
+    The index.json maps the request match key (method, URL, normalized params, body hash)
+    to the list of the recorded responses. The response bodies are stored once per content hash,
+    compressed, in the bodies folder.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    index_name = "index.json"
+    bodies_name = "bodies"
+    # The body is stored decoded, so these headers do not describe it anymore
+    skipped_headers = ("content-encoding", "transfer-encoding", "content-length")
+
+    def __init__(self, path):
+        self.path = path
+        self.bodies_dir = os.path.join(path, self.bodies_name)
+        self.index_file = os.path.join(path, self.index_name)
+        self._lock = threading.Lock()
+        self._played = {}
+        self._recorded = {}
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        with open(self.index_file) as index:
+            return json.load(index)
+
+    @contextmanager
+    def index_lock(self):
+        """
+        Lock the index between the threads and the processes, the xdist workers can record together
+        """
+        with self._lock, open(self.index_file + ".lock", "a+b") as lock_file:
+            if os.name == "nt":
+                lock_file.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK retries for 10 seconds and then fails
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        self.log.info(f"Waiting for the cassette index lock {self.index_file}")
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == "nt":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Merge the recorded requests to the index file, the recorded requests replace the old ones
+        The index is read, merged and replaced under the file lock, so the xdist workers keep the entries
+        of each other
+        """
+        if not self._recorded:
+            return
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+        temp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with self.index_lock():
+            self.index = self._load_index()
+            self.index.update(self._recorded)
+            with open(temp_file, "w") as index:
+                json.dump(self.index, index, indent=1, sort_keys=True)
+            os.replace(temp_file, self.index_file)
+        self.log.info(f"Cassette {self.path} saved with {len(self._recorded)} recorded requests")
+
+    def body_hash(self, body):
+        if body is None:
+            return ""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return hashlib.sha256(body).hexdigest()
+
+    def match_key(self, request):
+        """
+        Make the request match key
+        :param request: requests.PreparedRequest
+        :return: "METHOD URL?sorted-params BODYHASH" string
+        """
+        scheme, netloc, path, query, _ = urlsplit(request.url)
+        params = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+        url = urlunsplit((scheme, netloc.lower(), path or "/", params, ""))
+        return f"{request.method.upper()} {url} {self.body_hash(request.body)}"
+
+    def body_writer(self):
+        """
+        :return: BodyWriter which stores the body while it is read
+        """
+        return BodyWriter(self.bodies_dir)
+
+    def read_body(self, content_hash):
+        if not content_hash:
+            return b""
+        with gzip.open(os.path.join(self.bodies_dir, content_hash + ".gz"), "rb") as body:
+            return body.read()
+
+    def record(self, request, response):
+        """
+        Add the response of the request to the cassette
+        The body is written to the cassette while the response is consumed, so the streamed responses
+        stay streamed. The response is recorded when its body is read to the end
+        :param request: requests.PreparedRequest
+        :param response: requests.Response
+        """
+        writer = self.body_writer()
+        iter_content = response.iter_content
+
+        def recorded_chunks(chunk_size):
+            try:
+                for chunk in iter_content(chunk_size):
+                    writer.write(chunk)
+                    yield chunk
+            except BaseException:
+                writer.discard()
+                self.log.info(f"Response body is not read completely, it is not recorded: {request.url}")
+                raise
+            # The next reads are served from the consumed content or fail, they are not recorded again
+            del response.iter_content
+            self.add_entry(request, response, writer.finish())
+
+        def recording_iter_content(chunk_size=1, decode_unicode=False):
+            chunks = recorded_chunks(chunk_size)
+            return stream_decode_response_unicode(chunks, response) if decode_unicode else chunks
+
+        response.iter_content = recording_iter_content
+
+    def add_entry(self, request, response, body_hash):
+        entry = {
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "url": response.url,
+            "encoding": response.encoding,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in self.skipped_headers},
+            "body": body_hash
+        }
+        with self._lock:
+            self._recorded.setdefault(self.match_key(request), []).append(entry)
+
+    def play(self, request):
+        """
+        Get the recorded response of the request
+        The same requests get the recorded responses in order, the last response is repeated
+        :param request: requests.PreparedRequest
+        :return: requests.Response or None if the request is not recorded
+        """
+        key = self.match_key(request)
+        with self._lock:
+            entries = self.index.get(key)
+            if not entries:
+                return None
+            played = self._played.get(key, 0)
+            entry = entries[min(played, len(entries) - 1)]
+            self._played[key] = played + 1
+
+        response = requests.Response()
+        response.status_code = entry["status_code"]
+        response.reason = entry["reason"]
+        response.url = entry["url"]
+        response.encoding = entry["encoding"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = self.read_body(entry["body"])
+        response._content_consumed = True
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+class BodyWriter(object):
+    """
+    The writer which stores the body compressed while it is read, the same body is stored only once
+    """
+
+    def __init__(self, bodies_dir):
+        self.bodies_dir = bodies_dir
+        self.checksum = hashlib.sha256()
+        self.temp_file = None
+        self._body = None
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        if self._body is None:
+            if not os.path.exists(self.bodies_dir):
+                os.makedirs(self.bodies_dir, exist_ok=True)
+            self.temp_file = os.path.join(self.bodies_dir, f"{uuid.uuid4().hex}.{os.getpid()}.tmp")
+            self._body = gzip.open(self.temp_file, "wb")
+        self.checksum.update(chunk)
+        self._body.write(chunk)
+
+    def finish(self):
+        """
+        Store the written body by its hash
+        :return: Body hash, empty string for the empty body
+        """
+        if self._body is None:
+            return ""
+        self._body.close()
+        content_hash = self.checksum.hexdigest()
+        body_file = os.path.join(self.bodies_dir, content_hash + ".gz")
+        if os.path.exists(body_file):
+            os.remove(self.temp_file)
+        else:
+            os.replace(self.temp_file, body_file)
+        return content_hash
+
+    def discard(self):
+        if self._body is not None:
+            self._body.close()
+            os.remove(self.temp_file)
+            self._body = None
+
+
+class CassetteRecordAdapter(HTTPAdapter):
+    """
+    The transport adapter which sends the requests and records them to the cassette
+    """
+
+    def __init__(self, cassette, **kwargs):
+        super(CassetteRecordAdapter, self).__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super(CassetteRecordAdapter, self).send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+    def close(self):
+        self.cassette.save()
+        super(CassetteRecordAdapter, self).close()
+
+
+class CassetteReplayAdapter(BaseAdapter):
+    """
+    The transport adapter which serves the requests from the cassette
+    In strict mode the unmatched request fails, otherwise it is sent to the server
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    def __init__(self, cassette, strict=False):
+        super(CassetteReplayAdapter, self).__init__()
+        self.cassette = cassette
+        self.strict = strict
+        self.fallback = None if strict else HTTPAdapter()
+        self.hits = 0
+        self.misses = 0
+
+    def send(self, request, **kwargs):
+        response = self.cassette.play(request)
+        if response is not None:
+            self.hits += 1
+            return response
+        self.misses += 1
+        if self.strict:
+            raise CassetteMismatchError(f"Request is not found in the cassette {self.cassette.path}: "
+                                        f"{self.cassette.match_key(request)}", request=request)
+        self.log.info(f"Request is not found in the cassette, sending it: {request.method} {request.url}")
+        return self.fallback.send(request, **kwargs)
+
+    def close(self):
+        self.log.info(f"Cassette {self.cassette.path}: {self.hits} replayed, {self.misses} not found")
+        if self.fallback is not None:
+            self.fallback.close()
@@ -0,0 +1,425 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+from utilities.lazy_import import lazy_import
+
+# Heavy dependencies are loaded on the first use
+api_cassette = lazy_import("base.api_cassette")
+jsonpath = lazy_import("jsonpath")
+requests = lazy_import("requests")
+schema_validator = lazy_import("base.schema_validator")
+
+
+DownloadResult = namedtuple("DownloadResult", ["file_path", "size", "checksum", "elapsed"])
+
+
+class DownloadLimitError(Exception):
+    """
+    The download exceeded the size or time limit
+    """
+
+
+class ApiClient(object):
+    """
+   *****
+
+   This class is implemented for common API methods GET PUT POST DELETE
+   It does not need WebDriver, use it with api_client fixture for API only tests.
+   The requests are sent through one pooled session, the connections are reused.
+
+   *****
+   """
+
+    log = cl.custom_logger(logging.DEBUG)
+
+    # The cassette which is used by every new session, it is set by the --cassette option
+    active_cassette = None
+    active_cassette_mode = "replay"
+
+    def __init__(self, session=None):
+        """
+        :param session: requests.Session object, by default the new session is created with the active cassette
+        """
+        self.cassette_adapter = None
+        if session is not None:
+            self.session = session
+            return
+        self.session = requests.Session()
+        if ApiClient.active_cassette is not None:
+            self.use_cassette(ApiClient.active_cassette, ApiClient.active_cassette_mode)
+
+    def close(self):
+        self.session.close()
+
+    def use_cassette(self, path, mode="replay"):
+        """
+        Record the requests to the cassette or serve them from the cassette
+        :param path: Cassette folder or Cassette object
+        :param mode: record - send the requests and store them,
+                     replay - serve the recorded requests, send the others,
+                     strict - serve the recorded requests, fail the others
+        """
+        cassette = path if isinstance(path, api_cassette.Cassette) else api_cassette.Cassette(path)
+        if mode == "record":
+            adapter = api_cassette.CassetteRecordAdapter(cassette)
+        elif mode in ("replay", "strict"):
+            adapter = api_cassette.CassetteReplayAdapter(cassette, strict=mode == "strict")
+        else:
+            raise Exception(f"{mode} is not a supported cassette mode")
+        self.eject_cassette()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cassette_adapter = adapter
+        self.log.info(f"Cassette {cassette.path} is used in {mode} mode")
+
+    @classmethod
+    def activate_cassette(cls, path, mode="replay"):
+        """
+        Use the cassette in every new session, the sessions record to the same cassette
+        :param path: Cassette folder
+        :param mode: record, replay or strict, see use_cassette
+        """
+        if mode not in ("record", "replay", "strict"):
+            raise Exception(f"{mode} is not a supported cassette mode")
+        ApiClient.active_cassette = api_cassette.Cassette(path)
+        ApiClient.active_cassette_mode = mode
+
+    @classmethod
+    def deactivate_cassette(cls):
+        """
+        Stop using the active cassette in the new sessions, the recorded requests are saved
+        """
+        if ApiClient.active_cassette is None:
+            return
+        ApiClient.active_cassette.save()
+        ApiClient.active_cassette = None
+        ApiClient.active_cassette_mode = "replay"
+
+    def eject_cassette(self):
+        """
+        Stop using the cassette, the recorded requests are saved
+        """
+        if self.cassette_adapter is None:
+            return
+        self.cassette_adapter.close()
+        self.session.mount("http://", requests.adapters.HTTPAdapter())
+        self.session.mount("https://", requests.adapters.HTTPAdapter())
+        self.cassette_adapter = None
+
+    def get_auth(self, credentials):
+        """
+        Get the basic authentication of the credentials
+        :param credentials: Username and Password map (key:value), None means without authentication
+        :return: HTTPBasicAuth or None
+        """
+        if credentials is None:
+            return None
+        return requests.auth.HTTPBasicAuth(credentials.get('username'), credentials.get('password'))
+
+    def send_request(self, method, url, credentials=None, status_code=200, **kwargs):
+        """
+        Send the request through the pooled session and check the response code
+        :param method: HTTP method
+        :param url: Full URL
+        :param credentials: Username and Password for authentication OPTIONAL
+        :param status_code: Expected status code
+        :param kwargs: requests arguments, Example - headers, params, data
+        :return: response
+        """
+        response = self.session.request(method, url, auth=self.get_auth(credentials), **kwargs)
+        try:
+            self.check_response_status_code(response, status_code)
+        except AssertionError:
+            # The streamed response keeps the connection until it is closed
+            response.close()
+            raise
+        return response
+
+    # Check status code
+    def check_response_status_code(self, response, status_code):
+        """
+        Checking the response status code
+        :param response: The response object
+        :param status_code: Expected status code
+        """
+        assert response.status_code == status_code
+
+    # Get request JSON from file
+    def get_request_json(self, file_path):
+        """
+        Use this method to create the request json from json file
+        :param file_path: The file path in which we have added the request JSON
+        :return request_json: Formatted JSON object
+        """
+        with open(file_path, 'r') as file:
+            request_json = json.load(file)
+        return request_json
+
+    # GET request
+    def get_request_basic_auth(self, url, credentials, status_code=200, headers=None, params=None):
+        """
+        Send GET request and check the response code
+        first param is the API full URL,
+        credentials - the credentials map (key:value)
+        status code - integer
+        headers - the response headers map (key:value) OPTIONAL
+        params - the response params map (key:value) OPTIONAL
+        the method returns response object
+        :param url: Full URL for GET request
+        :param credentials: Username and Password for authentication
+        :param status_code: Expected status code
+        :param headers: Request header (key:value) OPTIONAL
+        :param params: Request params (key:value) OPTIONAL
+        :return: response
+        """
+        try:
+            return self.send_request('GET', url, credentials, status_code, headers=headers, params=params)
+        except api_cassette.CassetteMismatchError:
+            raise
+        except:
+            self.log.error("Error during sending GET request")
+            print_stack()
+
+    # POST request
+    def post_request_basic_auth(self, url, credentials, file_path, status_code=200, headers=None, params=None):
+        """
+        Send POST request and check the response code
+        first param is the API relative path,
+        credentials - the credentials map (key:value)
+        filepath - the JSON file absolute path
+        status code - integer
+        headers - the response headers map (key:value) OPTIONAL
+        params - the response params map (key:value) OPTIONAL
+        the method returns response object
+        :param url: Full URL for POST request
+        :param credentials: Username and Password for authentication
+        :param file_path: The JSON file path for POST request body
+        :param status_code: Expected status code
+        :param headers: Request header (key:value) OPTIONAL
+        :param params: Request params (key:value) OPTIONAL
+        :return: response
+        """
+        request_json = self.get_request_json(file_path)
+        try:
+            return self.send_request('POST', url, credentials, status_code, data=request_json,
+                                     headers=headers, params=params)
+        except api_cassette.CassetteMismatchError:
+            raise
+        except:
+            self.log.error("Error during sending POST request")
+            print_stack()
+
+    # PUT request
+    def put_request_basic_auth(self, url, credentials, file_path, status_code=200, headers=None, params=None):
+        """
+        Send PUT request and check the response code
+        first param is the API relative path,
+        credentials - the credentials map (key:value)
+        filepath - the JSON file absolute path
+        status code - integer
+        headers - the response headers map (key:value) OPTIONAL
+        params - the response params map (key:value) OPTIONAL
+        the method returns response object
+        :param url: Full URL for PUT request
+        :param credentials: Username and Password for authentication
+        :param file_path: The JSON file path for POST request body
+        :param status_code: Expected status code
+        :param headers: Request header (key:value) OPTIONAL
+        :param params: Request params (key:value) OPTIONAL
+        :return: response
+        """
+        request_json = self.get_request_json(file_path)
+        try:
+            return self.send_request('PUT', url, credentials, status_code, data=request_json,
+                                     headers=headers, params=params)
+        except api_cassette.CassetteMismatchError:
+            raise
+        except:
+            self.log.error("Error during sending PUT request")
+            print_stack()
+
+    # DELETE request
+    def delete_request_basic_auth(self, url, credentials, status_code=200, headers=None):
+        """
+        Send DELETE request and check the response code
+        first param is the API relative path,
+        credentials - the credentials map (key:value)
+        status code - integer
+        headers - the response headers map (key:value) OPTIONAL
+        the method returns response object
+        :param url: Full URL for DELETE request
+        :param credentials: Username and Password for authentication
+        :param status_code: Expected status code
+        :param headers: Request header (key:value) OPTIONAL
+        :return: response
+        """
+        try:
+            return self.send_request('DELETE', url, credentials, status_code, headers=headers)
+        except api_cassette.CassetteMismatchError:
+            raise
+        except:
+            self.log.error("Error during sending DELETE request")
+            print_stack()
+
+    # Streaming download
+    def download_basic_auth(self, url, credentials, file_path, status_code=200, headers=None, params=None,
+                            max_bytes=None, max_seconds=None, chunk_size=1024 * 1024, hash_name="sha256"):
+        """
+        Send GET request and stream the response body to the file
+        The body is written by chunks, the checksum and the size are calculated on the fly,
+        so the body is never kept in memory. Give the file path to the file verifiers,
+        Example - get_files_count_in_zip, check_xml_tag_value_in_file
+        :param url: Full URL for GET request
+        :param credentials: Username and Password for authentication
+        :param file_path: Destination file path
+        :param status_code: Expected status code
+        :param headers: Request header (key:value) OPTIONAL
+        :param params: Request params (key:value) OPTIONAL
+        :param max_bytes: Maximum body size in bytes OPTIONAL
+        :param max_seconds: Maximum download time in seconds OPTIONAL
+        :param chunk_size: Chunk size in bytes, default 1 MB
+        :param hash_name: hashlib algorithm name, default sha256
+        :return: DownloadResult(file_path, size, checksum, elapsed) or None if the download failed
+        :raises DownloadLimitError: The body size or the download time exceeds the limit
+        """
+        part_path = file_path + ".part"
+        start_time = time.monotonic()
+        try:
+            with self.send_request('GET', url, credentials, status_code, headers=headers, params=params,
+                                   stream=True, timeout=max_seconds) as response:
+                content_length = response.headers.get("Content-Length")
+                if max_bytes is not None and content_length is not None and int(content_length) > max_bytes:
+                    raise DownloadLimitError(f"Content-Length {content_length} exceeds {max_bytes} bytes")
+                checksum = hashlib.new(hash_name)
+                size = 0
+                with open(part_path, "wb") as part:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        size += len(chunk)
+                        if max_bytes is not None and size > max_bytes:
+                            raise DownloadLimitError(f"Body exceeds {max_bytes} bytes")
+                        if max_seconds is not None and time.monotonic() - start_time > max_seconds:
+                            raise DownloadLimitError(f"Download exceeds {max_seconds} seconds")
+                        checksum.update(chunk)
+                        part.write(chunk)
+            os.replace(part_path, file_path)
+            result = DownloadResult(file_path, size, checksum.hexdigest(), time.monotonic() - start_time)
+            self.log.info(f"Downloaded {result.size} bytes to {file_path} in {result.elapsed:.2f}s, "
+                          f"{hash_name} {result.checksum}")
+            return result
+        except (api_cassette.CassetteMismatchError, DownloadLimitError) as error:
+            self.log.error(f"Download of {url} is stopped: {error}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        except:
+            self.log.error(f"Error during downloading {url}")
+            print_stack()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return None
+
+    def check_xml_tag_value_in_file(self, file_path, tag, value):
+        """
+        Use this method to check the XML file tag Value
+        The file is parsed incrementally, the parsed elements are released
+        :param file_path: XML file path, Example - DownloadResult.file_path
+        :param tag: XML tag
+        :param value: value which should be checked
+        """
+        expected_value = False
+        try:
+            # The open elements, the finished element is removed from its parent with its content
+            parents = []
+            for event, element in ET.iterparse(file_path, events=("start", "end")):
+                if event == "start":
+                    parents.append(element)
+                    continue
+                parents.pop()
+                if element.tag == tag and element.text == value:
+                    expected_value = True
+                    break
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+            assert expected_value
+        except:
+            self.log.error(f"Cant find expected TAG: {tag} and VALUE {value} result in the XML file {file_path}")
+            print_stack()
+            assert False
+
+    def check_xml_tag_value(self, response, tag, value):
+        """
+        Use this method to check the XML response tag Value
+        :param response: XML response
+        :param tag: XML tag
+        :param value: value which should be checked
+        :return Boolean:
+        """
+        expected_value = False
+        try:
+            root = ET.fromstring(response.content)
+            for child in root.iter('*'):
+                if child.tag == tag and child.text == value:
+                    expected_value = True
+                    break
+            assert expected_value
+        except:
+            self.log.error(f"Cant find expected TAG: {tag} and VALUE {value} result in the response XML")
+            print_stack()
+            assert False
+
+    def check_json_key_value(self, response, key, value):
+        """
+        Use this method to check the JSON response tag Value
+        :param response: JSON response
+        :param tag: JSON tag
+        :param value: value which should be checked
+        :return Boolean:
+        """
+        expected_value = False
+        try:
+            json_response = json.loads(response.text)
+            json_path_response = jsonpath.jsonpath(json_response, key)
+            for json_value in json_path_response or []:
+                if json_value == value:
+                    expected_value = True
+                    break
+            assert expected_value
+
+        except:
+            self.log.error(f"Cant find expected KEY: {key} and VALUE {value} result in the response JSON")
+            print_stack()
+            assert False
+
+    def check_json_schema(self, response, schema_path):
+        """
+        Use this method to validate the JSON response by JSON Schema
+        The schema is compiled once and cached, all validation errors are reported
+        :param response: JSON response
+        :param schema_path: JSON Schema file path
+        """
+        errors = schema_validator.SchemaValidator().validate(response.json(), schema_path)
+        for error in errors:
+            self.log.error(f"JSON Schema {schema_path} error - {error}")
+        assert not errors, "\n".join(errors)
+
+    def check_json_schema_many(self, responses, schema_path):
+        """
+        Use this method to validate many JSON responses by JSON Schema, the schema is compiled once
+        :param responses: List of JSON responses
+        :param schema_path: JSON Schema file path
+        """
+        results = schema_validator.SchemaValidator().validate_many([response.json() for response in responses],
+                                                                   schema_path)
+        errors = [f"response {index}: {error}" for index, response_errors in enumerate(results)
+                  for error in response_errors]
+        for error in errors:
+            self.log.error(f"JSON Schema {schema_path} error - {error}")
+        assert not errors, "\n".join(errors)
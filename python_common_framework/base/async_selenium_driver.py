@@ -0,0 +1,169 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import utilities.custom_logger as cl
+from base.selenium_driver import SeleniumDriver
+
+
+class AsyncSeleniumDriver(object):
+    """
+    *****
+
+    The asyncio facade of the SeleniumDriver and BasePage API.
+    Each browser session gets one dedicated executor thread, the blocking page object calls run there
+    in the order they were awaited, so one event loop drives many sessions concurrently:
+
+        session = await AsyncSeleniumDriver.start(driver_factory, "chrome", LoginPage)
+        await session.user_login(username, password, timeout=30)
+        await session.close()
+
+    Any page object method is awaitable with the optional timeout argument. On timeout or cancellation
+    the call is dropped if it is still queued, the running WebDriver command is finished by the
+    executor thread as it can not be interrupted.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    def __init__(self, page, executor=None, default_timeout=None):
+        """
+        :param page: SeleniumDriver or BasePage object, or WebDriver which is wrapped to SeleniumDriver
+        :param executor: The session executor, the pages of the same driver share it OPTIONAL
+        :param default_timeout: Default call timeout in seconds OPTIONAL
+        """
+        self.page = page if isinstance(page, SeleniumDriver) else SeleniumDriver(page)
+        self.driver = self.page.driver
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="selenium-session")
+        self.default_timeout = default_timeout
+        self.driver_factory = None
+        self.browser_type = None
+
+    @classmethod
+    async def start(cls, driver_factory, browser_type=None, page_class=SeleniumDriver, default_timeout=None):
+        """
+        Start the browser session on the new session executor
+        :param driver_factory: WebDriverFactory object
+        :param browser_type: Browser type, default the session browser
+        :param page_class: Page object class, default SeleniumDriver
+        :param default_timeout: Default call timeout in seconds OPTIONAL
+        :return: AsyncSeleniumDriver
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"selenium-{browser_type or 'session'}")
+        future = executor.submit(driver_factory.get_web_driver_instance, browser_type)
+        try:
+            driver = await asyncio.wrap_future(future)
+            session = cls(page_class(driver), executor, default_timeout)
+        except BaseException:
+            # The caller is cancelled or timed out, the browser which the executor thread still starts is quit
+            # after it, the queued start is cancelled with the caller
+            executor.submit(cls._quit_started, future, driver_factory, browser_type)
+            executor.shutdown(wait=False)
+            raise
+        session.driver_factory = driver_factory
+        session.browser_type = browser_type
+        return session
+
+    @classmethod
+    def _quit_started(cls, future, driver_factory, browser_type):
+        if future.cancelled() or future.exception() is not None:
+            return
+        cls.log.info(f"Quit the {browser_type or 'session'} browser which was started for the cancelled caller")
+        driver_factory.close(future.result(), browser_type)
+
+    def page_object(self, page_class):
+        """
+        Get the other page object of the same session, it shares the session executor
+        :param page_class: Page object class
+        :return: AsyncSeleniumDriver
+        """
+        session = AsyncSeleniumDriver(page_class(self.driver), self.executor, self.default_timeout)
+        session.driver_factory = self.driver_factory
+        session.browser_type = self.browser_type
+        return session
+
+    async def run(self, function, *args, timeout=None, **kwargs):
+        """
+        Run the blocking function on the session executor
+        :param function: Function or method
+        :param timeout: Timeout in seconds, default default_timeout
+        :return: The function result
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.log.error(f"{getattr(function, '__name__', function)} is not finished after {timeout}s")
+            raise
+
+    def __getattr__(self, name):
+        if name == "page":
+            raise AttributeError(name)
+        attribute = getattr(self.page, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, timeout=None, **kwargs):
+            return await self.run(attribute, *args, timeout=timeout, **kwargs)
+
+        return call
+
+    async def iterate(self, method_name, *args, timeout=None, **kwargs):
+        """
+        Iterate the generator method of the page object, for example harvest_scroll_items
+        Each next item is read on the session executor
+        :param method_name: Generator method name
+        :param timeout: Timeout of each item in seconds OPTIONAL
+        :return: Async generator
+        """
+        generator = await self.run(getattr(self.page, method_name), *args, **kwargs)
+        finished = object()
+        try:
+            while True:
+                item = await self.run(next, generator, finished, timeout=timeout)
+                if item is finished:
+                    break
+                yield item
+        finally:
+            await self.run(generator.close)
+
+    async def close(self):
+        """
+        Quit the browser session and stop the session executor
+        """
+        try:
+            if self.driver_factory is not None:
+                await self.run(self.driver_factory.close, self.driver, self.browser_type)
+            else:
+                await self.run(self.driver.quit)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    @staticmethod
+    async def run_sessions(coroutines, limit=None):
+        """
+        Run the session coroutines concurrently
+        :param coroutines: Coroutines, one per session
+        :param limit: Maximum concurrent sessions OPTIONAL
+        :return: List of the results or the exceptions in the coroutines order
+        """
+        semaphore = asyncio.Semaphore(limit) if limit else None
+
+        async def limited(coroutine):
+            if semaphore is None:
+                return await coroutine
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*(limited(coroutine) for coroutine in coroutines), return_exceptions=True)
@@ -1,15 +1,20 @@
 import json
+import time
 import xml.etree.ElementTree as ET
 from traceback import print_stack
 
-import psycopg2
-from selenium.webdriver.support.select import Select
-
 from base.selenium_driver import SeleniumDriver
+from utilities.lazy_import import lazy_import
+from utilities.menu_map_cache import MenuMapCache
 from utilities.util import Util
 
-from zipfile import ZipFile
 from contextlib import closing
+from urllib.parse import urlparse
+
+# Heavy dependencies are loaded on the first use
+psycopg2 = lazy_import("psycopg2")
+select = lazy_import("selenium.webdriver.support.select")
+zipfile = lazy_import("zipfile")
 
 
 class BasePage(SeleniumDriver):
@@ -22,6 +27,132 @@ class BasePage(SeleniumDriver):
     admin_header_menu_items_css = ".ui-link.ui-widget"
     admin_page_title_css = "#headingToolbarOuter h1"
 
+    # Returns the menu hash, or the hash and all menu items with text path, index and link
+    menu_map_script = """
+        var items = document.querySelectorAll(arguments[0]), hashOnly = arguments[1],
+            separator = arguments[2], labels = new Map(), entries = [], map = {}, hash = 5381, i, j;
+        for (i = 0; i < items.length; i++) {
+            var link = items[i].querySelector('a'), label = ((link || items[i]).textContent || '').trim(),
+                href = link && link.getAttribute('href'), line;
+            var url = href && href !== '#' && href.indexOf('javascript:') !== 0 ? link.href : null;
+            labels.set(items[i], label);
+            entries.push([items[i], label, url]);
+            line = label + '|' + (url || '') + '\\n';
+            for (j = 0; j < line.length; j++) { hash = ((hash << 5) + hash + line.charCodeAt(j)) | 0; }
+        }
+        hash = (hash >>> 0).toString(16) + '-' + items.length;
+        if (hashOnly) { return hash; }
+        for (i = 0; i < entries.length; i++) {
+            var path = [entries[i][1]], parent = entries[i][0].parentElement;
+            for (; parent; parent = parent.parentElement) {
+                if (labels.has(parent)) { path.unshift(labels.get(parent)); }
+            }
+            if (!(path.join(separator) in map)) { map[path.join(separator)] = {index: i, url: entries[i][2]}; }
+        }
+        return {hash: hash, items: map};
+    """
+
+    # Selects the options of native select by visible text in one call
+    select_options_by_text_script = """
+        var select = arguments[0], values = arguments[1], selected = [];
+        for (var i = 0; i < select.options.length && selected.length < values.length; i++) {
+            var option = select.options[i], text = option.text.trim();
+            if (values.indexOf(text) !== -1 && selected.indexOf(text) === -1) {
+                option.selected = true;
+                selected.push(text);
+            }
+        }
+        if (selected.length) {
+            select.dispatchEvent(new Event('input', {bubbles: true}));
+            select.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+        return selected;
+    """
+
+    # Clicks the list items by text, scrolls the virtual list viewport until all items are found
+    select_virtual_list_items_script = """
+        var itemSelector = arguments[0], remaining = arguments[1].slice(),
+            container = arguments[2] ? document.querySelector(arguments[2]) : null,
+            maxSteps = arguments[3], done = arguments[arguments.length - 1], selected = [], steps = 0;
+        function selectVisible() {
+            var items = document.querySelectorAll(itemSelector);
+            for (var i = 0; i < items.length && remaining.length; i++) {
+                var text = (items[i].textContent || '').trim(), index = remaining.indexOf(text);
+                if (index !== -1) {
+                    items[i].scrollIntoView({block: 'nearest'});
+                    items[i].click();
+                    selected.push(text);
+                    remaining.splice(index, 1);
+                }
+            }
+        }
+        function step() {
+            selectVisible();
+            if (!remaining.length || !container) { done(selected); return; }
+            var before = container.scrollTop;
+            container.scrollTop = before + Math.max(container.clientHeight, 1);
+            if (container.scrollTop === before || ++steps > maxSteps) { done(selected); return; }
+            requestAnimationFrame(function () { setTimeout(step, 0); });
+        }
+        if (container) { container.scrollTop = 0; }
+        requestAnimationFrame(function () { setTimeout(step, 0); });
+    """
+
+    # Counts the in-flight fetch/XHR requests and the DOM child list changes of the page, the hooks are
+    # installed once per page. The attribute changes are not counted, the periodic updates of the attributes
+    # (clocks, progress bars) would never let the page settle
+    page_activity_hooks_script = """
+        if (!window.__pageActivity) {
+            var state = window.__pageActivity = {pending: 0, last: performance.now()};
+            var touch = function () { state.last = performance.now(); };
+            if (window.fetch) {
+                var fetch = window.fetch;
+                window.fetch = function () {
+                    state.pending++;
+                    touch();
+                    return fetch.apply(this, arguments).finally(function () { state.pending--; touch(); });
+                };
+            }
+            var send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function () {
+                state.pending++;
+                touch();
+                this.addEventListener('loadend', function () { state.pending--; touch(); });
+                return send.apply(this, arguments);
+            };
+            new MutationObserver(touch).observe(document.documentElement, {childList: true, subtree: true});
+        }
+    """
+
+    # Counts the in-flight fetch/XHR/jQuery/PrimeFaces requests and the running CSS animations,
+    # resolves when the page has no activity and no DOM changes for the quiet window or the wait ends
+    page_quiet_script = page_activity_hooks_script + """
+        var quietMs = arguments[0], waitMs = arguments[1], done = arguments[arguments.length - 1];
+        var state = window.__pageActivity;
+        function busy() {
+            var pending = {requests: state.pending, jquery: window.jQuery ? window.jQuery.active : 0,
+                           primefaces: 0, animations: 0};
+            var queue = window.PrimeFaces && PrimeFaces.ajax && PrimeFaces.ajax.Queue;
+            if (queue && queue.isEmpty && !queue.isEmpty()) { pending.primefaces = 1; }
+            if (document.getAnimations) {
+                pending.animations = document.getAnimations().filter(function (animation) {
+                    return animation.playState === 'running' && animation.effect !== null &&
+                        animation.effect.getComputedTiming().iterations !== Infinity;
+                }).length;
+            }
+            return pending;
+        }
+        var start = performance.now();
+        (function poll() {
+            var pending = busy(), now = performance.now(), active = 0;
+            for (var name in pending) { active += pending[name]; }
+            if (active) { state.last = now; }
+            if (now - state.last >= quietMs) { done({quiet: true, pending: pending}); return; }
+            if (now - start >= waitMs) { done({quiet: false, pending: pending}); return; }
+            setTimeout(poll, 50);
+        })();
+    """
+
     """
     *****
     
@@ -30,11 +161,88 @@ class BasePage(SeleniumDriver):
     *****
     """
 
+    # Set True to wait for the quiet page after each element_click and send_keys
+    settle_after_actions = False
+    quiet_window = 0.5
+    settle_timeout = 10
+    # The async script wait is split into chunks shorter than the driver script timeout
+    settle_chunk = 5
+
+    # Session level settle times in seconds, None for the timed out waits
+    _settle_times = []
+
     def __init__(self, driver):
         super(BasePage, self).__init__(driver)
         self.driver = driver
         self.util = Util()
 
+    def before_action(self):
+        if self.settle_after_actions:
+            self.install_activity_hooks()
+
+    def after_action(self):
+        if self.settle_after_actions:
+            self.wait_for_page_quiet()
+
+    def install_activity_hooks(self):
+        """
+        Install the fetch/XHR request counters before the action, so the requests sent by the action are counted
+        """
+        try:
+            self.driver.execute_script(self.page_activity_hooks_script)
+        except:
+            self.log.error("Unable to install the page activity hooks")
+            print_stack()
+
+    def wait_for_page_quiet(self, quiet_window=None, timeout=None):
+        """
+        Wait until the page has no in-flight AJAX requests, no running CSS animations and no DOM changes
+        for the quiet window. Call it after element_click/send_keys instead of the fixed sleep.
+        The request counters are injected by before_action or on the first call on the page, jQuery and
+        PrimeFaces queues are read directly, so they are counted even if the request was sent before the hooks
+        :param quiet_window: Quiet period in seconds, default quiet_window
+        :param timeout: Maximum wait in seconds, default settle_timeout
+        :return: Settle time in seconds, None if the page is not quiet after the timeout
+        """
+        quiet_window = self.quiet_window if quiet_window is None else quiet_window
+        timeout = self.settle_timeout if timeout is None else timeout
+        start_time = time.monotonic()
+        result = {"quiet": False, "pending": {}}
+        try:
+            while not result["quiet"]:
+                remaining = timeout - (time.monotonic() - start_time)
+                if remaining <= 0:
+                    break
+                result = self.driver.execute_async_script(self.page_quiet_script, int(quiet_window * 1000),
+                                                          int(min(remaining, self.settle_chunk) * 1000))
+        except:
+            self.log.error("Unable to check the page activity")
+            print_stack()
+        settle_time = time.monotonic() - start_time
+        if result["quiet"]:
+            BasePage._settle_times.append(settle_time)
+            self.log.info(f"Page settled in {settle_time:.2f}s")
+            return settle_time
+        BasePage._settle_times.append(None)
+        self.log.error(f"Page is not quiet after {timeout}s, pending: {result['pending']}")
+        return None
+
+    def get_settle_stats(self):
+        """
+        Get the page settle times statistics of the session
+        :return: Dictionary with count, timeouts, total, average and max settle time in seconds
+        """
+        times = [settle_time for settle_time in BasePage._settle_times if settle_time is not None]
+        return {"count": len(BasePage._settle_times), "timeouts": len(BasePage._settle_times) - len(times),
+                "total": round(sum(times), 3), "average": round(sum(times) / len(times), 3) if times else 0.0,
+                "max": round(max(times, default=0.0), 3)}
+
+    def log_settle_stats(self):
+        stats = self.get_settle_stats()
+        if stats["count"]:
+            self.log.info(f"Page settle: {stats['count']} waits, {stats['timeouts']} timeouts, "
+                          f"average {stats['average']}s, max {stats['max']}s, total {stats['total']}s")
+
     def verify_server_title(self, title_to_verify):
         """
         Verify the page Title
@@ -90,37 +298,82 @@ class BasePage(SeleniumDriver):
         :return:
         """
         try:
-            select = Select(element)
+            select_list = select.Select(element)
             if option == "index":
-                select.select_by_index(value)
+                select_list.select_by_index(value)
             if option == "value":
-                select.select_by_value(value)
+                select_list.select_by_value(value)
             if option == "text":
-                select.select_by_visible_text(value)
+                self.select_items_from_drop_down_list_by_text(element, value)
+        except:
+            self.log.error("Cant select from List")
+            print_stack()
+
+    def select_items_from_drop_down_list_by_text(self, element, values):
+        """
+        Use the method to chose one or many items from native select list by visible text
+        The options are searched inside the browser in one call, it is much faster than
+        Selenium Select class on the lists with thousands of options
+        :param element: Select WebElement
+        :param values: Option text or list of option texts
+        :return: List of selected option texts
+        """
+        if isinstance(values, str):
+            values = [values]
+        selected = []
+        try:
+            selected = self.driver.execute_script(self.select_options_by_text_script, element, list(values))
+            not_found = [value for value in values if value not in selected]
+            if not_found:
+                self.log.error(f"Options {not_found} not found in the select list")
+            else:
+                self.log.info(f"Selected options {selected} from the select list")
         except:
             self.log.error("Cant select from List")
             print_stack()
+        return selected
 
     def select_item_from_drop_down_list_using_loop(self, list_selector, list_item_selector, value):
         """
-        Use the method to chose item from select list
-        The method uses Selenium native select class
+        Use the method to chose item from drop down list widget (for example PrimeFaces ui-selectonemenu)
+        The item is searched inside the browser in one call instead of reading items text one by one
         :param list_selector: Drop down list selector
         :param list_item_selector: Drop down list items selector
         :param value: The appropriate option value
         :return:
         """
+        self.select_items_from_virtual_list(list_selector, list_item_selector, value)
+
+    def select_items_from_virtual_list(self, list_selector, list_item_selector, values,
+                                       scroll_container_selector=None, max_scroll_steps=500):
+        """
+        Use the method to chose one or many items from drop down list widget
+        Virtualized lists render only visible items, for them set the scroll container selector
+        and the viewport will be scrolled in the browser until all items are found
+        :param list_selector: Drop down list selector, set None if the list is already open
+        :param list_item_selector: Drop down list items selector
+        :param values: Item text or list of item texts
+        :param scroll_container_selector: Virtual scroll viewport selector, Example - ".ui-virtualscroller-content"
+        :param max_scroll_steps: Maximum viewport scroll steps
+        :return: List of selected item texts
+        """
+        if isinstance(values, str):
+            values = [values]
+        selected = []
         try:
-            el = self.get_element(list_selector)
-            el.click()
-            items = self.get_element_list(list_item_selector)
-            for item in items:
-                if item.text == value:
-                    item.click()
-                    break
+            if list_selector:
+                self.element_click(list_selector)
+            selected = self.driver.execute_async_script(self.select_virtual_list_items_script, list_item_selector,
+                                                        list(values), scroll_container_selector, max_scroll_steps)
+            not_found = [value for value in values if value not in selected]
+            if not_found:
+                self.log.error(f"Items {not_found} not found in the list {list_item_selector}")
+            else:
+                self.log.info(f"Selected items {selected} from the list {list_item_selector}")
         except:
             self.log.error("Cant select from List")
             print_stack()
+        return selected
 
     def run_query_on_postgres(self, credentials, query):
         """
@@ -216,7 +469,7 @@ class BasePage(SeleniumDriver):
         :return: Count of files
         """
         try:
-            with closing(ZipFile(file_path)) as archive:
+            with closing(zipfile.ZipFile(file_path)) as archive:
                 count = len(archive.infolist())
                 return count
         except:
@@ -226,11 +479,14 @@ class BasePage(SeleniumDriver):
     def navigate_to_the_given_menu_item(self, menu_item, submenu_item=None, nested_submenu=None):
         """
         This method is designed to navigate to the given page
+        The menu map is taken from the session menu map cache, the map is rebuilt only if the menu is changed
         :param menu_item: Menu item name
         :param submenu_item: Submenu item name
         :param nested_submenu: Nested submenu item
         :return:
         """
+        if self.navigate_by_menu_map(menu_item, submenu_item, nested_submenu):
+            return
         admin_menu_items = self.get_element_list(self.admin_menuitems_css, "css")
         if admin_menu_items is not None:
             self.find_element_by_selector_and_text(admin_menu_items, menu_item).click()
@@ -241,6 +497,78 @@ class BasePage(SeleniumDriver):
         else:
             assert False
 
+    def get_menu_map(self):
+        """
+        Get the menu map of the current environment from the menu map cache
+        The map is rebuilt in one script call if it is missing or the menu hash is changed
+        :return: Menu map dictionary, text path -> {"index": item index, "url": target URL}
+        """
+        menu_cache = MenuMapCache()
+        try:
+            environment = urlparse(self.driver.current_url).netloc
+            menu_hash = self.driver.execute_script(self.menu_map_script, self.admin_menuitems_css, True,
+                                                   menu_cache.path_separator)
+            if menu_hash.endswith("-0"):
+                return None
+            menu_map = menu_cache.get(environment, menu_hash)
+            if menu_map is None:
+                built = self.driver.execute_script(self.menu_map_script, self.admin_menuitems_css, False,
+                                                   menu_cache.path_separator)
+                menu_map = built["items"]
+                menu_cache.put(environment, built["hash"], menu_map)
+            return menu_map
+        except:
+            self.log.error("Failed to get the menu map")
+            print_stack()
+            return None
+
+    def navigate_by_menu_map(self, menu_item, submenu_item=None, nested_submenu=None):
+        """
+        Navigate to the given menu item using the menu map
+        If the menu item has a link the page is opened directly, otherwise the menu items are clicked by index
+        :param menu_item: Menu item name
+        :param submenu_item: Submenu item name
+        :param nested_submenu: Nested submenu item
+        :return: Boolean, False if the menu item is not in the menu map or the navigation failed,
+                 the page is reloaded after the failed navigation
+        """
+        menu_map = self.get_menu_map()
+        if menu_map is None:
+            return False
+        menu_cache = MenuMapCache()
+        path = [item for item in (menu_item, submenu_item, nested_submenu) if item is not None]
+        entries = [menu_map.get(menu_cache.make_path(*path[:level + 1])) for level in range(len(path))]
+        if None in entries:
+            self.log.info(f"Menu item {path} not found in the menu map")
+            return False
+        start_url = self.driver.current_url
+        try:
+            if entries[-1]["url"]:
+                self.driver.get(entries[-1]["url"])
+            else:
+                for entry in entries:
+                    element = self.driver.execute_script("return document.querySelectorAll(arguments[0])[arguments[1]];",
+                                                         self.admin_menuitems_css, entry["index"])
+                    element.click()
+            self.log.info(f"Navigated to the menu item {path} using the menu map")
+            return True
+        except:
+            self.log.error(f"Failed to navigate to the menu item {path} using the menu map")
+            print_stack()
+            self.reset_menu_state(start_url)
+            return False
+
+    def reset_menu_state(self, url):
+        """
+        Reload the page after the failed menu navigation, so the menu is closed before the next navigation
+        :param url: The page which was opened before the navigation
+        """
+        try:
+            self.driver.get(url)
+        except:
+            self.log.error(f"Unable to reload the page {url}")
+            print_stack()
+
     def read_json(self, file_path):
         """
         This method is designed to read given json file
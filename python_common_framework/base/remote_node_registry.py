@@ -0,0 +1,228 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from traceback import print_stack
+from urllib.request import urlopen
+
+from selenium import webdriver
+
+import utilities.custom_logger as cl
+
+
+class RemoteNode(object):
+    """
+    *****
+
+    The Remote WebDriver endpoint with its capacity, health and session statistics
+
+    *****
+    """
+
+    def __init__(self, url, capacity=1):
+        self.url = url.rstrip("/")
+        self.configured_capacity = capacity
+        self.capacity = capacity
+        self.in_use = 0
+        self.healthy = True
+        self.draining = False
+        self.failures = 0
+        self.last_check = 0.0
+        self.latencies = deque(maxlen=10)
+        self.sessions_started = 0
+        self.sessions_failed = 0
+        self.peak_in_use = 0
+        self.busy_time = 0.0
+
+    @property
+    def free_slots(self):
+        return self.capacity - self.in_use
+
+    @property
+    def load(self):
+        return self.in_use / self.capacity if self.capacity else 1.0
+
+    @property
+    def average_latency(self):
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+
+class RemoteNodeRegistry(object):
+    """
+    *****
+
+    The registry distributes the WebDriver sessions between many Remote WebDriver endpoints.
+    Each new session is placed on the healthy node with the lowest load, then with the lowest
+    recent session start latency. The node is drained after max_failures failed session starts
+    in a row and returns to the rotation when its /status is ready again.
+    When all slots of the available nodes are busy, the new session waits for the released slot.
+
+    Nodes are set by --remote-nodes option as comma separated "url=capacity" items, for example
+    locally started drivers: chromedriver --port=9515, chromedriver --port=9516 and
+    --remote-nodes http://localhost:9515=2,http://localhost:9516=2
+    Each xdist worker keeps its own registry, so set the capacity per worker.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    max_failures = 2
+    health_check_interval = 30
+    status_timeout = 5
+    slot_wait_timeout = 300
+
+    def __init__(self, nodes=None):
+        """
+        :param nodes: Comma separated "url=capacity" string or list of "url=capacity" items
+        """
+        self.nodes = self.parse_nodes(nodes)
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+        self._sessions = {}
+
+    def parse_nodes(self, nodes):
+        if not nodes:
+            return []
+        if isinstance(nodes, str):
+            nodes = nodes.split(",")
+        parsed = []
+        for node in nodes:
+            url, _, capacity = node.strip().partition("=")
+            parsed.append(RemoteNode(url, int(capacity) if capacity else 1))
+        return parsed
+
+    def check_health(self, node):
+        """
+        Check the node /status endpoint, the Selenium Grid slots count limits the configured node capacity
+        :param node: RemoteNode
+        :return: Boolean
+        """
+        node.last_check = time.monotonic()
+        try:
+            with urlopen(node.url + "/status", timeout=self.status_timeout) as response:
+                status = json.loads(response.read().decode("utf-8")).get("value", {})
+            node.healthy = bool(status.get("ready"))
+            slots = [slot for grid_node in status.get("nodes", []) for slot in grid_node.get("slots", [])]
+            node.capacity = min(node.configured_capacity, len(slots)) if slots else node.configured_capacity
+        except Exception as error:
+            self.log.error(f"Remote node {node.url} status check failed - {error}")
+            node.healthy = False
+        if node.healthy and node.draining:
+            self.log.info(f"Remote node {node.url} is ready again")
+            node.draining = False
+            node.failures = 0
+        return node.healthy
+
+    def acquire(self, exclude=(), timeout=0):
+        """
+        Reserve the slot on the least loaded healthy node
+        :param exclude: Node URLs which should be skipped
+        :param timeout: Seconds to wait for the released slot when all slots of the available nodes are busy
+        :return: RemoteNode or None if there are no free slots
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            for node in self.nodes:
+                if (node.draining or not node.healthy) and now - node.last_check > self.health_check_interval:
+                    self.check_health(node)
+            with self._lock:
+                available = [node for node in self.nodes
+                             if node.healthy and not node.draining and node.url not in exclude]
+                candidates = [node for node in available if node.free_slots > 0]
+                if candidates:
+                    node = min(candidates, key=lambda candidate: (candidate.load, candidate.average_latency))
+                    node.in_use += 1
+                    node.peak_in_use = max(node.peak_in_use, node.in_use)
+                    return node
+                remaining = deadline - time.monotonic()
+                if not available or remaining <= 0:
+                    return None
+                self.log.info(f"All remote node slots are busy, waiting up to {remaining:.0f}s")
+                self._slot_released.wait(min(remaining, self.health_check_interval))
+
+    def drain(self, node):
+        self.log.error(f"Remote node {node.url} is drained after {node.failures} failures")
+        node.draining = True
+        node.last_check = time.monotonic()
+
+    def start_session(self, desired_capabilities, options=None):
+        """
+        Start the Remote WebDriver session on the least loaded node, the failed node is tried again
+        only when the other nodes have no free slots
+        :param desired_capabilities: Session capabilities
+        :param options: Browser options OPTIONAL
+        :return: WebDriver
+        """
+        tried = set()
+        while True:
+            # The nodes which failed in this call are skipped while the other nodes have free slots,
+            # then all not drained nodes are used again
+            node = self.acquire(tried)
+            if node is None:
+                node = self.acquire(timeout=self.slot_wait_timeout)
+            if node is None:
+                raise Exception(f"No Remote WebDriver node slot is available, nodes: {[n.url for n in self.nodes]}")
+            tried.add(node.url)
+            start_time = time.monotonic()
+            try:
+                driver = webdriver.Remote(command_executor=node.url,
+                                          desired_capabilities=dict(desired_capabilities), options=options)
+            except Exception:
+                self.log.error(f"Unable to start the session on the remote node {node.url}")
+                print_stack()
+                with self._lock:
+                    node.sessions_failed += 1
+                    node.failures += 1
+                    if node.failures >= self.max_failures:
+                        self.drain(node)
+                self._release_slot(node)
+                continue
+            with self._lock:
+                node.latencies.append(time.monotonic() - start_time)
+                node.sessions_started += 1
+                node.failures = 0
+                self._sessions[id(driver)] = (node, time.monotonic())
+            self.log.info(f"Session started on the remote node {node.url} in {node.latencies[-1]:.2f}s")
+            return driver
+
+    def _release_slot(self, node):
+        with self._lock:
+            node.in_use -= 1
+            self._slot_released.notify()
+
+    def release(self, driver):
+        """
+        Release the node slot of the driver, call it after driver.quit()
+        :param driver: WebDriver started by start_session
+        """
+        with self._lock:
+            node, session_start = self._sessions.pop(id(driver), (None, None))
+            if node is None:
+                return
+            node.in_use -= 1
+            node.busy_time += time.monotonic() - session_start
+            self._slot_released.notify()
+
+    def stats(self):
+        """
+        Get the nodes utilization statistics
+        :return: List of dictionaries, one per node
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return [{"url": node.url, "capacity": node.capacity, "in_use": node.in_use,
+                 "peak_in_use": node.peak_in_use, "healthy": node.healthy, "draining": node.draining,
+                 "sessions_started": node.sessions_started, "sessions_failed": node.sessions_failed,
+                 "average_latency": round(node.average_latency, 3),
+                 "utilization": round(node.busy_time / (elapsed * node.capacity), 3)}
+                for node in self.nodes]
+
+    def log_stats(self):
+        for node in self.stats():
+            self.log.info(f"Remote node {node['url']}: {node['sessions_started']} sessions, "
+                          f"{node['sessions_failed']} failed, peak {node['peak_in_use']}/{node['capacity']}, "
+                          f"latency {node['average_latency']}s, utilization {node['utilization']:.1%}, "
+                          f"{'draining' if node['draining'] else 'active'}")
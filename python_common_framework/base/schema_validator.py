@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import threading
+
+import utilities.custom_logger as cl
+from utilities.lazy_import import lazy_import
+
+# jsonschema is loaded on the first validation
+jsonschema = lazy_import("jsonschema")
+
+
+class SchemaValidator(object):
+    """
+    *****
+
+    The JSON Schema validator of the API responses.
+    The schema file is loaded and compiled once, the validator is cached for the session by
+    the schema path and the file modification time. All errors of the response are collected.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    # Session level validators cache, schema path -> ((modification time, size), validator)
+    _validators = {}
+    _lock = threading.Lock()
+
+    def get_validator(self, schema_path):
+        """
+        Get the compiled validator of the schema file
+        :param schema_path: JSON Schema file path
+        :return: jsonschema validator
+        """
+        schema_path = os.path.abspath(schema_path)
+        stat = os.stat(schema_path)
+        modified = (stat.st_mtime_ns, stat.st_size)
+        with SchemaValidator._lock:
+            cached = SchemaValidator._validators.get(schema_path)
+            if cached is not None and cached[0] == modified:
+                return cached[1]
+            with open(schema_path) as schema_file:
+                schema = json.load(schema_file)
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = validator_class(schema, format_checker=jsonschema.FormatChecker())
+            SchemaValidator._validators[schema_path] = (modified, validator)
+            self.log.info(f"JSON Schema {schema_path} compiled")
+            return validator
+
+    def validate(self, instance, schema_path):
+        """
+        Validate the instance in one pass, all errors are collected
+        :param instance: Parsed JSON
+        :param schema_path: JSON Schema file path
+        :return: List of error messages, empty if the instance is valid
+        """
+        validator = self.get_validator(schema_path)
+        errors = sorted(validator.iter_errors(instance), key=lambda error: [str(part) for part in error.absolute_path])
+        return [f"{'/'.join(str(part) for part in error.absolute_path) or '<root>'}: {error.message}"
+                for error in errors]
+
+    def validate_many(self, instances, schema_path):
+        """
+        Validate many instances with the same compiled validator
+        The validation is CPU bound and holds the GIL, so it is not run on the thread pool
+        :param instances: List of parsed JSON
+        :param schema_path: JSON Schema file path
+        :return: List of error lists, in the instances order
+        """
+        return [self.validate(instance, schema_path) for instance in instances]
@@ -1,6 +1,7 @@
 import logging
 import os
 import time
+from contextlib import contextmanager, nullcontext
 from traceback import print_stack
 
 from selenium.common.exceptions import *
@@ -10,11 +11,51 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 import utilities.custom_logger as cl
+from utilities.cross_browser import CrossBrowser
+from utilities.wait_audit import WaitAudit
 
 
 class SeleniumDriver:
     log = cl.custom_logger(logging.DEBUG)
 
+    # Reads the not harvested items, scrolls once and waits until the DOM grows or the pause ends
+    harvest_scroll_items_script = """
+        var state = arguments[0], done = arguments[arguments.length - 1];
+        var store = window.__harvestedKeys = window.__harvestedKeys || {};
+        var seen = store[state.id] = store[state.id] || {};
+        var container = state.container ? document.querySelector(state.container) : null;
+        var scroller = container || document.scrollingElement || document.documentElement;
+        var nodes = (container || document).querySelectorAll(state.item), items = [];
+        for (var i = 0; i < nodes.length && items.length < state.batch; i++) {
+            var node = nodes[i], text = (node.innerText || node.textContent || '').trim();
+            var key = state.key ? node.getAttribute(state.key) : text;
+            if (key === null || key === '' || seen.hasOwnProperty(key)) { continue; }
+            seen[key] = true;
+            var item = {key: key, text: text, attributes: {}};
+            for (var j = 0; j < state.attributes.length; j++) {
+                item.attributes[state.attributes[j]] = node.getAttribute(state.attributes[j]);
+            }
+            items.push(item);
+        }
+        if (items.length >= state.batch) { done({items: items, scrolled: false}); return; }
+        var before = scroller.scrollTop, height = scroller.scrollHeight, finished = false;
+        // Other mutations (spinners, counters) do not finish the wait, only the changed items count does
+        var observer = new MutationObserver(function () {
+            if ((container || document).querySelectorAll(state.item).length !== nodes.length) { finish(); }
+        });
+        function finish() {
+            if (finished) { return; }
+            finished = true;
+            observer.disconnect();
+            var count = (container || document).querySelectorAll(state.item).length;
+            done({items: items, scrolled: scroller.scrollTop !== before,
+                  grown: scroller.scrollHeight !== height || count !== nodes.length});
+        }
+        observer.observe(container || document.body, {childList: true, subtree: true});
+        scroller.scrollTop = before + Math.max(scroller.clientHeight, 1);
+        setTimeout(finish, state.pause);
+    """
+
     def __init__(self, driver):
         self.driver = driver
 
@@ -22,8 +63,11 @@ class SeleniumDriver:
         """
         Takes the screenshot of the current open page
         :param result_message:
+        :return: Screenshot file path, None if the screenshot is not saved
         """
         fileName = result_message + "." + str(round(time.time() * 1000)) + ".png"
+        if CrossBrowser.current_browser():
+            fileName = CrossBrowser.current_browser() + "." + fileName
         screenshotDir = "../screenshots/"
         relFilename = screenshotDir + fileName
         currentDir = os.path.dirname(__file__)
@@ -35,9 +79,43 @@ class SeleniumDriver:
                 os.makedirs(destinationDirectory)
             self.driver.save_screenshot(destinationFile)
             self.log.info(f"Screenshot caved to {destinationFile}")
+            return destinationFile
         except:
             self.log.error("UNABLE TO SAVE THE SCREENSHOT")
             print_stack()
+            return None
+
+    def save_page_snapshot(self, name):
+        """
+        Saves the HTML of the current open page, the snapshots are used by utilities/locator_analyzer.py
+        :param name: Snapshot name, the file is replaced if it exists
+        :return: Snapshot file path, None if the snapshot is not saved
+        """
+        snapshotDir = os.path.join(os.path.dirname(__file__), "../page_snapshots/")
+        destinationFile = os.path.join(snapshotDir, name + ".html")
+        try:
+            if not os.path.exists(snapshotDir):
+                os.makedirs(snapshotDir)
+            with open(destinationFile, "w", encoding="utf-8") as snapshot:
+                snapshot.write(self.driver.page_source)
+            self.log.info(f"Page snapshot saved to {destinationFile}")
+            return destinationFile
+        except:
+            self.log.error("UNABLE TO SAVE THE PAGE SNAPSHOT")
+            print_stack()
+            return None
+
+    def before_action(self):
+        """
+        Called before element_click and send_keys, the pages can override it to prepare the wait for the page
+        """
+        pass
+
+    def after_action(self):
+        """
+        Called after the successful element_click and send_keys, the pages can override it to wait for the page
+        """
+        pass
 
     def get_title(self):
         """
@@ -147,9 +225,11 @@ class SeleniumDriver:
         try:
             if locator:  # This means if locator is not empty
                 element = self.get_element(locator, locator_type)
+            self.before_action()
             element.click()
             self.log.info("Clicked on element with locator: " + locator +
                           " locatorType: " + locator_type)
+            self.after_action()
         except:
             self.log.info("Cannot click on the element with locator: " + locator +
                           " locatorType: " + locator_type)
@@ -191,9 +271,11 @@ class SeleniumDriver:
         try:
             if locator:  # This means if locator is not empty
                 element = self.get_element(locator, locator_type)
+            self.before_action()
             element.send_keys(data)
             self.log.info("Sent data on element with locator: " + locator +
                           " locatorType: " + locator_type)
+            self.after_action()
         except:
             self.log.info("Cannot send data on the element with locator: " + locator +
                           " locatorType: " + locator_type)
@@ -297,6 +379,8 @@ class SeleniumDriver:
     def wait_for_element(self, locator, locator_type="css", timeout=10, poll_frequency=0.5):
         """
         Check if element present in the page - Alternate solution
+        The wait is recorded by the wait audit, if the wait tuning is enabled the timeout and poll frequency
+        are taken from the locator wait history
         :param locator: Any selenium locator, By default - ""
         :param locator_type: locator type which are set, by default - css
         :param timeout: maximum time of waiting, default value 10 sec
@@ -304,21 +388,61 @@ class SeleniumDriver:
         :return: WebElement
         """
         element = None
+        wait_audit = WaitAudit()
+        tuned_timeout, tuned_poll_frequency = wait_audit.get_wait_settings(locator, locator_type,
+                                                                           timeout, poll_frequency)
+        start_time = time.monotonic()
         try:
             byType = self.get_by_type(locator_type)
-            self.log.info("Waiting for maximum :: " + str(timeout) +
+            self.log.info("Waiting for maximum :: " + str(tuned_timeout) +
                           " :: seconds for element to be clickable")
-            wait = WebDriverWait(self.driver, timeout=timeout, poll_frequency=poll_frequency,
+            wait = WebDriverWait(self.driver, timeout=tuned_timeout, poll_frequency=tuned_poll_frequency,
                                  ignored_exceptions=[NoSuchElementException,
                                                      ElementNotVisibleException,
                                                      ElementNotSelectableException])
-            element = wait.until(EC.element_to_be_clickable((byType, locator)))
+            # The implicit wait of the driver would block each element lookup longer than the tuned timeout
+            with self.implicit_wait_disabled() if WaitAudit.tuning_enabled else nullcontext():
+                element = self._until_clickable(wait, byType, locator)
+            if element is None and tuned_timeout < timeout:
+                # The tuned timeout was too short, the wait continues until the requested timeout
+                wait_audit.mark_timed_out(locator, locator_type)
+                remaining = timeout - (time.monotonic() - start_time)
+                self.log.info(f"Tuned wait timed out, waiting :: {remaining:.2f} :: more seconds")
+                wait = WebDriverWait(self.driver, timeout=max(remaining, 0), poll_frequency=poll_frequency,
+                                     ignored_exceptions=[NoSuchElementException,
+                                                         ElementNotVisibleException,
+                                                         ElementNotSelectableException])
+                element = self._until_clickable(wait, byType, locator)
+            if element is None:
+                raise TimeoutException(f"Element is not clickable after {timeout}s")
             self.log.info(f"Element appeared on the web page by {locator_type}")
         except:
             self.log.info(f"Element not appeared on the web page by {locator_type}")
             print_stack()
+        wait_audit.record_wait(locator, locator_type, timeout, time.monotonic() - start_time, element is not None)
         return element
 
+    @contextmanager
+    def implicit_wait_disabled(self):
+        """
+        Turn off the implicit wait of the driver in the block and restore it after the block
+        """
+        implicit_wait = self.driver.timeouts.implicit_wait
+        if not implicit_wait:
+            yield
+            return
+        self.driver.implicitly_wait(0)
+        try:
+            yield
+        finally:
+            self.driver.implicitly_wait(implicit_wait)
+
+    def _until_clickable(self, wait, by_type, locator):
+        try:
+            return wait.until(EC.element_to_be_clickable((by_type, locator)))
+        except TimeoutException:
+            return None
+
     def web_scroll(self, direction="up"):
         """
         Scroll the web page
@@ -333,6 +457,51 @@ class SeleniumDriver:
             # Scroll Down
             self.driver.execute_script("window.scrollBy(0, 1000);")
 
+    def harvest_scroll_items(self, item_locator, container_locator=None, key_attribute=None, attributes=(),
+                             max_items=None, max_idle_scrolls=3, scroll_pause=0.5, batch_size=200):
+        """
+        Scroll the infinite list and yield only the new rendered items
+        The items are read in the browser and deduplicated there by the key, so the caller can
+        stream thousands of rows without reading the whole list again after each scroll.
+        The scrolling stops when the content does not grow for max_idle_scrolls scrolls or max_items are yielded
+        :param item_locator: Item CSS selector
+        :param container_locator: Scroll container CSS selector, the window is scrolled if it is not set
+        :param key_attribute: Item attribute which is the unique key, by default the item text is the key
+        :param attributes: Attribute names which should be read from the items OPTIONAL
+        :param max_items: Maximum items count OPTIONAL
+        :param max_idle_scrolls: The scrolls count without new items after which the harvest stops
+        :param scroll_pause: Maximum wait for the items count change after each scroll, in seconds
+        :param batch_size: Maximum items read in one script call
+        :return: Generator of {"key": ..., "text": ..., "attributes": {...}} dictionaries
+        """
+        harvest_id = f"{id(self)}-{time.monotonic()}"
+        state = {"id": harvest_id, "item": item_locator, "container": container_locator, "key": key_attribute,
+                 "attributes": list(attributes), "pause": int(scroll_pause * 1000), "batch": batch_size}
+        harvested = 0
+        idle_scrolls = 0
+        try:
+            while max_items is None or harvested < max_items:
+                if max_items is not None:
+                    state["batch"] = min(batch_size, max_items - harvested)
+                result = self.driver.execute_async_script(self.harvest_scroll_items_script, state)
+                for item in result["items"]:
+                    harvested += 1
+                    yield item
+                if result["items"] or result.get("grown"):
+                    idle_scrolls = 0
+                    continue
+                idle_scrolls += 1
+                if idle_scrolls >= max_idle_scrolls:
+                    break
+        finally:
+            self.log.info(f"Harvested {harvested} items of {item_locator}")
+            try:
+                self.driver.execute_script("if (window.__harvestedKeys) { delete window.__harvestedKeys[arguments[0]]; }",
+                                           harvest_id)
+            except:
+                self.log.error(f"Unable to clear the harvested keys of {item_locator}")
+                print_stack()
+
     def get_element_parent(self, locator="", locator_type="xpath"):
         """
         This method is designed to get the parent of a given element
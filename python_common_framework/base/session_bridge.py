@@ -0,0 +1,104 @@
+import logging
+from urllib.parse import urlparse
+
+import utilities.custom_logger as cl
+
+
+class SessionBridge(object):
+    """
+    *****
+
+    The session bridge shares one login between the browser and the API client.
+    The browser cookies (and optionally the auth token from the web storage) are copied
+    to the pooled API session, and the API session cookies are injected to the browser.
+    The API session cookies and headers are saved when the bridge is created, restore() puts them back,
+    so the shared API session does not keep the login of the test.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    get_storage_item_script = ("return window.localStorage.getItem(arguments[0]) || "
+                               "window.sessionStorage.getItem(arguments[0]);")
+
+    def __init__(self, driver, api_client):
+        """
+        :param driver: WebDriver
+        :param api_client: ApiClient or BaseApi object
+        """
+        self.driver = driver
+        self.api_client = api_client
+        self._saved_cookies = api_client.session.cookies.copy()
+        self._saved_headers = api_client.session.headers.copy()
+
+    def restore(self):
+        """
+        Restore the API session cookies and headers saved when the bridge was created
+        """
+        self.api_client.session.cookies.clear()
+        self.api_client.session.cookies.update(self._saved_cookies)
+        self.api_client.session.headers.clear()
+        self.api_client.session.headers.update(self._saved_headers)
+        self.log.info("API session cookies and headers restored")
+
+    def domain_matches(self, host, domain):
+        domain = (domain or "").lstrip(".").lower()
+        host = host.lower()
+        return not domain or host == domain or host.endswith("." + domain)
+
+    def is_http_only(self, cookie):
+        # The server can send the attribute as httponly or HTTPOnly, the cookie jar keeps its case
+        return any(name.lower() == 'httponly' for name in cookie._rest)
+
+    def browser_to_api(self, token_storage_keys=(), auth_header="Authorization", token_prefix="Bearer "):
+        """
+        Copy the browser cookies and the auth token to the API session
+        :param token_storage_keys: localStorage/sessionStorage keys of the auth token OPTIONAL
+        :param auth_header: The header which gets the token, default Authorization
+        :param token_prefix: The token prefix, default "Bearer "
+        :return: Count of the copied cookies
+        """
+        cookies = self.driver.get_cookies()
+        jar = self.api_client.session.cookies
+        for cookie in cookies:
+            jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                    secure=cookie.get('secure', False), expires=cookie.get('expiry'),
+                    rest={'HttpOnly': None} if cookie.get('httpOnly') else {})
+        for key in token_storage_keys:
+            token = self.driver.execute_script(self.get_storage_item_script, key)
+            if token:
+                self.api_client.session.headers[auth_header] = token_prefix + token
+                self.log.info(f"Auth token {key} copied from the browser to the API session")
+                break
+        self.log.info(f"{len(cookies)} cookies copied from the browser to the API session")
+        return len(cookies)
+
+    def api_to_browser(self, url=None, refresh=True):
+        """
+        Inject the API session cookies to the browser
+        The browser accepts only the cookies of the opened page domain, so the url is opened first if it is set
+        :param url: The page which should be opened before the cookies are added OPTIONAL
+        :param refresh: Set False to skip the page refresh after the cookies are added
+        :return: Count of the injected cookies
+        """
+        if url is not None and urlparse(self.driver.current_url).netloc != urlparse(url).netloc:
+            self.driver.get(url)
+        host = urlparse(self.driver.current_url).hostname or ""
+        injected = 0
+        for cookie in self.api_client.session.cookies:
+            if not self.domain_matches(host, cookie.domain):
+                self.log.info(f"Cookie {cookie.name} of {cookie.domain} is skipped for {host}")
+                continue
+            browser_cookie = {'name': cookie.name, 'value': cookie.value, 'path': cookie.path or '/',
+                              'secure': bool(cookie.secure), 'httpOnly': self.is_http_only(cookie)}
+            if cookie.domain_specified:
+                browser_cookie['domain'] = cookie.domain
+            if cookie.expires:
+                browser_cookie['expiry'] = int(cookie.expires)
+            self.driver.add_cookie(browser_cookie)
+            injected += 1
+        if refresh and injected:
+            self.driver.refresh()
+        self.log.info(f"{injected} cookies injected from the API session to the browser")
+        return injected
@@ -0,0 +1,205 @@
+import logging
+import time
+from contextlib import contextmanager
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+from base.selenium_driver import SeleniumDriver
+
+
+class TabDriver(object):
+    """
+    *****
+
+    The WebDriver of one pool tab, each WebDriver call switches to the tab first,
+    so the page object always acts on its own tab
+
+    *****
+    """
+
+    def __init__(self, pool, handle):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_handle", handle)
+
+    def __getattr__(self, attribute):
+        self._pool.switch_to(self._handle)
+        return getattr(self._pool.driver, attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._pool.driver, attribute, value)
+
+
+class TabPool(SeleniumDriver):
+    """
+    *****
+
+    The tab pool opens the browser tabs once and gives them to the page objects,
+    so independent read-only flows (for example admin and user views) run in one browser
+    by switching the tabs instead of starting extra browsers.
+    The pool tabs are opened next to the test tab, which is not pooled.
+    Each tab has one owner page object, the page object driver switches to its tab before each call.
+    The released tab is reset: the cookies of its site, localStorage and sessionStorage are cleared
+    and the blank page is loaded. The cookies are shared by all tabs of the same site,
+    so set reset_cookies = False when the test tab must stay logged in to the same site.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    reset_url = "about:blank"
+    reset_cookies = True
+
+    def __init__(self, driver, size=2):
+        super(TabPool, self).__init__(driver)
+        self.driver = driver
+        self.size = size
+        self.handles = []
+        self.owners = {}
+        self.original_handle = None
+        self.current_handle = None
+        self.switch_count = 0
+        self.switch_time = 0.0
+
+    def open(self):
+        """
+        Open the pool tabs, the current tab stays the test tab and is not pooled
+        :return: List of the tab handles
+        """
+        self.original_handle = self.current_handle = self.driver.current_window_handle
+        existing = set(self.driver.window_handles)
+        for _ in range(self.size):
+            self.driver.execute_script(f"window.open('{self.reset_url}');")
+        self.handles = [handle for handle in self.driver.window_handles if handle not in existing]
+        self.owners = {handle: None for handle in self.handles}
+        self.log.info(f"Tab pool opened with {len(self.handles)} tabs")
+        return self.handles
+
+    def switch_to(self, handle):
+        """
+        Switch to the tab, the switch time is counted
+        :param handle: Tab handle
+        """
+        if handle == self.current_handle:
+            return
+        start_time = time.monotonic()
+        self.driver.switch_to.window(handle)
+        self.switch_time += time.monotonic() - start_time
+        self.switch_count += 1
+        self.current_handle = handle
+
+    def get_handle(self, page):
+        for handle, owner in self.owners.items():
+            if owner is page:
+                return handle
+        raise Exception(f"{type(page).__name__} does not own a tab in the pool")
+
+    def acquire(self, page_class, url=None):
+        """
+        Give the free tab to the new page object and switch to it
+        :param page_class: Page class, it is created with the driver of the tab
+        :param url: The URL which should be opened in the tab OPTIONAL
+        :return: Page object
+        """
+        if not self.handles:
+            self.open()
+        free_handles = [handle for handle, owner in self.owners.items() if owner is None]
+        if not free_handles:
+            raise Exception(f"All {len(self.handles)} tabs of the pool are in use")
+        handle = free_handles[0]
+        self.switch_to(handle)
+        page = page_class(TabDriver(self, handle))
+        self.owners[handle] = page
+        if url is not None:
+            self.driver.get(url)
+        return page
+
+    def activate(self, page):
+        """
+        Switch to the tab of the page object, the page object calls switch to it also without it
+        :param page: Page object from acquire
+        :return: Page object
+        """
+        self.switch_to(self.get_handle(page))
+        return page
+
+    def release(self, page, reset=True):
+        """
+        Return the tab of the page object to the pool
+        :param page: Page object from acquire
+        :param reset: Set False to keep the tab page opened
+        """
+        handle = self.get_handle(page)
+        if reset:
+            try:
+                self.reset(handle)
+            except:
+                self.log.error("Unable to reset the pool tab")
+                print_stack()
+        self.owners[handle] = None
+
+    def reset(self, handle):
+        """
+        Clear the tab storage and load the blank page
+        :param handle: Tab handle
+        """
+        self.switch_to(handle)
+        if self.reset_cookies:
+            self.driver.delete_all_cookies()
+        self.driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+        self.driver.get(self.reset_url)
+
+    @contextmanager
+    def tab(self, page_class, url=None):
+        """
+        Use the pool tab in the with statement, the tab is released at the end
+        :param page_class: Page class
+        :param url: The URL which should be opened in the tab OPTIONAL
+        """
+        page = self.acquire(page_class, url)
+        try:
+            yield page
+        finally:
+            self.release(page)
+
+    def run_flows(self, flows):
+        """
+        Run the independent flows, each one in its own tab
+        :param flows: List of (page_class, url, flow) items, flow is a function which gets the page object
+        :return: List of the flow results
+        """
+        pages = [self.acquire(page_class, url) for page_class, url, _ in flows]
+        try:
+            results = []
+            for page, (_, _, flow) in zip(pages, flows):
+                results.append(flow(self.activate(page)))
+            return results
+        finally:
+            for page in pages:
+                self.release(page)
+
+    def close(self):
+        """
+        Close the pool tabs and switch back to the test tab
+        """
+        for handle in self.handles:
+            try:
+                self.switch_to(handle)
+                self.driver.close()
+            except:
+                self.log.error("Unable to close the pool tab")
+                print_stack()
+        if self.original_handle is not None:
+            self.driver.switch_to.window(self.original_handle)
+            self.current_handle = self.original_handle
+        self.handles = []
+        self.owners = {}
+
+    def stats(self):
+        """
+        Get the tab switch overhead
+        :return: Dictionary with switch count, total and average switch time
+        """
+        average = self.switch_time / self.switch_count if self.switch_count else 0.0
+        return {"tabs": len(self.handles), "switches": self.switch_count,
+                "switch_time": round(self.switch_time, 3), "average_switch_time": round(average, 4)}
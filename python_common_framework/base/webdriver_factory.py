@@ -0,0 +1,131 @@
+import logging
+import os
+from traceback import print_stack
+
+from selenium import webdriver
+from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+
+import utilities.custom_logger as cl
+
+
+class WebDriverFactory(object):
+    """
+    *****
+
+    The web driver factory starts the browser session of the given type and opens the base URL.
+    It is used by the driver fixture and by the cross browser fan-out, so any browser can be
+    started from any thread without the session --browser option.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    browser_log_file = "../browserConsoleLog.log"
+
+    def __init__(self, app_config, node_registry=None, wait_time=30):
+        """
+        :param app_config: tests.config.Config object
+        :param node_registry: RemoteNodeRegistry object OPTIONAL
+        :param wait_time: Implicit wait in seconds
+        """
+        self.app_config = app_config
+        self.node_registry = node_registry
+        self.wait_time = wait_time
+
+    def get_web_driver_instance(self, browser_type=None):
+        """
+        Start the browser session
+        :param browser_type: chrome, firefox, ie or notepad, default the session browser
+        :return: WebDriver
+        """
+        browser_type = browser_type or self.app_config.browser
+        if self.node_registry is not None and self.node_registry.nodes and browser_type in ('chrome', 'firefox'):
+            if browser_type == 'chrome':
+                options = webdriver.ChromeOptions()
+                options.add_argument('--ignore-certificate-errors')
+                caps = DesiredCapabilities.CHROME.copy()
+                caps['goog:loggingPrefs'] = {'browser': 'ALL'}
+            else:
+                options = webdriver.FirefoxOptions()
+                caps = DesiredCapabilities.FIREFOX.copy()
+            driver = self.node_registry.start_session(caps, options)
+        elif browser_type == 'chrome':
+            options = webdriver.ChromeOptions()
+            path = os.path.abspath(
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) + '\\drivers\\chromedriver.exe'
+            options.add_argument('--ignore-certificate-errors')
+            caps = DesiredCapabilities.CHROME.copy()
+            caps['goog:loggingPrefs'] = {'browser': 'ALL'}
+            driver = webdriver.Chrome(path, options=options, desired_capabilities=caps)
+        elif browser_type == 'firefox':
+            driver = webdriver.Firefox()
+        elif browser_type == 'ie':
+            driver = webdriver.Ie()
+        elif browser_type == 'notepad':
+            notepad_url = self.app_config.base_url + self.app_config.admin_port
+            driver = webdriver.Remote(
+                command_executor=notepad_url,
+                desired_capabilities={
+                    "debugConnectToRunningApp": 'false',
+                    "app": r"C:\\Windows\\System32\\notepad.exe"
+                })
+        else:
+            raise Exception(f"{browser_type} is not a supported browser")
+        if browser_type != 'outlook':
+            try:
+                driver.implicitly_wait(self.wait_time)
+
+                driver.maximize_window()
+
+                admin_base_url = self.app_config.base_url + self.app_config.admin_port
+                driver.get(admin_base_url)
+            except:
+                # The started session is not returned, so it is closed here
+                self.log.error(f"Unable to open the {browser_type} session")
+                self.quit(driver, browser_type)
+                raise
+        return driver
+
+    def save_browser_log(self, driver, browser_type=None):
+        """
+        Append the browser console log to the browserConsoleLog.log
+        """
+        try:
+            log_entries = driver.get_log("browser")
+        except:
+            self.log.info(f"Browser console log is not available for {browser_type}")
+            return
+        with open(self.browser_log_file, "a") as log_file:
+            for log_entry in log_entries:
+                log_file.write(f"\n <<<<<<< " +
+                               "\n Browser = " + str(browser_type) +
+                               "\n Log Level = " + log_entry['level'] +
+                               "\n Log TimeStamp = " + str(log_entry["timestamp"]) +
+                               "\n Log Message = " + log_entry['message'] +
+                               "\n >>>>>>>")
+
+    def close(self, driver, browser_type=None):
+        """
+        Save the browser console log, quit the browser session and release the remote node slot
+        :param driver: WebDriver
+        :param browser_type: Browser type, default the session browser
+        """
+        browser_type = browser_type or self.app_config.browser
+        if browser_type != 'outlook':
+            self.save_browser_log(driver, browser_type)
+        self.quit(driver, browser_type)
+
+    def quit(self, driver, browser_type=None):
+        """
+        Quit the browser session and release the remote node slot
+        :param driver: WebDriver
+        :param browser_type: Browser type
+        """
+        try:
+            driver.quit()
+        except:
+            self.log.error(f"Unable to quit the {browser_type} session")
+            print_stack()
+        if self.node_registry is not None:
+            self.node_registry.release(driver)
@@ -1,8 +1,10 @@
 from traceback import print_stack
+from urllib.parse import urlparse
 
 from base.base_page import BasePage
 import utilities.custom_logger as cl
 import logging
+from utilities.login_state_cache import LoginStateCache
 
 
 class LoginPage(BasePage):
@@ -42,6 +44,29 @@ class LoginPage(BasePage):
             self.log.info("UNABLE TO LOGIN")
             print_stack()
 
+    def is_logged_in(self):
+        """
+        Check the user is logged in, the login link is not shown for the logged in user
+        The check is done by script, so it does not wait for the implicit wait timeout
+        :return: Boolean
+        """
+        return self.driver.execute_script("return document.querySelector(arguments[0]) === null;",
+                                          self.login_link_css)
+
+    def user_login_cached(self, username, password, environment=None):
+        """
+        Login with the cached login state of the user, the UI login is done only if there is no valid state
+        :param username: User name
+        :param password: Password
+        :param environment: Environment name, by default the current host
+        :return: Boolean, True if the login state was restored from the cache
+        """
+        if environment is None:
+            environment = urlparse(self.driver.current_url).netloc
+        return LoginStateCache(self.driver).login(environment, username,
+                                                  lambda: self.user_login(username, password),
+                                                  self.is_logged_in)
+
     def check_error_message(self, message):
         try:
             alert_element = self.get_element(self.alert_message_css)
@@ -20,4 +20,7 @@ pip install allure-pytest
 timeout 1
 pip install psycopg2
 pip install unipath
+pip install numpy
+pip install pillow
+pip install jsonschema
 echo  Installation Finished
@@ -10,6 +10,13 @@ class Config:
             'windows': '9999'
         }[env]
 
+        self.db_credentials = {
+            'qa': {'DB_USER': 'DB USER', 'DB_PASSWORD': 'DB PASSWORD', 'DB_HOST': 'localhost',
+                   'DB_NAME': 'DB NAME', 'DB_PORT': '5432'},
+            'windows': {'DB_USER': 'DB USER', 'DB_PASSWORD': 'DB PASSWORD', 'DB_HOST': 'WINDOWS MACHINE IP',
+                        'DB_NAME': 'DB NAME', 'DB_PORT': '5432'}
+        }[env]
+
         self.api_url = {
             'api_env': 'SOME URI FOR API',
         }[api]
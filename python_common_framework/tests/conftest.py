@@ -1,14 +1,28 @@
+import inspect
 import logging
 import os
+import sys
 
 import pytest
 from pytest import fixture
-from selenium import webdriver
-from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
 import utilities.custom_logger as cl
+from base.api_client import ApiClient
+from base.session_bridge import SessionBridge
 from tests.config import Config
-from utilities.test_status import TestStatus
+from utilities.cross_browser import CrossBrowser
+from utilities.data_factory import DataFactory
+from utilities.data_source import DataSource
+from utilities.db_seeder import DbSeeder
+from utilities.import_profiler import ImportProfiler
+from utilities.login_state_cache import LoginStateCache
+from utilities.result_collector import ResultCollector, ResultSink
+from utilities.run_history import RunHistory
+from utilities.test_impact import TestImpact
+from utilities.wait_audit import WaitAudit
+
+# The modules which load Selenium are imported by the hooks and fixtures which use the browser,
+# so API only and unit test runs do not pay their import time
 
 
 def pytest_addoption(parser):
@@ -30,6 +44,215 @@ def pytest_addoption(parser):
         action="store",
         help="Set the browser type"
     )
+    parser.addoption(
+        "--tune-waits",
+        default=False,
+        action="store_true",
+        help="Use the wait timeouts suggested from the wait history"
+    )
+    parser.addoption(
+        "--artifact-policy",
+        default="first",
+        action="store",
+        choices=("first", "final", "none"),
+        help="Set when the failed verification screenshot is taken"
+    )
+    parser.addoption(
+        "--remote-nodes",
+        default="",
+        action="store",
+        help="Set the comma separated Remote WebDriver nodes as url=capacity"
+    )
+    parser.addoption(
+        "--import-budget-ms",
+        default=None,
+        action="store",
+        type=float,
+        help="Fail the run if the framework import time exceeds the budget"
+    )
+    parser.addoption(
+        "--cassette",
+        default=None,
+        action="store",
+        help="Set the API cassette folder"
+    )
+    parser.addoption(
+        "--cassette-mode",
+        default="replay",
+        action="store",
+        choices=("record", "replay", "strict"),
+        help="Record the API requests to the cassette or replay them"
+    )
+    parser.addoption(
+        "--settle-after-actions",
+        default=False,
+        action="store_true",
+        help="Wait for the quiet page after each click and send keys"
+    )
+    parser.addoption(
+        "--impact-record",
+        default=False,
+        action="store_true",
+        help="Record the page classes, methods and locators used by each test"
+    )
+    parser.addoption(
+        "--impact-select",
+        default=None,
+        action="store",
+        help="Run only the tests affected by the changes since the given git revision"
+    )
+    parser.addoption(
+        "--no-run-history",
+        default=False,
+        action="store_true",
+        help="Do not write the test results to the run history database"
+    )
+    parser.addoption(
+        "--db-seed-dir",
+        default=None,
+        action="store",
+        help="Seed the DB from the folder CSV/JSON files, the file name is the table name"
+    )
+    parser.addoption(
+        "--db-template",
+        default=None,
+        action="store",
+        help="Template database which is cloned for the tests with the committed data"
+    )
+
+
+def pytest_configure(config):
+    WaitAudit.tuning_enabled = config.getoption("--tune-waits")
+    ResultCollector.artifact_policy = config.getoption("--artifact-policy")
+    if config.getoption("--settle-after-actions"):
+        from base.base_page import BasePage
+        BasePage.settle_after_actions = True
+    if config.getoption("--cassette"):
+        ApiClient.activate_cassette(config.getoption("--cassette"), config.getoption("--cassette-mode"))
+    config.pluginmanager.register(TestImpact(config), "test_impact")
+    if not config.getoption("--no-run-history"):
+        browser, environment = config.getoption("--browser"), config.getoption("--env")
+        if hasattr(config, "workerinput"):
+            history = RunHistory(run_id=config.workerinput.get("run_history_id"),
+                                 worker=config.workerinput["workerid"], browser=browser, environment=environment)
+        else:
+            history = RunHistory(browser=browser, environment=environment)
+        config.pluginmanager.register(history, "run_history")
+    check_data_source_distribution(config)
+    if hasattr(config, "workerinput"):
+        ResultSink.active = ResultSink(config.workerinput["workerid"])
+    else:
+        ResultSink.active = ResultSink()
+        ResultSink.active.clean()
+
+
+def check_data_source_distribution(config):
+    # The data_case shards are xdist groups, they are kept on one worker only with --dist loadgroup
+    if hasattr(config, "workerinput"):
+        # The worker parses the command line again, the controller sends the switched distribution mode
+        if config.workerinput.get("dist") == "loadgroup":
+            config.option.loadgroup = True
+        return
+    numprocesses = config.getoption("numprocesses", None)
+    if not isinstance(numprocesses, int) or numprocesses < 2:
+        return
+    dist = config.getoption("dist", "no")
+    if dist == "load":
+        # The xdist scheduler is created before the workers collect the tests, so the data_source marks
+        # are not known yet. loadgroup distributes the tests without the group as load does
+        config.option.dist = "loadgroup"
+        DataSource.log.info("--dist load is switched to loadgroup, the data_source cases are sharded by xdist_group")
+    elif dist != "loadgroup":
+        config.issue_config_time_warning(pytest.PytestConfigWarning(
+            f"--dist {dist} ignores the data_source shards, use --dist loadgroup"), stacklevel=2)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["dist"] = node.config.getoption("dist")
+
+
+def pytest_sessionstart(session):
+    budget_ms = session.config.getoption("--import-budget-ms")
+    if budget_ms is not None and not hasattr(session.config, "workerinput"):
+        passed, report = ImportProfiler().check_budget(budget_ms)
+        if not passed:
+            pytest.exit(report, returncode=1)
+
+
+def pytest_generate_tests(metafunc):
+    marker = metafunc.definition.get_closest_marker("data_source")
+    if marker is None or "data_case" not in metafunc.fixturenames:
+        return
+    path = os.path.join(os.path.dirname(str(metafunc.definition.path)), marker.args[0])
+    source = DataSource.open(path)
+    config = metafunc.config
+    shards = config.workerinput.get("workercount") if hasattr(config, "workerinput") else \
+        config.getoption("numprocesses", None)
+    if isinstance(shards, int) and shards > 1:
+        params = [pytest.param(index, marks=pytest.mark.xdist_group(source.shard_group(index, shards)))
+                  for index in range(len(source))]
+    else:
+        params = range(len(source))
+    metafunc.parametrize("data_case", params, indirect=True,
+                         ids=[f"case{index}" for index in range(len(source))])
+
+
+def pytest_collection_modifyitems(config, items):
+    # The fan-out gives its drivers only to the test function, the fixtures which use the driver get None
+    for item in items:
+        if item.get_closest_marker("browsers") is None:
+            continue
+        fixture_defs = item._fixtureinfo.name2fixturedefs
+        dependent = sorted(name for name in item.fixturenames if name != "driver" and
+                           any("driver" in fixture_def.argnames for fixture_def in fixture_defs.get(name, ())))
+        if dependent:
+            raise pytest.UsageError(f"{item.nodeid} is marked browsers, it can not use the fixtures "
+                                    f"which depend on the driver: {', '.join(dependent)}")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    marker = pyfuncitem.get_closest_marker("browsers")
+    if marker is None or not hasattr(pyfuncitem, "driver_factory"):
+        return None
+    test_function = pyfuncitem.obj
+    parameters = inspect.signature(test_function).parameters
+    kwargs = {name: value for name, value in pyfuncitem.funcargs.items() if name in parameters and name != "driver"}
+    cross_browser = CrossBrowser(pyfuncitem.driver_factory, marker.args)
+    results = cross_browser.run(test_function, kwargs)
+    pyfuncitem.user_properties.append(("browser", ",".join(cross_browser.browsers)))
+    pyfuncitem.user_properties.append(("browser_durations", {browser: round(duration, 3)
+                                                             for browser, _, duration in results}))
+    report = cross_browser.report(results)
+    if report is not None:
+        pytest.fail(report, pytrace=False)
+    return True
+
+
+def pytest_runtest_logreport(report):
+    if hasattr(report, "node"):
+        # The report is forwarded from the xdist worker, the worker has written it
+        return
+    ResultSink.active.add_report(report)
+
+
+def pytest_sessionfinish(session):
+    wait_audit = WaitAudit()
+    wait_audit.log_locator_summary()
+    if hasattr(session.config, "workerinput"):
+        wait_audit.save_history(session.config.workerinput["workerid"])
+    else:
+        wait_audit.save_history()
+        wait_audit.merge_history()
+    LoginStateCache(None).log_stats()
+    ApiClient.deactivate_cassette()
+    base_page = sys.modules.get("base.base_page")
+    if base_page is not None:
+        base_page.BasePage(None).log_settle_stats()
+    ResultSink.active.close()
+    if not hasattr(session.config, "workerinput"):
+        ResultSink.active.merge()
 
 
 @fixture(scope='session')
@@ -60,62 +283,139 @@ def logger_inst():
 
 @pytest.fixture
 def test_status_inst():
+    from utilities.test_status import TestStatus
     tests_status = TestStatus(driver)
     return tests_status
 
+@pytest.fixture(autouse=True)
+def wait_audit(request):
+    WaitAudit.current_test = request.node.nodeid
+    yield WaitAudit()
+    WaitAudit().log_test_summary(request.node.nodeid)
+    WaitAudit.current_test = None
+
+
+@pytest.fixture(scope='session')
+def data_factory():
+    factory = DataFactory()
+    factory.prefill('name')
+    factory.prefill('email')
+    return factory
+
+
+@pytest.fixture(scope='session')
+def node_registry(request):
+    from base.remote_node_registry import RemoteNodeRegistry
+    registry = RemoteNodeRegistry(request.config.getoption("--remote-nodes"))
+    for node in registry.nodes:
+        registry.check_health(node)
+    yield registry
+    registry.log_stats()
+
+
+@pytest.fixture(scope='session')
+def api_client():
+    # The active cassette of the --cassette option is mounted by ApiClient
+    client = ApiClient()
+    yield client
+    client.eject_cassette()
+    client.close()
+
+
 @pytest.fixture(scope='session')
 def config_wait_time():
     return 30
 
 
 @pytest.fixture
-def driver(config_wait_time, app_config):
+def driver_factory(config_wait_time, app_config, node_registry):
+    from base.webdriver_factory import WebDriverFactory
+    return WebDriverFactory(app_config, node_registry, config_wait_time)
+
+
+@pytest.fixture
+def driver(request, driver_factory, app_config):
     browser_type = app_config.browser
-    if browser_type == 'chrome' or browser_type == 'api':
-        options = webdriver.ChromeOptions()
-        options.add_argument('--ignore-certificate-errors')
-        options = webdriver.ChromeOptions()
-        path = os.path.abspath(
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)) + '\\drivers\\chromedriver.exe'
-        options.add_argument('--ignore-certificate-errors')
-        caps = DesiredCapabilities.CHROME
-        caps['goog:loggingPrefs'] = {'browser': 'ALL'}
-        driver = webdriver.Chrome(path, options=options, desired_capabilities=caps)
-    elif browser_type == 'firefox':
-        driver = webdriver.Firefox()
-    elif browser_type == 'ie':
-        driver = webdriver.Ie
-    elif browser_type == 'notepad':
-        notepad_url = app_config.base_url + app_config.admin_port
-        driver = webdriver.Remote(
-            command_executor=notepad_url,
-            desired_capabilities={
-                "debugConnectToRunningApp": 'false',
-                "app": r"C:\\Windows\\System32\\notepad.exe"
-            })
-    else:
-        raise Exception(f"{browser_type} is not a supported browser")
-    if browser_type != 'outlook':
-        driver.implicitly_wait(config_wait_time)
+    if browser_type == 'api' or request.node.get_closest_marker("api"):
+        # API tests use api_client fixture, the browser is not started
+        yield None
+        return
+    if request.node.get_closest_marker("browsers"):
+        # The cross browser fan-out starts the drivers in pytest_pyfunc_call
+        request.node.driver_factory = driver_factory
+        yield None
+        return
+    driver = driver_factory.get_web_driver_instance(browser_type)
+    yield driver
+    driver_factory.close(driver, browser_type)
 
-        driver.maximize_window()
 
-        admin_base_url = app_config.base_url + app_config.admin_port
-        driver.get(admin_base_url)
+@pytest.fixture(scope='session')
+def db_seeder(app_config):
+    return DbSeeder(app_config.db_credentials)
 
-    yield driver
-    if browser_type != 'outlook':
-        log_entries = driver.get_log("browser")
-        logFile = open("../browserConsoleLog.log", "a")
-        for log_entry in log_entries:
-            logFile.write(f"\n <<<<<<< " +
-                          "\n Log Level = " + log_entry['level'] +
-                          "\n Log TimeStamp = " + str(log_entry["timestamp"]) +
-                          "\n Log Message = " + log_entry['message'] +
-                          "\n >>>>>>>")
-        logFile.close()
-
-    driver.quit()
+
+@pytest.fixture(scope='session')
+def db_connection(request, db_seeder):
+    """
+    The session connection with the --db-seed-dir data
+    The seed data is not committed, it is visible only on this connection, not to the application under test.
+    It is rolled back at the end of the session, use db_clone for the data which the application should see
+    """
+    connection = db_seeder.connect()
+    seed_dir = request.config.getoption("--db-seed-dir")
+    if seed_dir:
+        db_seeder.seed_all(connection, db_seeder.seeds_from_folder(seed_dir))
+    yield connection
+    connection.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def db_transaction(db_seeder, db_connection):
+    """
+    The db_connection whose test changes are rolled back after the test, in the savepoint if the data was seeded
+    The test changes are not committed, they are visible only on this connection, not to the application under test
+    """
+    with db_seeder.rollback_on_exit(db_connection) as connection:
+        yield connection
+
+
+@pytest.fixture(scope='session')
+def db_clone(request, db_seeder):
+    # The worker database cloned from the --db-template with the committed data, yields its credentials
+    template = request.config.getoption("--db-template")
+    if not template:
+        pytest.skip("--db-template is not set")
+    worker = request.config.workerinput["workerid"] if hasattr(request.config, "workerinput") else "master"
+    credentials = dict(db_seeder.credentials, DB_NAME=f"{template}_{worker}")
+    db_seeder.clone_database(template, credentials['DB_NAME'])
+    yield credentials
+    db_seeder.drop_database(credentials['DB_NAME'])
+
+
+@pytest.fixture
+def data_case(request):
+    marker = request.node.get_closest_marker("data_source")
+    path = os.path.join(os.path.dirname(str(request.node.path)), marker.args[0])
+    return DataSource.open(path)[request.param]
+
+
+@pytest.fixture
+def session_bridge(driver, api_client):
+    bridge = SessionBridge(driver, api_client)
+    yield bridge
+    bridge.restore()
+
+
+@pytest.fixture
+def tab_pool(driver):
+    from base.tab_pool import TabPool
+    pool = TabPool(driver, size=2)
+    pool.open()
+    yield pool
+    pool.log.info(f"Tab pool stats {pool.stats()}")
+    pool.close()
 
 
 @pytest.fixture
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# The unit tests do not use tests/conftest.py, so the results, the run history and the wait history
+# of the last UI run stay. The framework log is written to the temp folder, the variable is set before
+# the framework modules create their loggers
+os.environ.setdefault("AUTOMATION_LOG", os.path.join(tempfile.gettempdir(), "automation-unit-tests.log"))
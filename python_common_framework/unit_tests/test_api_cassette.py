@@ -0,0 +1,75 @@
+import multiprocessing
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from base.api_cassette import Cassette, CassetteReplayAdapter
+from base.api_client import ApiClient
+
+
+def add_entry(cassette, url, body):
+    request = requests.Request("GET", url).prepare()
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = request.url
+    response.encoding = "utf-8"
+    writer = cassette.body_writer()
+    writer.write(body)
+    cassette.add_entry(request, response, writer.finish())
+
+
+def record_entries(path, worker, count):
+    cassette = Cassette(path)
+    for index in range(count):
+        add_entry(cassette, f"http://api.invalid/{worker}/{index}", b"{}")
+        cassette.save()
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    cassette = Cassette(str(tmp_path))
+    request = requests.Request("GET", "http://api.invalid/items", params={"page": "1"}).prepare()
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = request.url
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json"
+    writer = cassette.body_writer()
+    writer.write(b'{"items": [1, 2]}')
+    cassette.add_entry(request, response, writer.finish())
+    cassette.save()
+    yield str(tmp_path)
+    ApiClient.deactivate_cassette()
+
+
+def test_base_api_replays_active_cassette(cassette_path):
+    pytest.importorskip("selenium")
+    from base.base_api import BaseApi
+    ApiClient.activate_cassette(cassette_path, "strict")
+    api = BaseApi()
+    response = api.send_request("GET", "http://api.invalid/items?page=1")
+    assert response.json() == {"items": [1, 2]}
+    api.eject_cassette()
+    api.close()
+
+
+def test_given_session_is_not_changed(cassette_path):
+    ApiClient.activate_cassette(cassette_path, "strict")
+    session = requests.Session()
+    api = ApiClient(session=session)
+    assert api.cassette_adapter is None
+    assert not isinstance(session.get_adapter("http://api.invalid"), CassetteReplayAdapter)
+
+
+def test_processes_keep_the_entries_of_each_other(tmp_path):
+    processes = [multiprocessing.Process(target=record_entries, args=(str(tmp_path), worker, 30))
+                 for worker in ("gw0", "gw1")]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    assert len(Cassette(str(tmp_path)).index) == 60
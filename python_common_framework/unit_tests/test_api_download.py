@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from base.api_client import ApiClient, DownloadLimitError
+
+BODY = b"0123456789" * 1000
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        if self.path == "/chunked":
+            # No Content-Length, the size is known only while the body is read
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(BODY)
+            return
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        if self.path == "/slow":
+            for index in range(0, len(BODY), 1000):
+                self.wfile.write(BODY[index:index + 1000])
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = ApiClient()
+    yield client
+    client.close()
+
+
+def test_download_checksum(client, server_url, tmp_path):
+    file_path = str(tmp_path / "body.bin")
+    result = client.download_basic_auth(server_url + "/file", None, file_path, chunk_size=4096)
+    assert result.size == len(BODY)
+    assert result.checksum == hashlib.sha256(BODY).hexdigest()
+    with open(file_path, "rb") as body:
+        assert body.read() == BODY
+    assert not (tmp_path / "body.bin.part").exists()
+
+
+@pytest.mark.parametrize("path", ["/file", "/chunked"])
+def test_size_limit_is_raised_and_part_is_removed(client, server_url, tmp_path, path):
+    file_path = str(tmp_path / "body.bin")
+    with pytest.raises(DownloadLimitError):
+        client.download_basic_auth(server_url + path, None, file_path, max_bytes=5000, chunk_size=1024)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_time_limit_is_raised_and_part_is_removed(client, server_url, tmp_path):
+    file_path = str(tmp_path / "body.bin")
+    with pytest.raises(DownloadLimitError):
+        client.download_basic_auth(server_url + "/slow", None, file_path, max_seconds=0.2, chunk_size=1000)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_request_returns_none(client, server_url, tmp_path):
+    file_path = str(tmp_path / "body.bin")
+    assert client.download_basic_auth(server_url + "/file", None, file_path, status_code=201) is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from base.async_selenium_driver import AsyncSeleniumDriver
+from base.selenium_driver import SeleniumDriver
+
+
+class Driver(object):
+
+    def __init__(self):
+        self.quit_called = threading.Event()
+
+    def quit(self):
+        self.quit_called.set()
+
+
+class Page(SeleniumDriver):
+    """
+    The page object stub, its methods sleep like the WebDriver commands
+    """
+
+    def __init__(self, driver):
+        super(Page, self).__init__(driver)
+        self.calls = []
+
+    def step(self, name, seconds=0.0):
+        time.sleep(seconds)
+        self.calls.append(name)
+        return name
+
+    def items(self, count):
+        for index in range(count):
+            time.sleep(0.01)
+            yield index
+
+
+class DriverFactory(object):
+
+    def __init__(self, start_seconds=0.0):
+        self.start_seconds = start_seconds
+        self.drivers = []
+        self.closed = []
+
+    def get_web_driver_instance(self, browser_type=None):
+        time.sleep(self.start_seconds)
+        driver = Driver()
+        self.drivers.append(driver)
+        return driver
+
+    def close(self, driver, browser_type=None):
+        self.closed.append(driver)
+        driver.quit()
+
+
+def test_calls_keep_the_order():
+    async def scenario():
+        session = AsyncSeleniumDriver(Page(Driver()))
+        results = await asyncio.gather(session.step("slow", 0.05), session.step("fast"))
+        await session.close()
+        return results, session.page.calls
+
+    assert asyncio.run(scenario()) == (["slow", "fast"], ["slow", "fast"])
+
+
+def test_timed_out_call_drops_the_queued_call():
+    async def scenario():
+        session = AsyncSeleniumDriver(Page(Driver()))
+        running = asyncio.ensure_future(session.step("running", 0.1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await session.step("queued", timeout=0.02)
+        await running
+        await asyncio.sleep(0.05)
+        await session.close()
+        return session.page.calls
+
+    assert asyncio.run(scenario()) == ["running"]
+
+
+def test_cancelled_call_is_dropped():
+    async def scenario():
+        session = AsyncSeleniumDriver(Page(Driver()))
+        running = asyncio.ensure_future(session.step("running", 0.05))
+        queued = asyncio.ensure_future(session.step("queued"))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        await running
+        await session.step("next")
+        await session.close()
+        return session.page.calls
+
+    assert asyncio.run(scenario()) == ["running", "next"]
+
+
+def test_iterate_reads_the_generator_items():
+    async def scenario():
+        session = AsyncSeleniumDriver(Page(Driver()))
+        items = [item async for item in session.iterate("items", 3)]
+        await session.close()
+        return items
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_start_and_close():
+    factory = DriverFactory()
+
+    async def scenario():
+        session = await AsyncSeleniumDriver.start(factory, "chrome", Page)
+        assert await session.step("open") == "open"
+        await session.close()
+
+    asyncio.run(scenario())
+    assert factory.closed == factory.drivers
+
+
+def test_browser_started_for_cancelled_caller_is_quit():
+    factory = DriverFactory(start_seconds=0.1)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(AsyncSeleniumDriver.start(factory, "chrome", Page), 0.02)
+
+    asyncio.run(scenario())
+    time.sleep(0.2)
+    assert len(factory.drivers) == 1
+    assert factory.drivers[0].quit_called.wait(1)
+    assert factory.closed == factory.drivers
@@ -0,0 +1,110 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("selenium")
+pytest.importorskip("jsonpath")
+
+from base.base_api import BaseApi
+from tests.conftest import driver  # noqa: F401 - the fixture under test
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps({"user": {"name": "admin", "roles": ["read", "write"]}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DriverFactory(object):
+    """
+    The factory stub, the browser start is recorded
+    """
+
+    def __init__(self):
+        self.started = []
+
+    def get_web_driver_instance(self, browser_type):
+        self.started.append(browser_type)
+        return f"{browser_type} driver"
+
+    def close(self, driver, browser_type):
+        pass
+
+
+class AppConfig(object):
+
+    def __init__(self, browser):
+        self.browser = browser
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def driver_factory():
+    return DriverFactory()
+
+
+@pytest.fixture
+def app_config(request):
+    return AppConfig(getattr(request, "param", "chrome"))
+
+
+@pytest.fixture
+def api(driver):
+    api = BaseApi(driver)
+    yield api
+    api.close()
+
+
+@pytest.mark.api
+def test_api_marked_test_does_not_start_the_browser(driver, driver_factory):
+    assert driver is None
+    assert driver_factory.started == []
+
+
+@pytest.mark.parametrize("app_config", ["api"], indirect=True)
+def test_api_browser_does_not_start_the_browser(driver, driver_factory):
+    assert driver is None
+    assert driver_factory.started == []
+
+
+def test_browser_test_starts_the_browser(driver, driver_factory):
+    assert driver == "chrome driver"
+    assert driver_factory.started == ["chrome"]
+    driver_factory.started.clear()
+
+
+@pytest.mark.api
+def test_base_api_without_driver(api, server_url):
+    assert api.driver is None
+    response = api.send_request("GET", server_url + "/user")
+    api.check_json_key_value(response, "$.user.name", "admin")
+    api.check_json_key_value(response, "$.user.roles[*]", "write")
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("key, value", [("$.user.name", "user"), ("$.user.email", "admin"), ("$.user", None)])
+def test_check_json_key_value_fails(api, server_url, key, value):
+    # The check failed only in the log before, it fails the test like check_xml_tag_value
+    response = api.send_request("GET", server_url + "/user")
+    with pytest.raises(AssertionError):
+        api.check_json_key_value(response, key, value)
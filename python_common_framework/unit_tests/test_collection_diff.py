@@ -0,0 +1,83 @@
+import pytest
+
+from utilities.collection_diff import CollectionDiff
+
+
+@pytest.fixture
+def diff():
+    return CollectionDiff()
+
+
+def test_multiset_match_ignores_order(diff):
+    assert diff.compare([1, 2, 2, 3], iter([3, 2, 1, 2])).matched
+
+
+def test_multiset_reports_missing_extra_and_counts(diff):
+    result = diff.compare([1, 2, 2, 3], [2, 3, 4])
+    assert result.missing == [(1, 1)]
+    assert result.extra == [(4, 1)]
+    assert result.count_mismatches == [(2, 2, 1)]
+
+
+def test_list_is_not_tuple(diff):
+    assert not diff.contains([[1, 2]], [(1, 2)]).matched
+    assert not diff.compare([[1, 2]], [(1, 2)]).matched
+    assert diff.contains([[1, 2]], [[1, 2], (1, 2)]).matched
+
+
+def test_dicts_match_by_value(diff):
+    expected = [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}]
+    actual = [{"tags": [], "id": 2}, {"tags": ["a", "b"], "id": 1}]
+    assert diff.compare(expected, actual).matched
+    assert not diff.compare(expected, [{"id": 1, "tags": ("a", "b")}, {"id": 2, "tags": []}]).matched
+
+
+def test_dicts_with_mixed_keys(diff):
+    assert diff.compare([{1: "a", "b": 2}], [{"b": 2, 1: "a"}]).matched
+
+
+def test_ordered_insertion_shifts_following_items(diff):
+    result = diff.compare(range(100), [0, 1000] + list(range(1, 100)), ordered=True)
+    assert result.order_mismatches[:2] == [(1, 1, 1000), (2, 2, 1)]
+    assert result.order_mismatches[-1] == (20, 20, 19)
+    assert result.totals["order_mismatches"] == 100
+    assert result.extra == [(1000, 1)]
+
+
+def test_ordered_moved_item(diff):
+    result = diff.compare([1, 2, 3, 4], [2, 3, 4, 1], ordered=True)
+    assert result.totals["order_mismatches"] == 4
+    assert not result.missing and not result.extra
+
+
+def test_ordered_large_input_with_duplicates(diff):
+    expected = [index % 50 for index in range(100000)]
+    result = diff.compare(iter(expected), reversed(expected), ordered=True)
+    assert not result.missing and not result.extra and not result.count_mismatches
+    assert len(result.order_mismatches) == diff.max_items
+    assert result.totals["order_mismatches"] == 100000
+
+
+def test_ordered_different_lengths(diff):
+    result = diff.compare([1, 2], [1, 2, 3], ordered=True)
+    assert result.order_mismatches == [(2, None, 3)]
+
+
+def test_ordered_match(diff):
+    assert diff.compare(iter([{"a": 1}, [1]]), [{"a": 1}, [1]], ordered=True).matched
+
+
+def test_reported_items_are_limited():
+    result = CollectionDiff(max_items=3).compare([], range(10))
+    assert len(result.extra) == 3
+    assert result.totals["extra"] == 10
+    assert "7 more extra" in str(result)
+
+
+def test_verify_list_match_ignores_duplicates_and_order():
+    from utilities.util import Util
+    util = Util()
+    assert util.verify_list_match([1, 2, 2, 3], [3, 1, 2])
+    assert util.verify_list_match([{"a": 1}, [1]], [[1], {"a": 1}, {"a": 1}])
+    assert not util.verify_list_match([1, 2], [1, 3])
+    assert not util.verify_collections_match([1, 2, 2, 3], [3, 1, 2])
@@ -0,0 +1,72 @@
+import pytest
+
+from utilities.data_factory import DataFactory
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def new_process(monkeypatch):
+    """
+    Reset the process level state, as it is in the new test run
+    """
+    def reset(worker="gw0"):
+        monkeypatch.setattr(DataFactory, "_counter", 0)
+        monkeypatch.setattr(DataFactory, "_salt", None)
+        monkeypatch.setattr(DataFactory, "_pools", {})
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", worker)
+        return DataFactory()
+    return reset
+
+
+def test_unique_names_in_the_run(new_process):
+    factory = new_process()
+    names = factory.get_unique_names_bulk(100000, 10)
+    assert len(set(names)) == len(names)
+    assert all(len(name) == 10 for name in names)
+
+
+def test_unique_names_between_workers(new_process):
+    names = new_process("gw0").get_unique_names_bulk(1000, 10)
+    names += new_process("gw1").get_unique_names_bulk(1000, 10)
+    assert len(set(names)) == len(names)
+
+
+def test_unique_names_between_runs(new_process):
+    first_run = new_process().get_unique_names_bulk(1000, 5)
+    second_run = new_process().get_unique_names_bulk(1000, 5)
+    assert not set(first_run) & set(second_run)
+
+
+def test_short_names_keep_the_worker_and_counter(new_process):
+    factory = new_process("gw3")
+    names = factory.get_unique_names_bulk(3, 5)
+    unique_width = factory.worker_width + factory.get_counter_width(factory.get_alphabet('lower'))
+    assert all(len(name) == unique_width for name in names)
+    assert all(name[:factory.worker_width] == "ad" for name in names)
+    assert len(set(names)) == 3
+
+
+@pytest.mark.parametrize("symbol_type", ['lower', 'upper', 'digits', 'mix', 'letters'])
+def test_counter_does_not_wrap(new_process, monkeypatch, symbol_type):
+    factory = new_process()
+    alphabet = factory.get_alphabet(symbol_type)
+    assert len(alphabet) ** factory.get_counter_width(alphabet) >= factory.unique_space
+    monkeypatch.setattr(DataFactory, "_salt", factory.unique_space - factory.counter_limit - 1)
+    names = factory.get_unique_names_bulk(1000, 1, symbol_type)
+    assert len(set(names)) == len(names)
+
+
+def test_counter_limit_raises(new_process, monkeypatch):
+    factory = new_process()
+    monkeypatch.setattr(DataFactory, "counter_limit", 10)
+    factory.get_unique_names_bulk(10)
+    with pytest.raises(ValueError):
+        factory.get_unique_names_bulk(1)
+
+
+def test_pool_values_are_unique(new_process):
+    factory = new_process()
+    emails = [factory.get_unique_email() for _ in range(2500)]
+    assert len(set(emails)) == len(emails)
+    assert all(email.endswith("@example.com") for email in emails)
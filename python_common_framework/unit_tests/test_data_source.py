@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from utilities.data_source import DataSource
+
+
+@pytest.fixture
+def source_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(DataSource, "index_dir", str(tmp_path / "index"))
+    path = tmp_path / "cases.jsonl"
+    path.write_text("".join(json.dumps({"case": number}) + "\n" for number in range(5)))
+    return str(path)
+
+
+def test_cached_index_is_used(source_file):
+    DataSource(source_file)
+    source = DataSource(source_file)
+    assert len(source) == 5
+    assert source[4] == {"case": 4}
+
+
+@pytest.mark.parametrize("content", [b"", b"\x01\x02", None])
+def test_corrupted_index_is_rebuilt(source_file, content):
+    index_file = DataSource(source_file).index_file()
+    with open(index_file, "rb") as index:
+        data = index.read()
+    with open(index_file, "wb") as index:
+        # None - the offsets are cut, the header is valid
+        index.write(data[:-8] if content is None else content)
+    source = DataSource(source_file)
+    assert len(source) == 5
+    assert [source[number]["case"] for number in range(5)] == list(range(5))
+
+
+@pytest.mark.parametrize("name, content", [("header.csv", "name,email\n"), ("empty.csv", ""),
+                                           ("blank.csv", "\n\n"), ("empty.jsonl", "")])
+def test_empty_file_has_no_cases(source_file, tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    source = DataSource(str(path))
+    assert len(source) == 0
+    with pytest.raises(IndexError):
+        source[0]
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+import uuid
+
+import pytest
+
+from utilities.db_seeder import DbSeeder, JsonCsvStream
+
+
+def test_json_list_is_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(DbSeeder, "json_chunk_size", 7)
+    records = [{"id": number, "name": f"user {number}", "score": number / 2, "tags": ["a", "]"]}
+               for number in range(50)]
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps(records, indent=1))
+    assert list(DbSeeder({}).read_json_records(str(path))) == records
+
+
+@pytest.mark.parametrize("text", ['{"id": 1}', '[{"id": 1}', '[{"id": 1} {"id": 2}]', '[{"id": 1},]'])
+def test_invalid_json_list(text):
+    with pytest.raises(ValueError):
+        list(DbSeeder({}).iter_json_list(io.StringIO(text)))
+
+
+def test_json_lines_records(tmp_path):
+    path = tmp_path / "users.jsonl"
+    path.write_text('{"id": 1}\n\n{"id": 2}\n')
+    assert list(DbSeeder({}).read_json_records(str(path))) == [{"id": 1}, {"id": 2}]
+
+
+def test_json_csv_stream():
+    records = [{"id": 1, "name": "a,b", "active": True, "data": {"x": 1}}, {"id": 2, "name": "", "active": None}]
+    stream = JsonCsvStream(iter(records), ["id", "name", "active", "data"])
+    data = b""
+    while True:
+        chunk = stream.read(5)
+        if not chunk:
+            break
+        data += chunk
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+    assert rows == [["1", "a,b", "true", '{"x": 1}'], ["2", "", "\\N", "\\N"]]
+
+
+def test_seeds_from_folder(tmp_path):
+    for name in ("02_orders.csv", "01_users.jsonl", "readme.txt", "items.json"):
+        (tmp_path / name).write_text("")
+    seeds = DbSeeder({}).seeds_from_folder(str(tmp_path))
+    assert [table for table, _ in seeds] == ["users", "orders", "items"]
+
+
+@pytest.fixture
+def pg_schema():
+    """
+    Throwaway schema in the Postgres from the PG* environment variables, the test is skipped without Postgres
+    """
+    pytest.importorskip("psycopg2")
+    seeder = DbSeeder({'DB_USER': os.environ.get("PGUSER", "postgres"),
+                       'DB_PASSWORD': os.environ.get("PGPASSWORD", ""),
+                       'DB_HOST': os.environ.get("PGHOST", "localhost"),
+                       'DB_PORT': os.environ.get("PGPORT", "5432"),
+                       'DB_NAME': os.environ.get("PGDATABASE", "postgres")})
+    try:
+        connection = seeder.connect()
+    except Exception as error:
+        pytest.skip(f"Postgres is not available - {error}")
+    schema = "seed_test_" + uuid.uuid4().hex[:8]
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"CREATE TABLE {schema}.users (id int PRIMARY KEY, name text, active boolean, data jsonb)")
+    connection.commit()
+    yield seeder, connection, schema
+    connection.rollback()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    connection.commit()
+    connection.close()
+
+
+def count_rows(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_copy_csv_and_json(pg_schema, tmp_path):
+    seeder, connection, schema = pg_schema
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text("id,name,active\n1,a,true\n2,\"b,c\",false\n")
+    json_path = tmp_path / "users.json"
+    json_path.write_text(json.dumps([{"id": 3, "name": None, "active": True, "data": {"x": [1]}}]))
+    assert seeder.seed(connection, f"{schema}.users", str(csv_path)) == 2
+    assert seeder.seed(connection, f"{schema}.users", str(json_path)) == 1
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id, name, active, data FROM {schema}.users ORDER BY id")
+        assert cursor.fetchall() == [(1, "a", True, None), (2, "b,c", False, None), (3, None, True, {"x": [1]})]
+
+
+def test_savepoint_rollback_keeps_seed_data(pg_schema, tmp_path):
+    seeder, connection, schema = pg_schema
+    seed_path = tmp_path / "users.jsonl"
+    seed_path.write_text('{"id": 1, "name": "seed"}\n')
+    seeder.seed(connection, f"{schema}.users", str(seed_path))
+    with seeder.rollback_on_exit(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {schema}.users (id, name) VALUES (2, 'test')")
+        assert count_rows(connection, f"{schema}.users") == 2
+    assert count_rows(connection, f"{schema}.users") == 1
+
+
+def test_rollback_without_transaction(pg_schema):
+    seeder, connection, schema = pg_schema
+    connection.rollback()
+    with seeder.rollback_on_exit(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {schema}.users (id, name) VALUES (1, 'test')")
+    assert count_rows(connection, f"{schema}.users") == 0
@@ -0,0 +1,44 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utilities.lazy_import import lazy_import
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    package_dir = tmp_path / "lazy_pkg"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("LOADS = []\n")
+    (package_dir / "sub.py").write_text("import time\nfrom lazy_pkg import LOADS\ntime.sleep(0.05)\n"
+                                        "LOADS.append(1)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_pkg"
+    for name in ("lazy_pkg", "lazy_pkg.sub"):
+        sys.modules.pop(name, None)
+
+
+def test_dotted_name_does_not_import_parent(package):
+    module = lazy_import("lazy_pkg.sub")
+    assert "lazy_pkg" not in sys.modules
+    assert "lazy_pkg.sub" not in sys.modules
+    assert module.VALUE == 42
+    assert "lazy_pkg.sub" in sys.modules
+
+
+def test_module_is_loaded_once_by_threads(package):
+    module = lazy_import("lazy_pkg.sub")
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(lambda _: module.VALUE, range(8))) == [42] * 8
+    assert sys.modules["lazy_pkg"].LOADS == [1]
+
+
+def test_loaded_module_is_returned():
+    assert lazy_import("json") is sys.modules["json"]
+
+
+def test_missing_module_fails_on_first_use():
+    module = lazy_import("not_installed_package.module")
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
@@ -0,0 +1,91 @@
+import textwrap
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from utilities.locator_analyzer import LocatorAnalyzer
+
+FIXTURE_PAGE = """
+from selenium.webdriver.common.by import By
+
+from base.base_page import BasePage
+
+
+class FixturePage(BasePage):
+    search_id = "search"
+    menu_css = "div[class*='menu']"
+    any_css = "div > *"
+    third_css = "li:nth-child(3)"
+    prefix_css = "a[href^='/admin']"
+    label_xpath = "//label[contains(., 'Name')]"
+    all_xpath = "//*[@id='main']"
+    absolute_xpath = "/html/body/div"
+    timeout = 10
+
+    def open_menu(self):
+        self.element_click("//nav//a[text()='Menu']", "xpath")
+        self.element_click(locator="#save", locator_type="css")
+        self.get_element("#title")
+        self.get_element_parent(locator="//td[@id='cell']")
+        self.select_items_from_virtual_list("#list", "li.item", ["one"])
+        self.click_on_element_by_xpathtext("span", "Logout")
+        self.element_click(self.menu_css)
+
+    def read_rows(self):
+        rows = self.driver.find_elements(By.CSS_SELECTOR, "table tr")
+        return [row.find_element_by_xpath("..") for row in rows]
+"""
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    package = tmp_path / "fixture_pages"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "fixture_page.py").write_text(textwrap.dedent(FIXTURE_PAGE))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    analyzer = LocatorAnalyzer()
+    analyzer.packages = ("fixture_pages",)
+    analyzer.base_classes = ()
+    return analyzer
+
+
+def locators_by_value(analyzer):
+    return {locator.locator: locator for locator in analyzer.analyze()}
+
+
+def test_class_attributes_are_collected(analyzer):
+    locators = locators_by_value(analyzer)
+    assert (locators["search"].owner, locators["search"].name, locators["search"].locator_type) == \
+        ("FixturePage", "search_id", "id")
+    assert "10" not in locators
+
+
+def test_call_locators_are_collected(analyzer):
+    locators = locators_by_value(analyzer)
+    assert {value: locator.locator_type for value, locator in locators.items()
+            if locator.owner == "fixture_pages.fixture_page"} == {
+        "//nav//a[text()='Menu']": "xpath", "#save": "css", "#title": "css", "//td[@id='cell']": "xpath",
+        "#list": "css", "li.item": "css", "//span[text()='Logout']": "xpath", "table tr": "css", "..": "xpath"}
+    assert locators[".."].name == "line 29"
+
+
+@pytest.mark.parametrize("locator, warning", [
+    ("div[class*='menu']", "class substring match, use .class selector"),
+    ("a[href^='/admin']", "attribute substring match is slower than exact match"),
+    ("div > *", "universal selector matches every element"),
+    ("li:nth-child(3)", "position based selector is fragile"),
+    ("//label[contains(., 'Name')]", "text lookup scans the text nodes"),
+    ("//nav//a[text()='Menu']", "text lookup scans the text nodes"),
+    ("//*[@id='main']", "document wide scan of every element"),
+    ("..", "parent axis, use the scoped CSS from the parent"),
+    ("/html/body/div", "absolute path is fragile"),
+])
+def test_lint_rules(analyzer, locator, warning):
+    assert locators_by_value(analyzer)[locator].warnings == [warning]
+
+
+@pytest.mark.parametrize("locator", ["search", "#save", "table tr", "//td[@id='cell']"])
+def test_fast_locators_have_no_warnings(analyzer, locator):
+    assert locators_by_value(analyzer)[locator].warnings == []
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from utilities.login_state_cache import LoginStateCache
+
+
+class Driver(object):
+    """
+    The browser stub which records the calls, the storage is one dictionary for all pages
+    """
+
+    def __init__(self, url):
+        self.current_url = url
+        self.cookies = []
+        self.storage = {}
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(("get", url))
+        self.current_url = url
+
+    def refresh(self):
+        self.calls.append(("refresh",))
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def delete_all_cookies(self):
+        self.calls.append(("delete_all_cookies",))
+        self.cookies = []
+
+    def execute_script(self, script, *args):
+        if script == LoginStateCache.restore_storage_script:
+            self.storage = dict(args[0]["local"])
+        elif script == LoginStateCache.clear_storage_script:
+            self.calls.append(("clear_storage",))
+            self.storage = {}
+        return {"local": dict(self.storage), "session": {}}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(LoginStateCache, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(LoginStateCache, "_snapshots", {})
+    monkeypatch.setattr(LoginStateCache, "_stats", {"hits": 0, "misses": 0, "stale": 0, "time_saved": 0.0})
+    return LoginStateCache(Driver("https://qa.example/login"))
+
+
+def add_snapshot(cache):
+    LoginStateCache._snapshots[("qa", "user")] = {
+        "environment": "qa", "user": "user", "url": "https://qa.example/home", "captured_at": time.time(),
+        "login_time": 5.0, "cookies": [{"name": "session", "value": "old"}],
+        "storage": {"local": {"token": "old"}, "session": {}}}
+
+
+def test_restored_state_is_used(cache):
+    add_snapshot(cache)
+    assert cache.login("qa", "user", lambda: pytest.fail("UI login is not expected"), lambda: True)
+    assert cache.driver.storage == {"token": "old"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_state_is_cleared_before_ui_login(cache):
+    add_snapshot(cache)
+    driver = cache.driver
+    logged_in = []
+
+    def login_function():
+        # The UI login starts on the page which was open before the restore, without the restored state
+        assert driver.current_url == "https://qa.example/login"
+        assert driver.cookies == [] and driver.storage == {}
+        driver.cookies.append({"name": "session", "value": "new"})
+        logged_in.append(True)
+
+    assert not cache.login("qa", "user", login_function, lambda: bool(logged_in))
+    assert driver.calls[-3:] == [("clear_storage",), ("delete_all_cookies",), ("get", "https://qa.example/login")]
+    assert cache.stats()["stale"] == 1
+    assert LoginStateCache._snapshots[("qa", "user")]["cookies"] == [{"name": "session", "value": "new"}]
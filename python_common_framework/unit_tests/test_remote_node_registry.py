@@ -0,0 +1,100 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("selenium")
+
+import base.remote_node_registry as remote_node_registry
+from base.remote_node_registry import RemoteNodeRegistry
+
+
+class Remote(object):
+    """
+    The webdriver.Remote stub, the session start fails on the nodes from the failing list
+    """
+
+    def __init__(self, failing=()):
+        self.failing = list(failing)
+        self.started = []
+
+    def __call__(self, command_executor, desired_capabilities=None, options=None):
+        if command_executor in self.failing:
+            self.failing.remove(command_executor)
+            raise Exception(f"{command_executor} is not available")
+        self.started.append(command_executor)
+        return object()
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    def install(*failing):
+        stub = Remote(failing)
+        monkeypatch.setattr(remote_node_registry.webdriver, "Remote", stub)
+        return stub
+    return install
+
+
+def test_acquire_least_loaded_then_lowest_latency():
+    registry = RemoteNodeRegistry("http://a=2,http://b=2")
+    registry.nodes[0].latencies.append(2.0)
+    registry.nodes[1].latencies.append(1.0)
+    assert [registry.acquire().url for _ in range(4)] == ["http://b", "http://a", "http://b", "http://a"]
+    assert registry.acquire() is None
+
+
+def test_acquire_skips_excluded_and_drained_nodes():
+    registry = RemoteNodeRegistry("http://a=1,http://b=1")
+    assert registry.acquire(exclude=("http://a",)).url == "http://b"
+    registry.nodes[0].draining = True
+    registry.nodes[0].last_check = float("inf")
+    assert registry.acquire() is None
+
+
+def test_failed_node_is_retried_when_it_is_the_only_free_node(remote):
+    stub = remote("http://a")
+    registry = RemoteNodeRegistry("http://a=1")
+    registry.slot_wait_timeout = 0.1
+    registry.start_session({})
+    assert stub.started == ["http://a"]
+    assert registry.nodes[0].sessions_failed == 1 and not registry.nodes[0].draining
+
+
+def test_other_node_is_used_after_failure(remote):
+    stub = remote("http://a")
+    registry = RemoteNodeRegistry("http://a=1,http://b=1")
+    registry.nodes[1].latencies.append(1.0)
+    registry.start_session({})
+    assert stub.started == ["http://b"]
+    assert registry.nodes[0].in_use == 0
+
+
+def test_node_is_drained_after_repeated_failures(remote):
+    remote("http://a", "http://a")
+    registry = RemoteNodeRegistry("http://a=1,http://b=1")
+    registry.nodes[1].in_use = 1
+    registry.slot_wait_timeout = 0.1
+    with pytest.raises(Exception, match="No Remote WebDriver node slot"):
+        registry.start_session({})
+    assert registry.nodes[0].draining and registry.nodes[0].sessions_failed == 2
+
+
+def test_drained_node_rejoins_when_ready(monkeypatch):
+    registry = RemoteNodeRegistry("http://a=3")
+    node = registry.nodes[0]
+    registry.drain(node)
+    node.last_check = 0.0
+    status = {"value": {"ready": True, "nodes": [{"slots": [{}, {}]}]}}
+    monkeypatch.setattr(remote_node_registry, "urlopen",
+                        lambda url, timeout: io.BytesIO(json.dumps(status).encode("utf-8")))
+    assert registry.acquire() is node
+    assert not node.draining and node.capacity == 2
+
+
+def test_release_frees_the_slot(remote):
+    remote()
+    registry = RemoteNodeRegistry("http://a=1")
+    driver = registry.start_session({})
+    assert registry.acquire() is None
+    registry.release(driver)
+    assert registry.acquire().url == "http://a"
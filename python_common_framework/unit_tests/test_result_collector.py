@@ -0,0 +1,73 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from utilities.result_collector import ResultCollector, ResultSink
+
+
+class Report(object):
+
+    def __init__(self, nodeid, when, outcome="passed", duration=0.1, longreprtext=""):
+        self.nodeid = nodeid
+        self.when = when
+        self.outcome = outcome
+        self.duration = duration
+        self.longreprtext = longreprtext
+
+
+def run_test(sink, nodeid, outcomes):
+    for when, outcome in zip(("setup", "call", "teardown"), outcomes):
+        sink.add_report(Report(nodeid, when, outcome, longreprtext=f"{when} <error> & details"))
+
+
+@pytest.fixture
+def sink(tmp_path):
+    sink = ResultSink("gw0", str(tmp_path))
+    yield sink
+    sink.close()
+
+
+def test_reports_write_fallback_records(sink, monkeypatch):
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "tests/test_a.py::test_marked (call)")
+    collector = ResultCollector("none", sink)
+    collector.add(None, "Title <b> & \"quotes\"", "#title")
+    collector.finish("test_marked")
+    run_test(sink, "tests/test_a.py::test_marked", ("passed", "failed", "passed"))
+    run_test(sink, "tests/test_a.py::test_setup_error", ("failed", "passed", "passed"))
+    run_test(sink, "tests/test_a.py::test_skipped", ("skipped", "passed", "passed"))
+    sink.close()
+    jsonl_path, junit_path = sink.merge()
+
+    with open(jsonl_path) as merged:
+        tests = [record for record in map(json.loads, merged) if record["kind"] == "test"]
+    assert [record["test"] for record in tests] == ["tests/test_a.py::test_marked", "tests/test_a.py::test_setup_error",
+                                                    "tests/test_a.py::test_skipped"]
+
+    suite = ET.parse(junit_path).getroot()
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors"), suite.get("skipped")) == ("3", "1", "1", "1")
+    cases = suite.findall("testcase")
+    assert cases[0].find("failure").text == "Title <b> & \"quotes\" [#title]"
+    assert cases[1].find("error").text.startswith("setup <error> & details")
+    assert cases[2].find("skipped") is not None
+
+
+def test_teardown_failure_after_summary_is_merged(sink, monkeypatch):
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", "tests/test_a.py::test_teardown (call)")
+    collector = ResultCollector("none", sink)
+    collector.add(True, "Title is shown")
+    collector.finish("test_teardown")
+    run_test(sink, "tests/test_a.py::test_teardown", ("passed", "passed", "failed"))
+    sink.close()
+    jsonl_path, junit_path = sink.merge()
+
+    with open(jsonl_path) as merged:
+        records = list(map(json.loads, merged))
+    assert [record["kind"] for record in records] == ["check", "test"]
+    assert records[1]["failed"] and records[1]["error"]
+    assert records[1]["counters"] == {"passed": 1, "failed": 0}
+    assert records[1]["failures"][0]["message"].startswith("teardown <error>")
+
+    suite = ET.parse(junit_path).getroot()
+    assert (suite.get("tests"), suite.get("failures"), suite.get("errors")) == ("1", "0", "1")
+    assert suite.find("testcase").find("error").get("message") == "tests/test_a.py::test_teardown >>> FAILED in teardown"
@@ -0,0 +1,87 @@
+import pytest
+
+from utilities.run_history import RunHistory
+
+
+class Report(object):
+
+    def __init__(self, nodeid, when, outcome, duration, browser=None):
+        self.nodeid = nodeid
+        self.when = when
+        self.outcome = outcome
+        self.duration = duration
+        self.user_properties = [("browser", browser)] if browser else []
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = RunHistory(str(tmp_path / "run_history.sqlite"), run_id="run")
+    yield history
+    history.close()
+
+
+def insert(history, nodeid, outcomes=None, durations=None):
+    """
+    Insert the results of the runs, the first one is the oldest
+    """
+    outcomes = outcomes or ["passed"] * len(durations)
+    durations = durations or [1.0] * len(outcomes)
+    with history.connection:
+        history.connection.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, 'master', NULL, NULL, ?)",
+            [(f"run{index}", nodeid, outcome, duration, float(index))
+             for index, (outcome, duration) in enumerate(zip(outcomes, durations))])
+
+
+def test_flaky_counts_the_flips_in_the_window(history):
+    insert(history, "test_flaky", ["passed", "failed", "passed", "failed"])
+    insert(history, "test_stable", ["failed"] + ["passed"] * 3)
+    insert(history, "test_skipped", ["passed", "skipped", "passed"])
+    assert history.flaky(runs=4) == [("test_flaky", 3, 2, 4), ("test_stable", 1, 1, 4)]
+
+
+def test_flaky_does_not_compare_with_the_run_before_the_window(history):
+    insert(history, "test_fixed", ["failed"] + ["passed"] * 3)
+    assert history.flaky(runs=3) == []
+    assert history.flaky(runs=4) == [("test_fixed", 1, 1, 4)]
+
+
+def test_getting_slower(history):
+    insert(history, "test_slower", durations=[1.0, 1.0, 2.0, 2.0])
+    insert(history, "test_faster", durations=[2.0, 2.0, 1.0, 1.0])
+    insert(history, "test_old_slow_run", durations=[10.0, 1.0, 1.0, 1.1, 1.1])
+    insert(history, "test_new", durations=[1.0, 2.0])
+    assert history.getting_slower(window=2) == [("test_slower", 2.0, 1.0, 2.0)]
+
+
+def test_slowest_uses_the_passed_results(history):
+    insert(history, "test_slow", ["passed", "failed"], [3.0, 30.0])
+    insert(history, "test_fast", durations=[1.0, 2.0])
+    assert history.slowest(runs=2) == [("test_slow", 3.0, 1), ("test_fast", 1.5, 2)]
+
+
+def test_logreport_sums_the_phases(history):
+    history.pytest_runtest_logreport(Report("test_login", "setup", "passed", 1.0))
+    history.pytest_runtest_logreport(Report("test_login", "call", "failed", 2.0, "firefox"))
+    history.pytest_runtest_logreport(Report("test_login", "teardown", "passed", 0.5, "firefox"))
+    history.pytest_runtest_logreport(Report("test_error", "setup", "failed", 0.5))
+    history.pytest_runtest_logreport(Report("test_error", "teardown", "skipped", 0.25))
+    history.flush()
+    rows = history.connection.execute("SELECT nodeid, outcome, duration, browser FROM results ORDER BY nodeid")
+    assert rows.fetchall() == [("test_error", "failed", 0.75, None), ("test_login", "failed", 3.5, "firefox")]
+
+
+def test_logreport_skips_the_forwarded_worker_reports(history):
+    report = Report("test_login", "teardown", "passed", 1.0)
+    report.node = object()
+    history.pytest_runtest_logreport(report)
+    history.flush()
+    assert history.connection.execute("SELECT COUNT(*) FROM results").fetchone() == (0,)
+
+
+def test_add_writes_in_batches(history):
+    history.batch_size = 2
+    history.add("test_one", "passed", 1.0)
+    assert history.connection.execute("SELECT COUNT(*) FROM results").fetchone() == (0,)
+    history.add("test_two", "passed", 1.0)
+    assert history.connection.execute("SELECT COUNT(*) FROM results").fetchone() == (2,)
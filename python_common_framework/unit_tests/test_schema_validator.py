@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from base.schema_validator import SchemaValidator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "email": {"type": "string"},
+        "roles": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["id", "email"],
+}
+
+
+@pytest.fixture
+def schema_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(SchemaValidator, "_validators", {})
+    path = tmp_path / "user.json"
+    path.write_text(json.dumps(SCHEMA))
+    return str(path)
+
+
+def test_validator_is_cached(schema_path):
+    validator = SchemaValidator().get_validator(schema_path)
+    assert SchemaValidator().get_validator(schema_path) is validator
+
+
+def test_changed_schema_is_compiled_again(schema_path):
+    validator = SchemaValidator().get_validator(schema_path)
+    modified = os.stat(schema_path).st_mtime_ns
+    with open(schema_path, "w") as schema_file:
+        json.dump(dict(SCHEMA, required=["id"]), schema_file)
+    # The same modification time, the size is changed
+    os.utime(schema_path, ns=(modified, modified))
+    assert SchemaValidator().get_validator(schema_path) is not validator
+    assert SchemaValidator().validate({"id": 1}, schema_path) == []
+
+
+def test_touched_schema_is_compiled_again(schema_path):
+    validator = SchemaValidator().get_validator(schema_path)
+    modified = os.stat(schema_path).st_mtime_ns
+    os.utime(schema_path, ns=(modified + 10 ** 9, modified + 10 ** 9))
+    assert SchemaValidator().get_validator(schema_path) is not validator
+
+
+def test_all_errors_are_collected(schema_path):
+    errors = SchemaValidator().validate({"id": "1", "roles": ["admin", 2, None]}, schema_path)
+    assert errors == ["<root>: 'email' is a required property",
+                      "id: '1' is not of type 'integer'",
+                      "roles/1: 2 is not of type 'string'",
+                      "roles/2: None is not of type 'string'"]
+
+
+def test_validate_many_keeps_the_order(schema_path):
+    results = SchemaValidator().validate_many([{"id": 1, "email": "a"}, {"id": 2}, {"id": 3, "email": "c"}],
+                                              schema_path)
+    assert results == [[], ["<root>: 'email' is a required property"], []]
+
+
+def test_invalid_schema_is_rejected(schema_path):
+    with open(schema_path, "w") as schema_file:
+        json.dump({"type": "unknown"}, schema_file)
+    with pytest.raises(Exception):
+        SchemaValidator().get_validator(schema_path)
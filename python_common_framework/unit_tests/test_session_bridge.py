@@ -0,0 +1,30 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from base.api_client import ApiClient
+from base.session_bridge import SessionBridge
+
+
+class Driver(object):
+
+    current_url = "https://qa.example/home"
+
+    def __init__(self):
+        self.cookies = []
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def refresh(self):
+        pass
+
+
+@pytest.mark.parametrize("attribute", ["HttpOnly", "httponly", "HTTPOnly"])
+def test_http_only_is_kept_in_any_case(attribute):
+    client = ApiClient(requests.Session())
+    client.session.cookies.set("session", "1", domain="qa.example", rest={attribute: None})
+    client.session.cookies.set("theme", "dark", domain="qa.example", rest={})
+    driver = Driver()
+    assert SessionBridge(driver, client).api_to_browser(refresh=False) == 2
+    assert {cookie["name"]: cookie["httpOnly"] for cookie in driver.cookies} == {"session": True, "theme": False}
@@ -0,0 +1,110 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from base.tab_pool import TabPool
+
+
+class Browser(object):
+    """
+    The WebDriver stub, each tab keeps its URL, storage and the site cookies are shared by the tabs
+    """
+
+    def __init__(self):
+        self.window_handles = ["test"]
+        self.current_window_handle = "test"
+        self.urls = {"test": "https://app/test"}
+        self.storage = {"test": {"token": "test"}}
+        self.cookies = {"session": "test"}
+        self.switch_to = self
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.open"):
+            handle = f"tab{len(self.window_handles)}"
+            self.window_handles.append(handle)
+            self.urls[handle] = "about:blank"
+            self.storage[handle] = {}
+        elif "localStorage.clear" in script:
+            self.storage[self.current_window_handle].clear()
+
+    def get(self, url):
+        self.urls[self.current_window_handle] = url
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+
+class Page(object):
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def open(self, url):
+        self.driver.get(url)
+
+    def login(self, token):
+        self.driver.execute_script("localStorage.setItem('token', arguments[0]);", token)
+        self.driver.storage[self.driver.current_window_handle]["token"] = token
+
+
+@pytest.fixture
+def browser():
+    return Browser()
+
+
+@pytest.fixture
+def pool(browser):
+    pool = TabPool(browser, size=2)
+    pool.open()
+    return pool
+
+
+def test_test_tab_is_not_pooled(browser, pool):
+    assert pool.handles == ["tab1", "tab2"]
+    first, second = pool.acquire(Page), pool.acquire(Page)
+    with pytest.raises(Exception, match="tabs of the pool are in use"):
+        pool.acquire(Page)
+    pool.release(first)
+    pool.release(second)
+    assert browser.urls["test"] == "https://app/test" and browser.storage["test"] == {"token": "test"}
+
+
+def test_page_acts_on_its_own_tab(browser, pool):
+    admin = pool.acquire(Page, "https://app/admin")
+    user = pool.acquire(Page, "https://app/user")
+    admin.open("https://app/admin/users")
+    assert browser.current_window_handle == "tab1"
+    user.open("https://app/user/profile")
+    assert browser.urls == {"test": "https://app/test", "tab1": "https://app/admin/users",
+                            "tab2": "https://app/user/profile"}
+
+
+def test_release_clears_the_tab_storage(browser, pool):
+    page = pool.acquire(Page, "https://app/admin")
+    page.login("admin")
+    pool.release(page)
+    assert browser.urls["tab1"] == "about:blank"
+    assert browser.storage["tab1"] == {} and browser.cookies == {}
+    assert pool.owners == {"tab1": None, "tab2": None}
+
+
+def test_release_keeps_the_cookies_when_the_reset_cookies_is_off(browser, pool):
+    pool.reset_cookies = False
+    page = pool.acquire(Page, "https://app/admin")
+    pool.release(page)
+    assert browser.cookies == {"session": "test"}
+
+
+def test_run_flows_and_close(browser, pool):
+    results = pool.run_flows([(Page, "https://app/admin", lambda page: page.driver.current_window_handle),
+                              (Page, "https://app/user", lambda page: page.driver.current_window_handle)])
+    assert results == ["tab1", "tab2"]
+    pool.close()
+    assert browser.window_handles == ["test"] and browser.current_window_handle == "test"
+    assert pool.stats()["switches"] > 0
@@ -0,0 +1,182 @@
+import inspect
+import os
+import subprocess
+import textwrap
+
+import pytest
+
+import utilities.test_impact as test_impact
+
+HOME_PAGE = """
+class HomePage(object):
+    title_css = "#title"
+    search_xpath = "//input[@name='q']"
+    retries = 2
+
+    def open(self):
+        return "home"
+
+    def title(self):
+        return self.title_css
+"""
+
+USAGE_MAP = {
+    "tests/home/test_home.py::test_open": {"functions": ["pages/home_page.py:HomePage.open"], "locators": []},
+    "tests/home/test_home.py::test_title": {"functions": ["pages/home_page.py:HomePage.title"],
+                                            "locators": ["#title"]},
+    "tests/other/test_other.py::test_other": {"functions": ["pages/other_page.py:OtherPage.open"],
+                                              "locators": ["#other"]},
+}
+
+
+class Config(object):
+
+    def getoption(self, name):
+        return None
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """
+    The framework folder in the temp git repository, the usage map and the first commit are ready
+    """
+    environment = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                       GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, env=environment, capture_output=True, check=True)
+
+    def write(path, source):
+        file_path = tmp_path / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(textwrap.dedent(source))
+
+    write("pages/home_page.py", HOME_PAGE)
+    write("pages/other_page.py", "class OtherPage(object):\n    def open(self):\n        return 'other'\n")
+    write("base/selenium_driver.py", "class SeleniumDriver(object):\n    pass\n")
+    write("tests/home/test_home.py", "def test_open():\n    pass\n")
+    write(".gitignore", "test_impact_map.json\n")
+    git("init", "-q")
+    git("add", "-A")
+    git("commit", "-q", "-m", "initial")
+    impact = test_impact.TestImpact(Config())
+    impact.framework_dir = str(tmp_path)
+    impact.map_file = str(tmp_path / "test_impact_map.json")
+    impact._write_json(impact.map_file, USAGE_MAP)
+    impact.write = write
+    return impact
+
+
+def affected(impact):
+    selected = impact.affected_tests("HEAD", list(USAGE_MAP) + ["tests/new/test_new.py::test_new"])
+    return None if selected is None else selected - {"tests/new/test_new.py::test_new"}
+
+
+def test_method_change_selects_its_tests(repo):
+    repo.write("pages/home_page.py", HOME_PAGE.replace('return "home"', 'return "home page"'))
+    assert repo.changed_symbols("HEAD", "pages/home_page.py") == ({"pages/home_page.py:HomePage.open"},
+                                                                  set(), False)
+    assert affected(repo) == {"tests/home/test_home.py::test_open"}
+
+
+def test_locator_change_selects_the_tests_which_used_the_old_value(repo):
+    repo.write("pages/home_page.py", HOME_PAGE.replace('"#title"', '"#page-title"'))
+    assert repo.changed_symbols("HEAD", "pages/home_page.py") == (set(), {"#title"}, False)
+    assert affected(repo) == {"tests/home/test_home.py::test_title"}
+
+
+def test_not_locator_attribute_change_selects_the_module(repo):
+    repo.write("pages/home_page.py", HOME_PAGE.replace("retries = 2", "retries = 3"))
+    assert repo.changed_symbols("HEAD", "pages/home_page.py")[2] is True
+    assert affected(repo) == {"tests/home/test_home.py::test_open", "tests/home/test_home.py::test_title"}
+
+
+def test_class_header_change_selects_the_module(repo):
+    repo.write("pages/home_page.py", HOME_PAGE.replace("class HomePage(object)", "class HomePage(dict)"))
+    assert affected(repo) == {"tests/home/test_home.py::test_open", "tests/home/test_home.py::test_title"}
+
+
+def test_new_locator_selects_the_module(repo):
+    repo.write("pages/home_page.py", HOME_PAGE.replace("    retries = 2", "    retries = 2\n    logo_css = '#logo'"))
+    assert affected(repo) == {"tests/home/test_home.py::test_open", "tests/home/test_home.py::test_title"}
+
+
+def test_test_file_change_selects_its_tests(repo):
+    repo.write("tests/home/test_home.py", "def test_open():\n    assert True\n")
+    assert affected(repo) == {"tests/home/test_home.py::test_open", "tests/home/test_home.py::test_title"}
+
+
+def test_unmapped_tests_are_selected(repo):
+    assert repo.affected_tests("HEAD", ["tests/new/test_new.py::test_new"]) == {"tests/new/test_new.py::test_new"}
+    assert affected(repo) == set()
+
+
+@pytest.mark.parametrize("path", ["base/selenium_driver.py", "utilities/helper.py", "conftest.py"])
+def test_core_and_out_of_tree_changes_select_all_tests(repo, path):
+    repo.write(path, "CHANGED = True\n")
+    assert repo.affected_tests("HEAD", list(USAGE_MAP)) is None
+
+
+def test_not_python_changes_are_ignored(repo):
+    repo.write("pages/README.md", "Pages\n")
+    assert affected(repo) == set()
+
+
+def test_empty_or_unresolved_map_selects_all_tests(repo):
+    repo._write_json(repo.map_file, {"tests/home/test_home.py::test_open":
+                                     {"functions": ["pages/home_page.py:<unresolved>"], "locators": []}})
+    assert repo.affected_tests("HEAD", list(USAGE_MAP)) is None
+    os.remove(repo.map_file)
+    assert repo.affected_tests("HEAD", list(USAGE_MAP)) is None
+
+
+def test_qualname_by_line(tmp_path):
+    source = tmp_path / "page.py"
+    source.write_text(textwrap.dedent("""
+        import functools
+
+
+        class Page(object):
+
+            @functools.lru_cache()
+            @staticmethod
+            def cached():
+                def inner():
+                    return 1
+                return inner
+
+            def wait(self):
+                return [lambda: 1]
+
+
+        async def load():
+            pass
+    """))
+    impact = test_impact.TestImpact(Config())
+    assert impact._qualname_by_line(str(source), 7) == "Page.cached"
+    assert impact._qualname_by_line(str(source), 8) == "Page.cached"
+    assert impact._qualname_by_line(str(source), 9) == "Page.cached"
+    assert impact._qualname_by_line(str(source), 10) == "Page.cached.<locals>.inner"
+    assert impact._qualname_by_line(str(source), 14) == "Page.wait"
+    assert impact._qualname_by_line(str(source), 18) == "load"
+    assert impact._qualname_by_line(str(source), 5) is None
+
+
+def test_qualname_by_line_matches_the_code_objects():
+    impact = test_impact.TestImpact(Config())
+    file_path = test_impact.__file__
+    with open(file_path) as source:
+        code = compile(source.read(), file_path, "exec")
+    functions = []
+
+    def visit(code_object):
+        for constant in code_object.co_consts:
+            if hasattr(constant, "co_qualname"):
+                if constant.co_flags & inspect.CO_OPTIMIZED and "<" not in constant.co_name:
+                    functions.append(constant)
+                visit(constant)
+
+    visit(code)
+    assert functions
+    for function in functions:
+        assert impact._qualname_by_line(file_path, function.co_firstlineno) == function.co_qualname
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+pytest.importorskip("selenium")
+
+from utilities.visual_compare import VisualCompare
+
+
+def gradient():
+    row = np.linspace(0, 255, 100).astype(np.uint8)
+    return np.repeat(np.repeat(row[None, :, None], 100, axis=0), 3, axis=2)
+
+
+@pytest.fixture
+def compare(tmp_path, monkeypatch):
+    monkeypatch.setattr(VisualCompare, "baseline_dir", str(tmp_path / "baselines"))
+    monkeypatch.setattr(VisualCompare, "diff_dir", str(tmp_path / "diffs"))
+    monkeypatch.setattr(VisualCompare, "_baselines", {})
+    compare = VisualCompare(None)
+    compare.save_baseline("page", gradient())
+    return compare
+
+
+def verify(compare, monkeypatch, actual, **kwargs):
+    monkeypatch.setattr(compare, "capture", lambda *args: actual)
+    return compare.verify_visual_match("page", **kwargs)
+
+
+def test_equal_images_match(compare, monkeypatch):
+    assert verify(compare, monkeypatch, gradient())
+
+
+def test_difference_within_tolerance_matches(compare, monkeypatch, tmp_path):
+    actual = gradient()
+    actual[::2] = np.clip(actual[::2].astype(np.int16) + 3, 0, 255).astype(np.uint8)
+    assert not verify(compare, monkeypatch, actual)
+    assert verify(compare, monkeypatch, actual, pixel_tolerance=5)
+
+
+def test_text_change_with_equal_hash_fails(compare, monkeypatch, tmp_path):
+    actual = gradient()
+    # The digit sized change: 6x4 pixels, 0.24% of the image
+    actual[40:44, 50:56] = np.clip(actual[40:44, 50:56].astype(np.int16) - 60, 0, 255).astype(np.uint8)
+    assert np.array_equal(compare.perceptual_hash(actual), compare.perceptual_hash(gradient()))
+    assert not verify(compare, monkeypatch, actual, pixel_tolerance=10, max_diff_ratio=0.001)
+    assert len(list((tmp_path / "diffs").iterdir())) == 1
+    assert verify(compare, monkeypatch, actual, pixel_tolerance=10, max_diff_ratio=0.01)
+
+
+def test_masked_change_matches(compare, monkeypatch):
+    actual = gradient()
+    actual[40:44, 50:56] = 0
+    assert verify(compare, monkeypatch, actual, mask_regions=[(50, 40, 6, 4)])
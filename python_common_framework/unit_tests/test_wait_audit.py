@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from utilities.wait_audit import WaitAudit
+
+
+@pytest.fixture
+def audit(tmp_path, monkeypatch):
+    monkeypatch.setattr(WaitAudit, "history_file", str(tmp_path / "wait_history.json"))
+    monkeypatch.setattr(WaitAudit, "tuning_enabled", True)
+    for name in ("_test_summary", "_locator_summary", "_session_samples"):
+        monkeypatch.setattr(WaitAudit, name, {})
+    monkeypatch.setattr(WaitAudit, "_timed_out", set())
+    monkeypatch.setattr(WaitAudit, "_history", None)
+    return WaitAudit()
+
+
+def test_settings_are_requested_without_history(audit):
+    assert audit.get_wait_settings("#id", "css", 10, 0.5) == (10, 0.5)
+
+
+def test_settings_are_tuned_from_history(audit):
+    for elapsed in (0.4, 0.5, 0.6, 0.5, 0.8):
+        audit.record_wait("#id", "css", 10, elapsed, True)
+    assert audit.get_wait_settings("#id", "css", 10, 0.5) == (2.0, 0.12)
+
+
+def test_timed_out_locator_is_not_tuned(audit):
+    WaitAudit._history["css=#id"] = [0.5] * 5
+    audit.mark_timed_out("#id", "css")
+    assert audit.get_wait_settings("#id", "css", 10, 0.5) == (10, 0.5)
+
+
+def test_tuning_disabled(audit, monkeypatch):
+    monkeypatch.setattr(WaitAudit, "tuning_enabled", False)
+    WaitAudit._history["css=#id"] = [0.5] * 5
+    assert audit.get_wait_settings("#id", "css", 10, 0.5) == (10, 0.5)
+
+
+def test_worker_histories_are_merged(audit, tmp_path, monkeypatch):
+    with open(WaitAudit.history_file, "w") as history:
+        json.dump({"css=#old": [1.0] * WaitAudit.history_size}, history)
+    monkeypatch.setattr(WaitAudit, "_history", None)
+    audit = WaitAudit()
+    audit.record_wait("#old", "css", 10, 2.0, True)
+    audit.save_history("gw0")
+    WaitAudit._session_samples = {"css=#new": [0.3]}
+    audit.save_history("gw1")
+    audit.merge_history()
+
+    with open(WaitAudit.history_file) as history:
+        merged = json.load(history)
+    assert merged["css=#new"] == [0.3]
+    assert len(merged["css=#old"]) == WaitAudit.history_size
+    assert merged["css=#old"][-1] == 2.0
+    assert not list(tmp_path.glob("wait_history-*.json"))
+
+
+class Timeouts(object):
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    @property
+    def implicit_wait(self):
+        return self.driver.implicit_wait
+
+
+class Element(object):
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+
+class Driver(object):
+    """
+    The driver stub which finds the element on the third lookup and records the implicit wait of each lookup
+    """
+
+    def __init__(self):
+        self.implicit_wait = 30
+        self.lookups = []
+        self.timeouts = Timeouts(self)
+
+    def implicitly_wait(self, seconds):
+        self.implicit_wait = seconds
+
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+        self.lookups.append(self.implicit_wait)
+        if len(self.lookups) < 3:
+            raise NoSuchElementException(value)
+        return Element()
+
+
+def test_tuned_wait_runs_without_implicit_wait(audit):
+    pytest.importorskip("selenium")
+    from base.selenium_driver import SeleniumDriver
+    driver = Driver()
+    assert SeleniumDriver(driver).wait_for_element("#id", timeout=5, poll_frequency=0.01) is not None
+    assert driver.lookups == [0, 0, 0]
+    assert driver.implicit_wait == 30
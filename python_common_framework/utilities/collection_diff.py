@@ -0,0 +1,232 @@
+import logging
+from collections import Counter
+from itertools import zip_longest
+
+import utilities.custom_logger as cl
+
+
+class FrozenList(tuple):
+    """
+    The hashable value of the list, it is not equal to the tuple with the same items
+    """
+
+    def __eq__(self, other):
+        return type(other) is FrozenList and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((FrozenList, tuple(self)))
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class FrozenDict(frozenset):
+    """
+    The hashable value of the dictionary, the (key, value) pairs set
+    """
+
+    def __eq__(self, other):
+        return type(other) is FrozenDict and frozenset.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((FrozenDict, frozenset(self)))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class DiffResult(object):
+    """
+    *****
+
+    The result of the collections comparison.
+    Only the first max_items differences of each kind are kept, the totals are always counted.
+
+    *****
+    """
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.expected_count = 0
+        self.actual_count = 0
+        self.missing = []
+        self.extra = []
+        self.count_mismatches = []
+        self.order_mismatches = []
+        self.totals = {"missing": 0, "extra": 0, "count_mismatches": 0, "order_mismatches": 0}
+
+    def add(self, kind, item):
+        self.totals[kind] += 1
+        items = getattr(self, kind)
+        if len(items) < self.max_items:
+            items.append(item)
+
+    @property
+    def matched(self):
+        return not any(self.totals.values())
+
+    def __bool__(self):
+        return self.matched
+
+    def __str__(self):
+        if self.matched:
+            return f"Collections match, {self.actual_count} items"
+        lines = [f"Collections differ, expected {self.expected_count} items, actual {self.actual_count} items"]
+        for item, count in self.missing:
+            lines.append(f"  missing: {item!r} x{count}")
+        for item, count in self.extra:
+            lines.append(f"  extra: {item!r} x{count}")
+        for item, expected, actual in self.count_mismatches:
+            lines.append(f"  count mismatch: {item!r} expected x{expected}, actual x{actual}")
+        for index, expected, actual in self.order_mismatches:
+            if expected is None:
+                lines.append(f"  order mismatch at {index}: unexpected {actual!r}")
+            elif actual is None:
+                lines.append(f"  order mismatch at {index}: expected {expected!r} is not in place")
+            else:
+                lines.append(f"  order mismatch at {index}: expected {expected!r}, actual {actual!r}")
+        for kind, total in self.totals.items():
+            if total > self.max_items:
+                lines.append(f"  ... {total - self.max_items} more {kind.replace('_', ' ')}")
+        return "\n".join(lines)
+
+
+class CollectionDiff(object):
+    """
+    *****
+
+    The collection comparison engine compares two collections as multisets (duplicates are counted)
+    in linear time and, optionally, by order. The inputs can be any iterables, for example generators
+    over DB cursor or API pages, they are consumed once and only the item counts are kept.
+    The ordered comparison walks both inputs together and compares the items position by position,
+    so one inserted item is reported as the shift of all following items, the first max_items
+    positions are kept and all of them are counted.
+    Unhashable items (dictionaries, lists) are compared by their frozen value, a list never equals a tuple.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    max_items = 20
+
+    def __init__(self, max_items=None, key=None):
+        """
+        :param max_items: Maximum number of reported differences of each kind
+        :param key: Function which returns the comparison key of the item OPTIONAL
+        """
+        if max_items is not None:
+            self.max_items = max_items
+        self.key = key
+
+    def freeze(self, item):
+        """
+        Convert the item to the hashable value
+        :param item: Any item
+        :return: Hashable value
+        """
+        if isinstance(item, dict):
+            return FrozenDict((key, self.freeze(value)) for key, value in item.items())
+        if isinstance(item, list):
+            return FrozenList(self.freeze(value) for value in item)
+        if isinstance(item, tuple):
+            return tuple(self.freeze(value) for value in item)
+        if isinstance(item, set):
+            return frozenset(self.freeze(value) for value in item)
+        return item
+
+    def make_key(self, item):
+        if self.key is not None:
+            item = self.key(item)
+        try:
+            hash(item)
+            return item
+        except TypeError:
+            return self.freeze(item)
+
+    def compare(self, expected, actual, ordered=False):
+        """
+        Compare two collections
+        :param expected: Expected iterable
+        :param actual: Actual iterable
+        :param ordered: Set True to report the order mismatches too
+        :return: DiffResult
+        """
+        result = DiffResult(self.max_items)
+        expected_counts = Counter()
+        actual_counts = Counter()
+        if ordered:
+            self.add_order_mismatches(result, expected, actual, expected_counts, actual_counts)
+        else:
+            for item in expected:
+                expected_counts[self.make_key(item)] += 1
+            for item in actual:
+                actual_counts[self.make_key(item)] += 1
+
+        result.expected_count = sum(expected_counts.values())
+        result.actual_count = sum(actual_counts.values())
+        for key, count in expected_counts.items():
+            actual_count = actual_counts.get(key, 0)
+            if actual_count == 0:
+                result.add("missing", (key, count))
+            elif actual_count != count:
+                result.add("count_mismatches", (key, count, actual_count))
+        for key, count in actual_counts.items():
+            if key not in expected_counts:
+                result.add("extra", (key, count))
+        if result.matched:
+            self.log.info(str(result))
+        else:
+            self.log.error(str(result))
+        return result
+
+    def add_order_mismatches(self, result, expected, actual, expected_counts, actual_counts):
+        """
+        Walk both collections together, count the item keys and add the positions where the keys differ
+        :param result: DiffResult
+        :param expected: Expected iterable
+        :param actual: Actual iterable
+        :param expected_counts: Counter of the expected item keys, updated in place
+        :param actual_counts: Counter of the actual item keys, updated in place
+        """
+        missing_value = object()
+        for index, (expected_item, actual_item) in enumerate(zip_longest(expected, actual,
+                                                                         fillvalue=missing_value)):
+            expected_key = actual_key = None
+            if expected_item is not missing_value:
+                expected_key = self.make_key(expected_item)
+                expected_counts[expected_key] += 1
+            if actual_item is not missing_value:
+                actual_key = self.make_key(actual_item)
+                actual_counts[actual_key] += 1
+            if expected_item is missing_value or actual_item is missing_value or expected_key != actual_key:
+                result.add("order_mismatches", (index, expected_key, actual_key))
+
+    def contains(self, expected, actual):
+        """
+        Check the actual collection contains all items of the expected collection, duplicates are counted
+        :param expected: Expected iterable
+        :param actual: Actual iterable
+        :return: DiffResult, only missing items and count mismatches are reported
+        """
+        result = DiffResult(self.max_items)
+        expected_counts = Counter(self.make_key(item) for item in expected)
+        result.expected_count = sum(expected_counts.values())
+        found = Counter()
+        for item in actual:
+            result.actual_count += 1
+            key = self.make_key(item)
+            if found[key] < expected_counts.get(key, 0):
+                found[key] += 1
+        for key, count in expected_counts.items():
+            if found[key] == 0:
+                result.add("missing", (key, count))
+            elif found[key] < count:
+                result.add("count_mismatches", (key, count, found[key]))
+        return result
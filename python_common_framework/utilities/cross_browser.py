@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import utilities.custom_logger as cl
+
+
+class CrossBrowser(object):
+    """
+    *****
+
+    The cross browser fan-out runs one test on several browsers in parallel threads.
+    Each thread starts its own driver with WebDriverFactory and calls the test function with it,
+    so the page objects of each browser work with their own session.
+    The current thread browser is used to tag the verification results and the screenshots.
+
+    Mark the test which uses the driver fixture:
+        @pytest.mark.browsers("chrome", "firefox")
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    _local = threading.local()
+
+    @classmethod
+    def current_browser(cls):
+        """
+        Get the browser of the current fan-out thread
+        :return: Browser name, None outside the fan-out
+        """
+        return getattr(cls._local, "browser", None)
+
+    def __init__(self, driver_factory, browsers):
+        """
+        :param driver_factory: WebDriverFactory object
+        :param browsers: Browser names
+        """
+        self.driver_factory = driver_factory
+        self.browsers = list(browsers)
+
+    def run_browser(self, browser, test_function, kwargs):
+        """
+        Run the test function on the browser
+        :return: (browser, error traceback or None, duration in seconds)
+        """
+        CrossBrowser._local.browser = browser
+        start_time = time.monotonic()
+        driver = None
+        try:
+            driver = self.driver_factory.get_web_driver_instance(browser)
+            test_function(**dict(kwargs, driver=driver))
+            error = None
+        except Exception:
+            # The pytest outcomes (skip, xfail, fail) and KeyboardInterrupt are not Exception,
+            # they are raised to the test by run
+            error = traceback.format_exc()
+        finally:
+            if driver is not None:
+                self.driver_factory.close(driver, browser)
+            CrossBrowser._local.browser = None
+        duration = time.monotonic() - start_time
+        self.log.info(f"{browser} >>> {'FAILED' if error else 'SUCCESS'} in {duration:.2f}s")
+        return browser, error, duration
+
+    def run(self, test_function, kwargs):
+        """
+        Run the test function on all browsers in parallel
+        The pytest outcome or KeyboardInterrupt of any browser is raised after all browsers finished
+        :param test_function: Test function which gets the driver argument
+        :param kwargs: The other test function arguments
+        :return: List of (browser, error traceback or None, duration in seconds) in the browsers order
+        """
+        with ThreadPoolExecutor(max_workers=len(self.browsers), thread_name_prefix="browser") as executor:
+            futures = [executor.submit(self.run_browser, browser, test_function, kwargs) for browser in self.browsers]
+            return [future.result() for future in futures]
+
+    def report(self, results):
+        """
+        :return: Failure report of the failed browsers, None if all browsers passed
+        """
+        failed = [(browser, error) for browser, error, _ in results if error]
+        if not failed:
+            return None
+        lines = [f"FAILED on {len(failed)} of {len(results)} browsers: {', '.join(browser for browser, _ in failed)}"]
+        for browser, error in failed:
+            lines.append(f"[{browser}] {error}")
+        return "\n".join(lines)
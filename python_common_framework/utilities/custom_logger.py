@@ -1,15 +1,23 @@
-import inspect
 import logging
+import os
+import sys
 
 
 def custom_logger(logLevel=logging.DEBUG):
     # Gets the name of the class / method from where this method is called
-    logger_name = inspect.stack()[1][3]
+    # The caller frame is used instead of inspect.stack(), it does not read the source files
+    logger_name = sys._getframe(1).f_code.co_name
     logger = logging.getLogger(logger_name)
+    # The logger is configured only once, the next calls reuse its handler
+    if logger.handlers:
+        for handler in logger.handlers:
+            handler.setLevel(min(handler.level, logLevel))
+        return logger
     # By default, log all messages
     logger.setLevel(logging.DEBUG)
 
-    file_handler = logging.FileHandler("automation.log", mode='a')
+    # The log file is opened on the first message, AUTOMATION_LOG sets another file, for example for the unit tests
+    file_handler = logging.FileHandler(os.environ.get("AUTOMATION_LOG", "automation.log"), mode='a', delay=True)
     file_handler.setLevel(logLevel)
 
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s: %(message)s',
@@ -0,0 +1,206 @@
+import logging
+import os
+import secrets
+import string
+import threading
+from collections import deque
+
+import utilities.custom_logger as cl
+from utilities.lazy_import import lazy_import
+
+# NumPy is loaded on the first data generation
+np = lazy_import("numpy")
+
+
+class DataFactory(object):
+    """
+    *****
+
+    The data factory generates test data strings, names and emails in bulk with vectorized random generator.
+    The unique values end with the worker number and the salted process counter. The worker number
+    separates the xdist workers of the run, the random per-process salt separates the runs, so the
+    values of the different runs against the shared environment collide only with the probability
+    of about (names of both runs) / unique_space. The values are pre-generated into the session pools
+    and handed out one by one in O(1).
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    alphabets = {
+        'lower': string.ascii_lowercase,
+        'upper': string.ascii_uppercase,
+        'digits': string.digits,
+        'mix': string.ascii_letters + string.digits,
+        'letters': string.ascii_letters
+    }
+    worker_width = 2
+    # The salted counter space, the counter part is as wide as the alphabet needs for it:
+    # 8 lower/upper letters, 7 mix/letters symbols, 12 digits
+    unique_space = 2 ** 37
+    # Maximum unique values of one process
+    counter_limit = 2 ** 24
+    pool_size = 1000
+
+    # Process level state, shared between all factories
+    _counter = 0
+    _salt = None
+    _lock = threading.Lock()
+    _pools = {}
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self._rng = None
+        self.worker_index = self.get_worker_index()
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
+
+    def get_worker_index(self):
+        """
+        Get the xdist worker number, gw3 -> 3, 0 if the tests are not distributed
+        :return: Worker number
+        """
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+        digits = "".join(symbol for symbol in worker if symbol.isdigit())
+        return int(digits) if digits else 0
+
+    def get_alphabet(self, symbol_type):
+        return self.alphabets.get(symbol_type, self.alphabets['letters'])
+
+    def _reserve(self, count):
+        """
+        Reserve the salted process counter values
+        :param count: Count of values
+        :return: First reserved value
+        """
+        with DataFactory._lock:
+            if DataFactory._salt is None:
+                DataFactory._salt = secrets.randbelow(self.unique_space - self.counter_limit)
+            first = DataFactory._counter
+            if first + count > self.counter_limit:
+                raise ValueError(f"The process unique values limit {self.counter_limit} is reached")
+            DataFactory._counter += count
+        return DataFactory._salt + first
+
+    def get_counter_width(self, alphabet):
+        """
+        Get the symbols count which encodes any salted counter value in the alphabet
+        :param alphabet: Alphabet string
+        :return: Width
+        """
+        width = 1
+        while len(alphabet) ** width < self.unique_space:
+            width += 1
+        return width
+
+    def _encode(self, numbers, width, alphabet):
+        """
+        Encode the numbers to the fixed width strings in the alphabet base
+        :param numbers: Numbers array
+        :param width: Result width
+        :param alphabet: Alphabet string
+        :return: Codes array with shape (len(numbers), width)
+        """
+        base = len(alphabet)
+        powers = base ** np.arange(width - 1, -1, -1, dtype=np.int64)
+        digits = (numbers[:, None] // powers) % base
+        return np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)[digits]
+
+    def _to_strings(self, codes):
+        """
+        Convert the codes array to the list of strings, one string per row
+        :param codes: Codes array with shape (count, length)
+        :return: List of strings
+        """
+        count, length = codes.shape
+        if length == 0:
+            return [""] * count
+        data = np.ascontiguousarray(codes, dtype=np.uint8).tobytes().decode("ascii")
+        return [data[index:index + length] for index in range(0, len(data), length)]
+
+    def get_alpha_numeric_bulk(self, count, length, symbol_type='letters'):
+        """
+        Get the list of random strings
+        :param count: Count of strings
+        :param length: Length of each string
+        :param symbol_type: Type of characters, lower/upper/digits/mix/letters. Default is letters
+        :return: List of strings
+        """
+        alphabet = np.frombuffer(self.get_alphabet(symbol_type).encode("ascii"), dtype=np.uint8)
+        return self._to_strings(alphabet[self.rng.integers(0, len(alphabet), size=(count, length))])
+
+    def get_unique_names_bulk(self, count, length=10, symbol_type='lower'):
+        """
+        Get the list of unique names, the names never collide between the workers of the run and
+        practically never between the runs
+        The name is the random part, the worker number and the salted counter
+        :param count: Count of names
+        :param length: Length of each name, the shorter names are widened to the unique part length
+                       (10 for lower/upper, 9 for mix/letters, 14 for digits)
+        :param symbol_type: Type of characters, lower/upper/digits/mix/letters. Default is lower
+        :return: List of names
+        """
+        alphabet = self.get_alphabet(symbol_type)
+        counter_width = self.get_counter_width(alphabet)
+        unique_width = self.worker_width + counter_width
+        if self.worker_index >= len(alphabet) ** self.worker_width:
+            raise ValueError(f"Worker {self.worker_index} does not fit {self.worker_width} {symbol_type} symbols")
+        if length < unique_width:
+            self.log.warning(f"Unique name length {length} is widened to {unique_width} {symbol_type} symbols")
+        counters = self._reserve(count) + np.arange(count, dtype=np.int64)
+        workers = np.full(count, self.worker_index, dtype=np.int64)
+        codes = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+        random_part = codes[self.rng.integers(0, len(alphabet), size=(count, max(length - unique_width, 0)))]
+        return self._to_strings(np.hstack((random_part,
+                                           self._encode(workers, self.worker_width, alphabet),
+                                           self._encode(counters, counter_width, alphabet))))
+
+    def get_unique_emails_bulk(self, count, length=10, domain="example.com"):
+        """
+        Get the list of unique emails
+        :param count: Count of emails
+        :param length: Length of the email name part
+        :param domain: Email domain
+        :return: List of emails
+        """
+        return [f"{name}@{domain}" for name in self.get_unique_names_bulk(count, length, 'lower')]
+
+    def prefill(self, kind='name', length=10, count=None):
+        """
+        Pre-generate the session pool
+        :param kind: name or email
+        :param length: Length of the name
+        :param count: Count of values, by default the pool size
+        """
+        count = count or self.pool_size
+        if kind == 'email':
+            values = self.get_unique_emails_bulk(count, length)
+        else:
+            values = self.get_unique_names_bulk(count, length)
+        DataFactory._pools.setdefault((kind, length), deque()).extend(values)
+
+    def take(self, kind='name', length=10):
+        """
+        Take the next value from the session pool, the pool is refilled in bulk when it is empty
+        :param kind: name or email
+        :param length: Length of the name
+        :return: Unique value
+        """
+        pool = DataFactory._pools.get((kind, length))
+        while True:
+            try:
+                return pool.popleft()
+            except (AttributeError, IndexError):
+                self.prefill(kind, length)
+                pool = DataFactory._pools[(kind, length)]
+
+    def get_unique_name(self, length=10):
+        return self.take('name', length)
+
+    def get_unique_email(self, length=10):
+        return self.take('email', length)
@@ -0,0 +1,157 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+from array import array
+
+import utilities.custom_logger as cl
+
+
+class DataSource(object):
+    """
+    *****
+
+    The data source of the data-driven tests, a JSON Lines or CSV file.
+    The file is indexed once by the record offsets, the index is kept in array and cached on disk
+    until the file is changed. The tests are parametrized only by the record numbers, each record
+    is read and parsed when its test runs, so the memory does not grow with the file size.
+
+        @pytest.mark.data_source("data/users.jsonl")
+        def test_user(data_case):
+            data_case["email"]
+
+    The cases are spread evenly across the xdist workers by xdist_group marks, run with --dist loadgroup.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    index_dir = os.path.join(os.path.dirname(__file__), "../data_index/")
+    # size, modification time and records count are stored before the offsets
+    header_size = 3
+
+    # Process level sources, the path -> DataSource
+    _sources = {}
+    _sources_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.format = "csv" if self.path.lower().endswith(".csv") else "jsonl"
+        self.fieldnames = None
+        self._file = None
+        self._lock = threading.Lock()
+        self.offsets = self._load_index()
+        if self.format == "csv":
+            # The empty CSV file has no header
+            self.fieldnames = next(csv.reader([self._read_record(0)])) if self.offsets else []
+
+    @classmethod
+    def open(cls, path):
+        """
+        Get the data source of the process, the file is indexed once
+        :param path: JSON Lines or CSV file path
+        :return: DataSource
+        """
+        path = os.path.abspath(path)
+        with cls._sources_lock:
+            if path not in cls._sources:
+                cls._sources[path] = cls(path)
+            return cls._sources[path]
+
+    def __len__(self):
+        # The CSV header is the first record
+        return max(len(self.offsets) - (1 if self.format == "csv" else 0), 0)
+
+    def __getitem__(self, index):
+        """
+        Read and parse the case
+        :param index: Case number
+        :return: Dictionary
+        """
+        if index < 0 or index >= len(self):
+            raise IndexError(f"Case {index} is out of {self.path} cases range")
+        if self.format == "csv":
+            values = next(csv.reader([self._read_record(index + 1)]))
+            return dict(zip(self.fieldnames, values))
+        return json.loads(self._read_record(index))
+
+    def _read_record(self, number):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "rb")
+            self._file.seek(self.offsets[number])
+            end = self.offsets[number + 1] if number + 1 < len(self.offsets) else None
+            data = self._file.read(end - self.offsets[number]) if end is not None else self._file.read()
+        return data.decode("utf-8-sig" if self.offsets[number] == 0 else "utf-8").rstrip("\r\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def index_file(self):
+        name = hashlib.sha1(self.path.encode("utf-8")).hexdigest()
+        return os.path.join(self.index_dir, name + ".idx")
+
+    def _load_index(self):
+        """
+        Load the cached index or build it if the file was changed
+        :return: array of the record offsets
+        """
+        stat = os.stat(self.path)
+        index_file = self.index_file()
+        if os.path.exists(index_file):
+            header, offsets = array("Q"), array("Q")
+            try:
+                with open(index_file, "rb") as index:
+                    header.fromfile(index, self.header_size)
+                    if header[0] == stat.st_size and header[1] == stat.st_mtime_ns:
+                        offsets.frombytes(index.read())
+                        if len(offsets) == header[2]:
+                            return offsets
+                        self.log.error(f"The index of {self.path} has {len(offsets)} of {header[2]} records")
+            except (OSError, EOFError, ValueError):
+                self.log.error(f"The index of {self.path} is corrupted, it is rebuilt")
+        offsets = self.build_index()
+        try:
+            if not os.path.exists(self.index_dir):
+                os.makedirs(self.index_dir)
+            header = array("Q", [stat.st_size, stat.st_mtime_ns, len(offsets)])
+            with open(index_file + f".{os.getpid()}.tmp", "wb") as index:
+                header.tofile(index)
+                offsets.tofile(index)
+            os.replace(index_file + f".{os.getpid()}.tmp", index_file)
+        except OSError:
+            self.log.error(f"Unable to save the index of {self.path}")
+        return offsets
+
+    def build_index(self):
+        """
+        Index the record offsets, the empty lines are skipped
+        The CSV record continues on the next line while its quoted field is not closed
+        :return: array of the record offsets
+        """
+        offsets = array("Q")
+        offset = 0
+        quoted = False
+        with open(self.path, "rb") as data:
+            for line in data:
+                if not quoted and line.strip():
+                    offsets.append(offset)
+                if self.format == "csv" and line.count(b'"') % 2:
+                    quoted = not quoted
+                offset += len(line)
+        self.log.info(f"Indexed {len(offsets)} records of {self.path}")
+        return offsets
+
+    def shard_group(self, index, shards):
+        """
+        Get the xdist group of the case, the consecutive cases go to the different workers
+        :param index: Case number
+        :param shards: Workers count
+        :return: Group name
+        """
+        return f"{os.path.basename(self.path)}-{index % shards}"
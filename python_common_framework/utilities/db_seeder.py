@@ -0,0 +1,301 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+
+import utilities.custom_logger as cl
+from utilities.lazy_import import lazy_import
+
+# psycopg2 is loaded on the first connection, psycopg2.sql is imported by the methods which build the queries
+psycopg2 = lazy_import("psycopg2")
+
+
+class JsonCsvStream(io.RawIOBase):
+    """
+    The file-like object which converts the JSON records to CSV lines while COPY reads it
+    """
+
+    def __init__(self, records, columns):
+        self.records = iter(records)
+        self.columns = columns
+        self.buffer = b""
+        self.line = io.StringIO()
+        self.writer = csv.writer(self.line, lineterminator="\n")
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            record = next(self.records, None)
+            if record is None:
+                break
+            self.writer.writerow([self.to_csv(record.get(column)) for column in self.columns])
+            self.buffer += self.line.getvalue().encode("utf-8")
+            self.line.seek(0)
+            self.line.truncate()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def to_csv(self, value):
+        # The COPY NULL marker, the empty strings stay empty strings
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+
+
+class DbSeeder(object):
+    """
+    *****
+
+    The DB seeder loads the test data to Postgres in bulk with COPY FROM STDIN from CSV, JSON
+    and JSON Lines files. The test changes are rolled back at teardown, the whole test is in the
+    transaction or, if the data was seeded in the outer transaction, in the savepoint.
+    For the suites which need the committed data the template database is seeded once and cloned.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    maintenance_database = "postgres"
+    json_chunk_size = 1024 * 1024
+    _whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, credentials):
+        """
+        :param credentials: Postgres DB credentials dictionary - DB_USER, DB_PASSWORD, DB_HOST, DB_NAME, DB_PORT
+        """
+        self.credentials = credentials
+        self._savepoints = 0
+
+    def connect(self, database=None, autocommit=False):
+        """
+        Open the new connection
+        :param database: Database name, default DB_NAME
+        :param autocommit: Set True for CREATE/DROP DATABASE
+        :return: psycopg2 connection
+        """
+        connection = psycopg2.connect(user=self.credentials['DB_USER'],
+                                      password=self.credentials['DB_PASSWORD'],
+                                      host=self.credentials['DB_HOST'],
+                                      port=self.credentials.get('DB_PORT', "5432"),
+                                      database=database or self.credentials['DB_NAME'])
+        connection.autocommit = autocommit
+        return connection
+
+    def read_json_records(self, file_path):
+        """
+        Read the records of the JSON Lines file line by line or the records list of the JSON file by chunks
+        :return: Iterator of dictionaries
+        """
+        with open(file_path, encoding="utf-8") as data:
+            if file_path.lower().endswith(".jsonl"):
+                for line in data:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from self.iter_json_list(data)
+
+    def iter_json_list(self, data):
+        """
+        Parse the JSON list incrementally, only the current chunk and record are kept in memory
+        :param data: Text file object which contains the JSON list
+        :return: Iterator of the list items
+        """
+        decoder = json.JSONDecoder()
+        buffer, position, end_of_file = "", 0, False
+        state = "start"
+        while True:
+            position = self._whitespace.match(buffer, position).end()
+            if position == len(buffer) and not end_of_file:
+                chunk = data.read(self.json_chunk_size)
+                end_of_file = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            char = buffer[position:position + 1]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("The JSON seed file should contain the list of records")
+                position, state = position + 1, "first"
+            elif not char:
+                raise ValueError("The JSON list of records is not closed")
+            elif char == "]" and state in ("first", "separator"):
+                return
+            elif state == "separator":
+                if char != ",":
+                    raise ValueError(f"Unexpected {char!r} between the JSON records")
+                position, state = position + 1, "record"
+            else:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if end_of_file:
+                        raise
+                    end = None
+                # The record is complete when it is followed by the separator, the number may continue
+                # in the next chunk
+                separator = None
+                if end is not None:
+                    separator_position = self._whitespace.match(buffer, end).end()
+                    separator = buffer[separator_position:separator_position + 1]
+                if separator not in (",", "]") and not end_of_file:
+                    chunk = data.read(self.json_chunk_size)
+                    end_of_file = not chunk
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                yield record
+                position, state = end, "separator"
+
+    def seed(self, connection, table, file_path, columns=None):
+        """
+        Copy the file records to the table, the changes are not committed
+        :param connection: psycopg2 connection
+        :param table: Table name, "schema.table" is supported
+        :param file_path: CSV file with the header row, JSON (list of objects) or JSON Lines file
+        :param columns: Column names, default the CSV header or the keys of the first JSON record
+        :return: Copied rows count
+        """
+        from psycopg2 import sql
+        table_name = sql.Identifier(*table.split("."))
+        with connection.cursor() as cursor:
+            if file_path.lower().endswith(".csv"):
+                with open(file_path, encoding="utf-8", newline="") as data:
+                    header = next(csv.reader(data))
+                    data.seek(0)
+                    query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)").format(
+                        table_name, sql.SQL(", ").join(map(sql.Identifier, columns or header)))
+                    cursor.copy_expert(query, data)
+            else:
+                records = self.read_json_records(file_path)
+                first = next(records, None)
+                if first is None:
+                    return 0
+                columns = columns or list(first)
+                query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+                    table_name, sql.SQL(", ").join(map(sql.Identifier, columns)))
+                cursor.copy_expert(query, JsonCsvStream(self._chain(first, records), columns))
+            rows = cursor.rowcount
+        self.log.info(f"Seeded {rows} rows to {table} from {file_path}")
+        return rows
+
+    def _chain(self, first, records):
+        yield first
+        yield from records
+
+    def seed_all(self, connection, seeds):
+        """
+        Copy the files to the tables in the given order
+        :param connection: psycopg2 connection
+        :param seeds: List of (table, file path) pairs
+        :return: Dictionary table -> copied rows count
+        """
+        return {table: self.seed(connection, table, file_path) for table, file_path in seeds}
+
+    @contextmanager
+    def rollback_on_exit(self, connection):
+        """
+        Roll back the changes made in the block
+        The savepoint is used if the connection is already in the transaction, so the seeded data stays
+        :param connection: psycopg2 connection
+        """
+        from psycopg2 import sql
+        in_transaction = connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        savepoint = None
+        if in_transaction:
+            self._savepoints += 1
+            savepoint = sql.Identifier(f"test_{self._savepoints}")
+            with connection.cursor() as cursor:
+                cursor.execute(sql.SQL("SAVEPOINT {}").format(savepoint))
+        try:
+            yield connection
+        finally:
+            if savepoint is None:
+                connection.rollback()
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql.SQL("ROLLBACK TO SAVEPOINT {}").format(savepoint))
+                    cursor.execute(sql.SQL("RELEASE SAVEPOINT {}").format(savepoint))
+
+    def create_template(self, template, seeds, schema_file=None):
+        """
+        Create the template database with the committed seed data, the existing template is replaced
+        :param template: Template database name
+        :param seeds: List of (table, file path) pairs
+        :param schema_file: SQL file which creates the tables OPTIONAL, default the DB_NAME database is copied
+        """
+        from psycopg2 import sql
+        self.drop_database(template)
+        admin = self.connect(self.maintenance_database, autocommit=True)
+        try:
+            with admin.cursor() as cursor:
+                if schema_file is None:
+                    cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                        sql.Identifier(template), sql.Identifier(self.credentials['DB_NAME'])))
+                else:
+                    cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(template)))
+        finally:
+            admin.close()
+        connection = self.connect(template)
+        try:
+            if schema_file is not None:
+                with open(schema_file, encoding="utf-8") as schema, connection.cursor() as cursor:
+                    cursor.execute(schema.read())
+            self.seed_all(connection, seeds)
+            connection.commit()
+        finally:
+            connection.close()
+        self.log.info(f"Template database {template} created")
+
+    def clone_database(self, template, database):
+        """
+        Create the database from the template, the existing database is replaced
+        The template should not have the open connections
+        :param template: Template database name
+        :param database: New database name
+        :return: Database name
+        """
+        from psycopg2 import sql
+        self.drop_database(database)
+        admin = self.connect(self.maintenance_database, autocommit=True)
+        try:
+            with admin.cursor() as cursor:
+                cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                    sql.Identifier(database), sql.Identifier(template)))
+        finally:
+            admin.close()
+        self.log.info(f"Database {database} cloned from {template}")
+        return database
+
+    def drop_database(self, database):
+        from psycopg2 import sql
+        admin = self.connect(self.maintenance_database, autocommit=True)
+        try:
+            with admin.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(database)))
+        finally:
+            admin.close()
+
+    def seeds_from_folder(self, folder):
+        """
+        Get the seeds of the folder, the file name is the table name, the files are sorted by name
+        so the prefix like "01_" sets the order: 01_users.csv -> users
+        :param folder: Folder with CSV, JSON and JSON Lines files
+        :return: List of (table, file path) pairs
+        """
+        seeds = []
+        for file_name in sorted(os.listdir(folder)):
+            name, extension = os.path.splitext(file_name)
+            if extension.lower() in (".csv", ".json", ".jsonl"):
+                table = name.split("_", 1)[1] if name[:2].isdigit() and "_" in name else name
+                seeds.append((table, os.path.join(folder, file_name)))
+        return seeds
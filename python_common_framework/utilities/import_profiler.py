@@ -0,0 +1,145 @@
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+import utilities.custom_logger as cl
+
+
+class ImportProfiler(object):
+    """
+    *****
+
+    The import profiler measures the import time of the framework modules in a fresh interpreter
+    with "python -X importtime". The interpreter startup imports are excluded, so the total is the
+    startup cost which the framework adds to each pytest run and xdist worker.
+
+    The modules which need a missing optional dependency are skipped and reported with the missing module.
+
+    Run it from the framework folder:
+        python -m utilities.import_profiler --budget-ms 300
+        python -m utilities.import_profiler --budget-ms 300 pages.login_page.login_page
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    framework_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    default_packages = ("base", "pages", "utilities")
+
+    # The code which imports the module and prints the module and the missing dependency if it is not installed
+    import_code = ("try:\n    __import__({module!r})\n"
+                   "except ModuleNotFoundError as error:\n    print({module!r} + '|' + str(error.name))\n")
+
+    def __init__(self):
+        # (module, missing dependency) pairs of the last profile
+        self.skipped = []
+
+    def discover_modules(self, packages=None):
+        """
+        Find all modules of the framework packages
+        :param packages: Package names, by default base, pages and utilities
+        :return: List of module names
+        """
+        modules = []
+        for package in packages or self.default_packages:
+            package_dir = os.path.join(self.framework_dir, package)
+            for root, dirs, files in os.walk(package_dir):
+                dirs[:] = sorted(folder for folder in dirs if not folder.startswith(("_", ".")))
+                relative = os.path.relpath(root, self.framework_dir).replace(os.sep, ".")
+                for file_name in sorted(files):
+                    if file_name.endswith(".py") and file_name != "__init__.py":
+                        modules.append(f"{relative}.{file_name[:-3]}")
+        return modules
+
+    def _run_importtime(self, code):
+        """
+        Run the code in a fresh interpreter with -X importtime
+        :param code: Python code
+        :return: (List of (module, self microseconds, cumulative microseconds, level), stdout lines)
+        """
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=self.framework_dir,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if process.returncode != 0:
+            raise Exception(f"Import failed:\n{process.stderr[-2000:]}")
+        entries = []
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), level))
+        return entries, process.stdout.splitlines()
+
+    def profile(self, modules=None):
+        """
+        Measure the import time of the modules
+        :param modules: Module names, by default all framework modules
+        :return: (total microseconds, list of top level entries, list of all entries)
+        """
+        modules = modules or self.discover_modules()
+        startup = {entry[0] for entry in self._run_importtime("pass")[0]}
+        entries, output = self._run_importtime("".join(self.import_code.format(module=module) for module in modules))
+        entries = [entry for entry in entries if entry[0] not in startup]
+        self.skipped = [tuple(line.split("|", 1)) for line in output if "|" in line]
+        for module, missing in self.skipped:
+            self.log.error(f"Module {module} is skipped, {missing} is not installed")
+        top_level = [entry for entry in entries if entry[3] == 0]
+        return sum(entry[2] for entry in top_level), top_level, entries
+
+    def report(self, total_us, top_level, entries, top=15):
+        """
+        Make the readable report
+        :return: Report string
+        """
+        lines = [f"Framework import time {total_us / 1000:.1f} ms"]
+        lines.append("Top level imports by cumulative time:")
+        for name, _, cumulative_us, _ in sorted(top_level, key=lambda entry: -entry[2])[:top]:
+            lines.append(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+        lines.append("Modules by own time:")
+        for name, self_us, _, _ in sorted(entries, key=lambda entry: -entry[1])[:top]:
+            lines.append(f"  {self_us / 1000:8.1f} ms  {name}")
+        if self.skipped:
+            lines.append("Skipped modules, the dependency is not installed:")
+            for module, missing in self.skipped:
+                lines.append(f"  {module}: {missing}")
+        return "\n".join(lines)
+
+    def check_budget(self, budget_ms, modules=None, top=15):
+        """
+        Check the framework import time is in the budget
+        :param budget_ms: Startup budget in milliseconds
+        :param modules: Module names, by default all framework modules
+        :return: (Boolean, report string)
+        """
+        total_us, top_level, entries = self.profile(modules)
+        report = self.report(total_us, top_level, entries, top)
+        passed = total_us / 1000 <= budget_ms
+        if passed:
+            self.log.info(report)
+        else:
+            report += f"\nImport time budget {budget_ms} ms is exceeded"
+            self.log.error(report)
+        return passed, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the framework import time")
+    parser.add_argument("modules", nargs="*", help="Module names, by default all framework modules")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the import time exceeds the budget")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules in the report")
+    args = parser.parse_args(argv)
+
+    profiler = ImportProfiler()
+    if args.budget_ms is None:
+        print(profiler.report(*profiler.profile(args.modules), top=args.top))
+        return 0
+    passed, report = profiler.check_budget(args.budget_ms, args.modules, args.top)
+    print(report)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
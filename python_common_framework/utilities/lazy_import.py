@@ -0,0 +1,57 @@
+import importlib
+import sys
+import threading
+
+
+class LazyModule(object):
+    """
+    *****
+
+    The placeholder of the module which is imported on the first attribute access.
+    Nothing is imported when the placeholder is created, also not the parent packages of the dotted name.
+    The import is done once under the lock, so the threads of the cross browser fan-out can use it together.
+    The module which is not installed raises ModuleNotFoundError on the first use.
+
+    *****
+    """
+
+    def __init__(self, module_name):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._module_name)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._module_name!r} {state}>"
+
+
+def lazy_import(module_name):
+    """
+    Import the module lazily, the module and its parent packages are imported on the first attribute access
+    Use it for the heavy dependencies which are not needed by every test
+    :param module_name: Full module name, Example - "psycopg2", "selenium.webdriver.support.select"
+    :return: The module if it is imported already, otherwise LazyModule
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    return LazyModule(module_name)
@@ -0,0 +1,335 @@
+import argparse
+import ast
+import glob
+import importlib
+import inspect
+import json
+import logging
+import os
+import pkgutil
+import re
+import sys
+
+import utilities.custom_logger as cl
+
+
+class Locator(object):
+    """
+    The locator declared in the page class
+    """
+
+    def __init__(self, owner, name, locator, locator_type):
+        self.owner = owner
+        self.name = name
+        self.locator = locator
+        self.locator_type = locator_type
+        self.warnings = []
+        self.timings = {}
+        self.suggestions = []
+
+    @property
+    def worst_time(self):
+        return max((timing["ms"] for timing in self.timings.values()), default=0.0)
+
+    def to_dict(self):
+        return {"owner": self.owner, "name": self.name, "locator": self.locator, "locator_type": self.locator_type,
+                "worst_ms": round(self.worst_time, 4), "warnings": self.warnings, "timings": self.timings,
+                "suggestions": self.suggestions}
+
+
+class LocatorAnalyzer(object):
+    """
+    *****
+
+    The locator analyzer collects the locators declared in the page classes and the literal locators
+    passed to the SeleniumDriver/BasePage and WebDriver calls, lints them and times them
+    in the browser against the recorded page snapshots (see SeleniumDriver.save_page_snapshot).
+    The slow, ambiguous and not found locators are flagged, for the unique matches the faster
+    equivalents (id, name, scoped CSS) are suggested. The report is ranked by the worst time.
+
+    Run it from the framework folder:
+        python -m utilities.locator_analyzer --lint-only
+        python -m utilities.locator_analyzer --snapshots page_snapshots --report locator_report.json
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    framework_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    packages = ("pages",)
+    base_classes = ("base.selenium_driver", "base.base_page")
+    # The attribute name suffix defines the locator type
+    suffix_types = {"_css": "css", "_xpath": "xpath", "_id": "id", "_name": "name", "_link": "link",
+                    "_class": "class"}
+    # The call arguments which are locators -> the locator type argument or the fixed locator type
+    call_locator_arguments = {"locator": "locator_type", "child_locator": "locator_type",
+                              "item_locator": "css", "container_locator": "css", "list_selector": "css",
+                              "list_item_selector": "css", "scroll_container_selector": "css"}
+    # WebDriver and WebElement lookups
+    by_types = {"XPATH": "xpath", "CSS_SELECTOR": "css", "ID": "id", "NAME": "name", "LINK_TEXT": "link",
+                "CLASS_NAME": "class"}
+    find_by_types = {"xpath": "xpath", "css_selector": "css", "id": "id", "name": "name", "link_text": "link",
+                     "class_name": "class"}
+    slow_ms = 0.5
+    iterations = 50
+
+    lint_rules = [
+        ("css", re.compile(r"\[\s*class\s*[\^$*]="), "class substring match, use .class selector"),
+        ("css", re.compile(r"\[\s*(?!class\b)[\w-]+\s*[\^$*~|]="), "attribute substring match is slower than exact match"),
+        ("css", re.compile(r"(^|[\s>+~])\*"), "universal selector matches every element"),
+        ("css", re.compile(r"(:nth-child|:nth-of-type)\("), "position based selector is fragile"),
+        ("xpath", re.compile(r"text\(\)|contains\("), "text lookup scans the text nodes"),
+        ("xpath", re.compile(r"^\s*//\*"), "document wide scan of every element"),
+        ("xpath", re.compile(r"\.\."), "parent axis, use the scoped CSS from the parent"),
+        ("xpath", re.compile(r"^\s*/html"), "absolute path is fragile"),
+    ]
+
+    # Times the locator and suggests the faster equivalents for the unique match
+    measure_script = """
+        var locator = arguments[0], type = arguments[1], iterations = arguments[2];
+        function find() {
+            if (type === 'css') { return Array.prototype.slice.call(document.querySelectorAll(locator)); }
+            if (type === 'id') { return Array.prototype.slice.call(document.querySelectorAll('[id="' + locator + '"]')); }
+            if (type === 'name') { return Array.prototype.slice.call(document.getElementsByName(locator)); }
+            if (type === 'class') { return Array.prototype.slice.call(document.getElementsByClassName(locator)); }
+            var xpath = type === 'link' ? "//a[normalize-space(.)='" + locator + "']" : locator;
+            var snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) { nodes.push(snapshot.snapshotItem(i)); }
+            return nodes;
+        }
+        var matches = find(), start = performance.now();
+        for (var n = 0; n < iterations; n++) { find(); }
+        var result = {ms: (performance.now() - start) / iterations, matches: matches.length, suggestions: []};
+        if (matches.length !== 1) { return result; }
+
+        var element = matches[0];
+        function unique(selector) {
+            try { return document.querySelectorAll(selector).length === 1; } catch (e) { return false; }
+        }
+        function classSelector(node) {
+            var classes = Array.prototype.slice.call(node.classList, 0, 3).map(function (name) {
+                return '.' + CSS.escape(name);
+            });
+            return node.tagName.toLowerCase() + classes.join('');
+        }
+        if (element.id && unique('#' + CSS.escape(element.id))) {
+            result.suggestions.push(['id', element.id]);
+        }
+        var name = element.getAttribute('name');
+        if (name && document.getElementsByName(name).length === 1) {
+            result.suggestions.push(['name', name]);
+        }
+        if (element.classList.length && unique(classSelector(element))) {
+            result.suggestions.push(['css', classSelector(element)]);
+        }
+        for (var parent = element.parentElement; parent; parent = parent.parentElement) {
+            if (parent.id) {
+                var scoped = '#' + CSS.escape(parent.id) + ' ' + classSelector(element);
+                if (unique(scoped)) { result.suggestions.push(['css', scoped]); }
+                break;
+            }
+        }
+        return result;
+    """
+
+    def collect(self):
+        """
+        Collect the locators of the page classes and the base page classes
+        :return: List of Locator
+        """
+        sys.path.insert(0, self.framework_dir)
+        module_names = list(self.base_classes)
+        for package_name in self.packages:
+            package = importlib.import_module(package_name)
+            module_names += [module.name for module in pkgutil.walk_packages(package.__path__, package_name + ".")
+                             if not module.ispkg]
+        parameters = self.get_method_parameters()
+        locators = []
+        for module_name in module_names:
+            module = importlib.import_module(module_name)
+            for class_name, page_class in inspect.getmembers(module, inspect.isclass):
+                if page_class.__module__ != module_name:
+                    continue
+                for name, value in vars(page_class).items():
+                    locator_type = self.get_locator_type(name)
+                    if locator_type and isinstance(value, str):
+                        locators.append(Locator(class_name, name, value, locator_type))
+            locators += self.collect_call_locators(module, parameters)
+        return locators
+
+    def get_locator_type(self, attribute_name):
+        for suffix, locator_type in self.suffix_types.items():
+            if attribute_name.endswith(suffix):
+                return locator_type
+        return None
+
+    def get_method_parameters(self):
+        """
+        Get the parameters of the SeleniumDriver and BasePage methods which take the locators
+        :return: Dictionary method name -> (parameter names, locator type defaults)
+        """
+        from base.base_page import BasePage
+        parameters = {}
+        for name, method in inspect.getmembers(BasePage, inspect.isfunction):
+            signature = inspect.signature(method)
+            names = list(signature.parameters)[1:]
+            if any(name in self.call_locator_arguments for name in names):
+                defaults = {name: parameter.default for name, parameter in signature.parameters.items()
+                            if parameter.default is not inspect.Parameter.empty}
+                parameters[name] = (names, defaults)
+        return parameters
+
+    def collect_call_locators(self, module, parameters):
+        """
+        Collect the literal locators of the calls in the module source:
+        the SeleniumDriver/BasePage locator arguments, the click_on_element_by_xpathtext XPath,
+        find_element(By.XPATH, "..") and find_element_by_xpath("..") lookups
+        :param module: Page or base module
+        :param parameters: Method parameters from get_method_parameters
+        :return: List of Locator
+        """
+        try:
+            tree = ast.parse(inspect.getsource(module))
+        except (OSError, TypeError):
+            return []
+
+        def literal(node):
+            return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+        locators = []
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+                continue
+            method = node.func.attr
+            name = f"line {node.lineno}"
+            if method == "click_on_element_by_xpathtext":
+                if len(node.args) >= 2 and literal(node.args[0]) is not None and literal(node.args[1]) is not None:
+                    xpath = f"//{node.args[0].value}[text()='{node.args[1].value}']"
+                    locators.append(Locator(module.__name__, name, xpath, "xpath"))
+                continue
+            if method in ("find_element", "find_elements") and len(node.args) >= 2:
+                by = node.args[0]
+                locator = literal(node.args[1])
+                if isinstance(by, ast.Attribute) and by.attr in self.by_types and locator is not None:
+                    locators.append(Locator(module.__name__, name, locator, self.by_types[by.attr]))
+                continue
+            by_name = method.split("_by_", 1)[1] if method.startswith(("find_element_by_", "find_elements_by_")) \
+                else None
+            if by_name in self.find_by_types:
+                if node.args and literal(node.args[0]) is not None:
+                    locators.append(Locator(module.__name__, name, node.args[0].value, self.find_by_types[by_name]))
+                continue
+            names, defaults = parameters.get(method, ([], {}))
+            arguments = dict(zip(names, node.args))
+            arguments.update((keyword.arg, keyword.value) for keyword in node.keywords if keyword.arg)
+            for argument, type_source in self.call_locator_arguments.items():
+                locator = literal(arguments.get(argument))
+                if not locator:
+                    continue
+                locator_type = type_source
+                if type_source == "locator_type":
+                    locator_type = literal(arguments.get(type_source)) or defaults.get(type_source, "css")
+                locators.append(Locator(module.__name__, name, locator, locator_type.lower()))
+        return locators
+
+    def lint(self, locator):
+        """
+        Add the static warnings of the locator
+        :param locator: Locator
+        """
+        for locator_type, pattern, message in self.lint_rules:
+            if locator.locator_type == locator_type and pattern.search(locator.locator):
+                locator.warnings.append(message)
+
+    def measure(self, driver, locators, snapshots):
+        """
+        Time the locators in the browser on each page snapshot
+        :param driver: WebDriver
+        :param locators: List of Locator
+        :param snapshots: List of the snapshot HTML file paths
+        """
+        for snapshot in snapshots:
+            driver.get("file://" + os.path.abspath(snapshot))
+            snapshot_name = os.path.basename(snapshot)
+            for locator in locators:
+                try:
+                    result = driver.execute_script(self.measure_script, locator.locator, locator.locator_type,
+                                                   self.iterations)
+                except Exception as error:
+                    locator.warnings.append(f"invalid on {snapshot_name}: {str(error).splitlines()[0]}")
+                    continue
+                if result["matches"] == 0:
+                    continue
+                locator.timings[snapshot_name] = {"ms": result["ms"], "matches": result["matches"]}
+                if result["matches"] > 1:
+                    locator.warnings.append(f"ambiguous on {snapshot_name}: {result['matches']} matches")
+                if result["ms"] > self.slow_ms:
+                    locator.warnings.append(f"slow on {snapshot_name}: {result['ms']:.3f} ms")
+                for suggestion in result["suggestions"]:
+                    if suggestion not in locator.suggestions and suggestion[1] != locator.locator:
+                        locator.suggestions.append(suggestion)
+        for locator in locators:
+            if snapshots and not locator.timings:
+                locator.warnings.append("not found in any snapshot")
+
+    def analyze(self, driver=None, snapshots=()):
+        """
+        Collect, lint and time the locators
+        :param driver: WebDriver, None for the static lint only
+        :param snapshots: List of the snapshot HTML file paths
+        :return: List of Locator ranked by the worst time, then by the warnings count
+        """
+        locators = self.collect()
+        for locator in locators:
+            self.lint(locator)
+        if driver is not None and snapshots:
+            self.measure(driver, locators, snapshots)
+        return sorted(locators, key=lambda item: (-item.worst_time, -len(item.warnings), item.owner, item.name))
+
+    def report(self, locators):
+        lines = [f"{'worst ms':>9}  locator"]
+        for locator in locators:
+            lines.append(f"{locator.worst_time:9.4f}  {locator.owner}.{locator.name} "
+                         f"({locator.locator_type}) {locator.locator}")
+            for warning in locator.warnings:
+                lines.append(f"{'':11}! {warning}")
+            for locator_type, value in locator.suggestions:
+                lines.append(f"{'':11}> {locator_type}: {value}")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze the page class locators")
+    parser.add_argument("--snapshots", default="page_snapshots", help="Folder of the recorded page snapshots")
+    parser.add_argument("--lint-only", action="store_true", help="Only the static lint, the browser is not started")
+    parser.add_argument("--iterations", type=int, default=LocatorAnalyzer.iterations, help="Timing iterations")
+    parser.add_argument("--slow-ms", type=float, default=LocatorAnalyzer.slow_ms, help="Slow locator threshold")
+    parser.add_argument("--report", default=None, help="JSON report file path")
+    args = parser.parse_args(argv)
+
+    analyzer = LocatorAnalyzer()
+    analyzer.iterations = args.iterations
+    analyzer.slow_ms = args.slow_ms
+    snapshots = sorted(glob.glob(os.path.join(args.snapshots, "*.html")))
+    driver = None
+    if not args.lint_only and snapshots:
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        driver = webdriver.Chrome(options=options)
+    try:
+        locators = analyzer.analyze(driver, snapshots)
+    finally:
+        if driver is not None:
+            driver.quit()
+    print(analyzer.report(locators))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump([locator.to_dict() for locator in locators], report_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
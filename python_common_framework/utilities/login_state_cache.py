@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+
+
+class LoginStateCache(object):
+    """
+    *****
+
+    The login state cache keeps the authenticated browser state per (environment, user):
+    cookies, localStorage and sessionStorage captured after the first successful UI login.
+    The next tests restore the state into the fresh or pooled browser session instead of the UI login.
+    The snapshot is skipped when it is older than max_age or its cookies are expired, and it is
+    replaced by the new login when the restored state is not logged in.
+    The snapshots are kept in memory and in the cache folder, so xdist workers share them.
+    The cache folder contains the session cookies, do not commit it.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    cache_dir = os.path.join(os.path.dirname(__file__), "../login_state_cache/")
+    max_age = 30 * 60
+
+    capture_storage_script = """
+        function dump(storage) {
+            var items = {};
+            for (var i = 0; i < storage.length; i++) { items[storage.key(i)] = storage.getItem(storage.key(i)); }
+            return items;
+        }
+        return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+    """
+    restore_storage_script = """
+        var state = arguments[0], key;
+        window.localStorage.clear();
+        window.sessionStorage.clear();
+        for (key in state.local) { window.localStorage.setItem(key, state.local[key]); }
+        for (key in state.session) { window.sessionStorage.setItem(key, state.session[key]); }
+    """
+    clear_storage_script = """
+        window.localStorage.clear();
+        window.sessionStorage.clear();
+    """
+
+    # Session level state, shared between all page objects
+    _snapshots = {}
+    _stats = {"hits": 0, "misses": 0, "stale": 0, "time_saved": 0.0}
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def snapshot_file(self, environment, user):
+        name = hashlib.sha1(f"{environment}|{user}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def capture(self, environment, user, login_time=0.0):
+        """
+        Capture the current browser state as the snapshot of the user
+        :param environment: Environment name or host
+        :param user: User name
+        :param login_time: The UI login duration, it is used to count the saved time
+        :return: Snapshot dictionary
+        """
+        snapshot = {"environment": environment, "user": user, "url": self.driver.current_url,
+                    "captured_at": time.time(), "login_time": login_time,
+                    "cookies": self.driver.get_cookies(),
+                    "storage": self.driver.execute_script(self.capture_storage_script)}
+        LoginStateCache._snapshots[(environment, user)] = snapshot
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            file_path = self.snapshot_file(environment, user)
+            with open(file_path + f".{os.getpid()}.tmp", "w") as snapshot_file:
+                json.dump(snapshot, snapshot_file)
+            os.replace(file_path + f".{os.getpid()}.tmp", file_path)
+        except OSError:
+            self.log.error(f"Unable to save the login state of {user}")
+            print_stack()
+        return snapshot
+
+    def is_fresh(self, snapshot):
+        """
+        Check the snapshot is not older than max_age and its cookies are not expired
+        :param snapshot: Snapshot dictionary
+        :return: Boolean
+        """
+        now = time.time()
+        if now - snapshot["captured_at"] > self.max_age:
+            return False
+        return all(cookie.get("expiry") is None or cookie["expiry"] > now for cookie in snapshot["cookies"])
+
+    def get(self, environment, user):
+        """
+        Get the fresh snapshot of the user from memory or from the cache folder
+        :return: Snapshot dictionary or None
+        """
+        snapshot = LoginStateCache._snapshots.get((environment, user))
+        if snapshot is None:
+            file_path = self.snapshot_file(environment, user)
+            if os.path.exists(file_path):
+                try:
+                    with open(file_path) as snapshot_file:
+                        snapshot = json.load(snapshot_file)
+                except (OSError, ValueError):
+                    snapshot = None
+        if snapshot is None or not self.is_fresh(snapshot):
+            return None
+        LoginStateCache._snapshots[(environment, user)] = snapshot
+        return snapshot
+
+    def invalidate(self, environment, user):
+        LoginStateCache._snapshots.pop((environment, user), None)
+        file_path = self.snapshot_file(environment, user)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def restore(self, snapshot):
+        """
+        Restore the snapshot into the current browser session
+        :param snapshot: Snapshot dictionary
+        """
+        self.driver.get(snapshot["url"])
+        self.driver.delete_all_cookies()
+        for cookie in snapshot["cookies"]:
+            self.driver.add_cookie(cookie)
+        self.driver.execute_script(self.restore_storage_script, snapshot["storage"])
+        self.driver.refresh()
+
+    def clear(self, url):
+        """
+        Remove the restored state and open the page which was open before the restore
+        :param url: The page URL before the restore
+        """
+        try:
+            self.driver.execute_script(self.clear_storage_script)
+        except:
+            self.log.error("Unable to clear the restored storage")
+            print_stack()
+        self.driver.delete_all_cookies()
+        self.driver.get(url)
+
+    def login(self, environment, user, login_function, is_logged_in):
+        """
+        Restore the user login state from the cache or login through UI and capture the state
+        :param environment: Environment name or host
+        :param user: User name
+        :param login_function: Function without arguments which does the UI login
+        :param is_logged_in: Function without arguments which returns True if the user is logged in
+        :return: Boolean, True if the state was restored from the cache
+        """
+        snapshot = self.get(environment, user)
+        if snapshot is not None:
+            start_url = self.driver.current_url
+            start_time = time.monotonic()
+            try:
+                self.restore(snapshot)
+                if is_logged_in():
+                    restore_time = time.monotonic() - start_time
+                    LoginStateCache._stats["hits"] += 1
+                    LoginStateCache._stats["time_saved"] += max(snapshot["login_time"] - restore_time, 0.0)
+                    self.log.info(f"Login state of {user} restored in {restore_time:.2f}s")
+                    return True
+            except:
+                self.log.error(f"Unable to restore the login state of {user}")
+                print_stack()
+            LoginStateCache._stats["stale"] += 1
+            self.invalidate(environment, user)
+            # The UI login starts from the page which was open before the restore, without the stale state
+            self.clear(start_url)
+
+        LoginStateCache._stats["misses"] += 1
+        start_time = time.monotonic()
+        login_function()
+        login_time = time.monotonic() - start_time
+        if is_logged_in():
+            self.capture(environment, user, login_time)
+        return False
+
+    def stats(self):
+        """
+        Get the cache hit rate and the saved time
+        :return: Dictionary
+        """
+        stats = dict(LoginStateCache._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["time_saved"] = round(stats["time_saved"], 2)
+        return stats
+
+    def log_stats(self):
+        stats = self.stats()
+        self.log.info(f"Login state cache: {stats['hits']} hits, {stats['misses']} misses, {stats['stale']} stale, "
+                      f"hit rate {stats['hit_rate']:.0%}, saved {stats['time_saved']}s")
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+
+
+class MenuMapCache(object):
+    """
+    *****
+
+    The menu map cache keeps the application menu map per environment.
+    The menu map is "text path -> item index and target URL" dictionary, it is kept in memory
+    for the session and persisted to the file, so the next runs can reuse it.
+    Each map is stored with the menu hash, the map is used only if the menu hash is not changed.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    cache_file = os.path.join(os.path.dirname(__file__), "../menu_map_cache.json")
+    path_separator = " > "
+
+    # Session level maps, shared between all page objects
+    _session_maps = None
+
+    def __init__(self, cache_file=None):
+        if cache_file is not None:
+            self.cache_file = cache_file
+        if MenuMapCache._session_maps is None:
+            MenuMapCache._session_maps = self._load()
+
+    def _load(self):
+        """
+        Load the persisted menu maps
+        :return: Menu maps dictionary
+        """
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as cache:
+                return json.load(cache)
+        except (OSError, ValueError):
+            self.log.error(f"Unable to read the menu map cache {self.cache_file}")
+            return {}
+
+    def _save(self):
+        """
+        Persist the menu maps, the file is replaced atomically as xdist workers can write it together
+        """
+        temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, "w") as cache:
+                json.dump(MenuMapCache._session_maps, cache, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except OSError:
+            self.log.error(f"Unable to save the menu map cache {self.cache_file}")
+            print_stack()
+
+    def get(self, environment, menu_hash):
+        """
+        Get the menu map of the environment
+        :param environment: Environment name or host
+        :param menu_hash: Current menu hash
+        :return: Menu map dictionary or None if the map is missing or the menu is changed
+        """
+        cached = MenuMapCache._session_maps.get(environment)
+        if cached is None or cached.get("hash") != menu_hash:
+            return None
+        return cached["items"]
+
+    def put(self, environment, menu_hash, items):
+        """
+        Save the menu map of the environment
+        :param environment: Environment name or host
+        :param menu_hash: Current menu hash
+        :param items: Menu map dictionary, text path -> {"index": item index, "url": target URL}
+        """
+        MenuMapCache._session_maps[environment] = {"hash": menu_hash, "items": items}
+        self._save()
+        self.log.info(f"Menu map of {environment} rebuilt with {len(items)} items")
+
+    def invalidate(self, environment):
+        """
+        Remove the menu map of the environment
+        :param environment: Environment name or host
+        """
+        if MenuMapCache._session_maps.pop(environment, None) is not None:
+            self._save()
+
+    def make_path(self, *items):
+        """
+        Make the menu map key from the menu item names
+        :param items: Menu item names, None items are skipped
+        :return: Menu text path
+        """
+        return self.path_separator.join(item for item in items if item is not None)
@@ -0,0 +1,279 @@
+import glob
+import json
+import logging
+import os
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+import utilities.custom_logger as cl
+from utilities.cross_browser import CrossBrowser
+
+
+class ResultSink(object):
+    """
+    *****
+
+    The result sink streams the verification results to the JSON Lines file of the worker.
+    Each xdist worker writes its own file, the controller merges the files to results.jsonl
+    and results.xml (JUnit) at the end of the session.
+    The tests which did not write their summary (the error before mark_final, the skipped tests)
+    get the summary from the pytest reports. The passed summary of the test which fails after it
+    (in the test or in the fixture teardown) gets the correction record, it is applied by the merge.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    results_dir = os.path.join(os.path.dirname(__file__), "../results/")
+    worker_file_pattern = "results-*.jsonl"
+
+    # The sink of the current process, it is set by conftest
+    active = None
+
+    def __init__(self, worker_id="master", results_dir=None):
+        if results_dir is not None:
+            self.results_dir = results_dir
+        self.worker_id = worker_id
+        self.file_path = os.path.join(self.results_dir, f"results-{worker_id}.jsonl")
+        self._file = None
+        # The tests of the process which wrote the summary (nodeid: the summary failed), and the reports
+        # of the running tests
+        self._finished = {}
+        self._reports = {}
+
+    def write(self, record):
+        """
+        Append the record to the worker file, the file is opened on the first write
+        :param record: JSON serializable dictionary
+        """
+        if self._file is None:
+            if not os.path.exists(self.results_dir):
+                os.makedirs(self.results_dir)
+            self._file = open(self.file_path, "a", buffering=1)
+        record["worker"] = self.worker_id
+        if record.get("kind") == "test":
+            nodeid = record.get("nodeid")
+            self._finished[nodeid] = self._finished.get(nodeid, False) or bool(record.get("failed"))
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def add_report(self, report):
+        """
+        Collect the pytest phase report, the test summary is written on teardown if the test did not write it
+        :param report: pytest TestReport
+        """
+        duration, outcome, when, message = self._reports.get(report.nodeid, (0.0, "passed", None, ""))
+        duration += report.duration
+        if outcome == "passed" and report.outcome != "passed":
+            outcome, when, message = report.outcome, report.when, report.longreprtext
+        if report.when != "teardown":
+            self._reports[report.nodeid] = (duration, outcome, when, message)
+            return
+        self._reports.pop(report.nodeid, None)
+        failed = outcome == "failed"
+        test_message = f"{report.nodeid} >>> {outcome.upper()} in {when}" if when else report.nodeid
+        record = {"kind": "test", "nodeid": report.nodeid, "test_message": test_message, "failed": failed,
+                  "error": failed and when != "call",
+                  "failures": [{"message": message, "locator": None}] if failed else []}
+        if report.nodeid in self._finished:
+            summary_failed = self._finished.pop(report.nodeid)
+            if failed and not summary_failed:
+                # The test failed after its passed summary, the merge applies the correction to the summary
+                record["kind"] = "correction"
+                self.write(record)
+            return
+        record.update(test=report.nodeid, skipped=outcome == "skipped", counters={"passed": 0, "failed": 0},
+                      artifact=None, duration=round(duration, 3))
+        self.write(record)
+        self._finished.pop(report.nodeid, None)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clean(self):
+        """
+        Remove the worker files of the previous run
+        """
+        for file_path in glob.glob(os.path.join(self.results_dir, self.worker_file_pattern)):
+            os.remove(file_path)
+
+    def _iter_records(self, worker_files):
+        for file_path in worker_files:
+            with open(file_path) as worker_file:
+                for line in worker_file:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _iter_merged_records(self, worker_files, corrections):
+        """
+        Read the records with the corrections applied to the test summaries, the corrections are skipped
+        """
+        for record in self._iter_records(worker_files):
+            kind = record.get("kind")
+            if kind == "correction":
+                continue
+            correction = corrections.get(record.get("nodeid")) if kind == "test" else None
+            if correction is not None:
+                record.update(failed=True, error=correction["error"], test_message=correction["test_message"],
+                              failures=record["failures"] + correction["failures"])
+            yield record
+
+    def merge(self, suite_name="pytest"):
+        """
+        Merge the worker files to results.jsonl and results.xml
+        The files are read line by line, the records are never loaded all together,
+        only the corrections of the tests which failed after the summary are kept
+        :param suite_name: JUnit test suite name
+        :return: (JSON Lines file path, JUnit file path)
+        """
+        worker_files = sorted(glob.glob(os.path.join(self.results_dir, self.worker_file_pattern)))
+        if not worker_files:
+            return None, None
+        corrections = {record["nodeid"]: record for record in self._iter_records(worker_files)
+                       if record.get("kind") == "correction"}
+        jsonl_path = os.path.join(self.results_dir, "results.jsonl")
+        junit_path = os.path.join(self.results_dir, "results.xml")
+
+        tests = failures = errors = skipped = 0
+        with open(jsonl_path, "w") as merged:
+            for record in self._iter_merged_records(worker_files, corrections):
+                merged.write(json.dumps(record) + "\n")
+                if record.get("kind") == "test":
+                    tests += 1
+                    errors += 1 if record["failed"] and record.get("error") else 0
+                    failures += 1 if record["failed"] and not record.get("error") else 0
+                    skipped += 1 if record.get("skipped") else 0
+
+        with open(junit_path, "w") as junit:
+            junit.write('<?xml version="1.0" encoding="utf-8"?>\n')
+            junit.write(f'<testsuite name={quoteattr(suite_name)} tests="{tests}" failures="{failures}" '
+                        f'errors="{errors}" skipped="{skipped}">\n')
+            for record in self._iter_merged_records(worker_files, corrections):
+                if record.get("kind") != "test":
+                    continue
+                junit.write(f'  <testcase name={quoteattr(record["test"] or "")} '
+                            f'time="{record["duration"]:.3f}">\n')
+                if record["failed"]:
+                    details = "\n".join(f'{failure["message"]} [{failure["locator"] or ""}]'
+                                        for failure in record["failures"])
+                    element = "error" if record.get("error") else "failure"
+                    junit.write(f'    <{element} message={quoteattr(record["test_message"])}>'
+                                f'{escape(details)}</{element}>\n')
+                elif record.get("skipped"):
+                    junit.write(f'    <skipped message={quoteattr(record["test_message"])}/>\n')
+                junit.write(f'    <system-out>{escape(json.dumps(record["counters"]))}</system-out>\n')
+                junit.write('  </testcase>\n')
+            junit.write('</testsuite>\n')
+        self.log.info(f"Results merged to {jsonl_path} and {junit_path}")
+        return jsonl_path, junit_path
+
+
+class ResultCollector(object):
+    """
+    *****
+
+    The result collector keeps the verification counters and only the failed verification records
+    (message, locator, timing). Every verification is streamed to the result sink.
+    The artifact policy defines when the screenshot should be taken, at most one per test:
+        first - on the first failed verification
+        final - on the final verification if the test failed
+        none - never
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    artifact_policy = "first"
+
+    def __init__(self, artifact_policy=None, sink=None):
+        if artifact_policy is not None:
+            self.artifact_policy = artifact_policy
+        self.sink = sink if sink is not None else ResultSink.active
+        self.reset()
+
+    def reset(self):
+        self.passed = 0
+        self.failed = 0
+        self.failures = []
+        self.artifact = None
+        self.started = time.monotonic()
+        self._last_mark = self.started
+
+    def current_test(self):
+        """
+        Get the current test name from pytest, the cross browser fan-out adds the browser
+        :return: Test node id or None
+        """
+        current = self.current_nodeid()
+        if not current:
+            return None
+        browser = CrossBrowser.current_browser()
+        return current + (f"[{browser}]" if browser else "")
+
+    def current_nodeid(self):
+        """
+        :return: Test node id from pytest without the browser, None outside pytest
+        """
+        current = os.environ.get("PYTEST_CURRENT_TEST")
+        return current.rsplit(" ", 1)[0] if current else None
+
+    def add(self, result, message, locator=None):
+        """
+        Add the verification result
+        :param result: Verification result, None means failed
+        :param message: Verification message
+        :param locator: The locator which was verified OPTIONAL
+        :return: Boolean, True if the verification passed
+        """
+        now = time.monotonic()
+        elapsed, self._last_mark = now - self._last_mark, now
+        passed = result is not None and bool(result)
+        record = {"kind": "check", "test": self.current_test(), "passed": passed, "message": message,
+                  "locator": locator, "elapsed": round(elapsed, 3)}
+        if passed:
+            self.passed += 1
+        else:
+            self.failed += 1
+            self.failures.append(record)
+        if self.sink is not None:
+            self.sink.write(record)
+        return passed
+
+    def should_capture_artifact(self, final=False):
+        """
+        Check if the artifact should be captured for the last failed verification
+        :param final: True for the final verification
+        :return: Boolean
+        """
+        if self.artifact is not None or self.failed == 0:
+            return False
+        if self.artifact_policy == "first":
+            return True
+        return self.artifact_policy == "final" and final
+
+    def finish(self, test_name):
+        """
+        Write the test summary to the result sink and reset the collector
+        :param test_name: Test name
+        :return: Failure report, None if the test passed
+        """
+        record = {"kind": "test", "test": self.current_test() or test_name, "nodeid": self.current_nodeid(),
+                  "test_message": test_name,
+                  "failed": self.failed > 0, "counters": {"passed": self.passed, "failed": self.failed},
+                  "failures": self.failures, "artifact": self.artifact,
+                  "duration": round(time.monotonic() - self.started, 3)}
+        if self.sink is not None:
+            self.sink.write(record)
+        report = None
+        if self.failed:
+            lines = [f"{test_name} >>> FAILED {self.failed} of {self.passed + self.failed} verifications"]
+            lines += [f"  {failure['message']} [{failure['locator'] or ''}] after {failure['elapsed']}s"
+                      for failure in self.failures]
+            if self.artifact:
+                lines.append(f"  Artifact: {self.artifact}")
+            report = "\n".join(lines)
+        self.reset()
+        return report
@@ -0,0 +1,196 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+import uuid
+
+import pytest
+
+import utilities.custom_logger as cl
+
+
+class RunHistory(object):
+    """
+    *****
+
+    The run history keeps every test outcome with duration, worker, browser and environment
+    in the local SQLite database, so the slowest, the getting slower and the flaky tests can be
+    found across the runs. The database is in WAL mode, each xdist worker buffers its results
+    and writes them in batches in one transaction.
+
+    Report:     python -m utilities.run_history --limit 20
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    db_file = os.path.join(os.path.dirname(__file__), "../run_history.sqlite")
+    batch_size = 100
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS results (
+            run_id TEXT NOT NULL,
+            nodeid TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            duration REAL NOT NULL,
+            worker TEXT,
+            browser TEXT,
+            environment TEXT,
+            finished_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_nodeid ON results (nodeid, finished_at);
+        CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+    """
+
+    def __init__(self, db_file=None, run_id=None, worker="master", browser=None, environment=None):
+        if db_file is not None:
+            self.db_file = db_file
+        self.run_id = run_id or uuid.uuid4().hex
+        self.worker = worker
+        self.browser = browser
+        self.environment = environment
+        self._buffer = []
+        self._durations = {}
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_file, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self.schema)
+        return self._connection
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def add(self, nodeid, outcome, duration, browser=None):
+        """
+        Buffer the test result, the buffer is written when it has batch_size results
+        :param nodeid: Test node id
+        :param outcome: passed, failed or skipped
+        :param duration: Test duration in seconds
+        :param browser: Browser name, default the session browser
+        """
+        self._buffer.append((self.run_id, nodeid, outcome, duration, self.worker, browser or self.browser,
+                             self.environment, time.time()))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        try:
+            with self.connection:
+                self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._buffer)
+            self._buffer = []
+        except sqlite3.Error:
+            self.log.error(f"Unable to write {len(self._buffer)} results to the run history")
+
+    # pytest hooks, the plugin is registered by conftest
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        # The xdist workers write with the controller run id
+        node.workerinput["run_history_id"] = self.run_id
+
+    def pytest_runtest_logreport(self, report):
+        if hasattr(report, "node"):
+            # The report is forwarded from the xdist worker, the worker has written it
+            return
+        # The setup, call and teardown durations are summed, the first not passed phase defines the outcome
+        duration, outcome = self._durations.get(report.nodeid, (0.0, "passed"))
+        duration += report.duration
+        if outcome == "passed" and report.outcome != "passed":
+            outcome = report.outcome
+        if report.when != "teardown":
+            self._durations[report.nodeid] = (duration, outcome)
+            return
+        self._durations.pop(report.nodeid, None)
+        self.add(report.nodeid, outcome, duration, dict(report.user_properties).get("browser"))
+
+    def pytest_sessionfinish(self, session):
+        self.close()
+
+    # Queries
+
+    def slowest(self, limit=10, runs=10):
+        """
+        Get the slowest passed tests by the average duration of the last runs
+        :return: List of (nodeid, average duration, results count)
+        """
+        return self.connection.execute("""
+            SELECT nodeid, AVG(duration), COUNT(*) FROM (
+                SELECT nodeid, duration, ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY finished_at DESC) AS age
+                FROM results WHERE outcome = 'passed')
+            WHERE age <= ? GROUP BY nodeid ORDER BY AVG(duration) DESC LIMIT ?
+        """, (runs, limit)).fetchall()
+
+    def getting_slower(self, limit=10, window=5, min_ratio=1.2):
+        """
+        Compare the average duration of the last window runs with the window runs before them
+        :return: List of (nodeid, recent average, previous average, ratio)
+        """
+        return self.connection.execute("""
+            SELECT nodeid, recent, previous, recent / previous AS ratio FROM (
+                SELECT nodeid, AVG(CASE WHEN age <= :window THEN duration END) AS recent,
+                       AVG(CASE WHEN age > :window THEN duration END) AS previous
+                FROM (SELECT nodeid, duration,
+                             ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY finished_at DESC) AS age
+                      FROM results WHERE outcome = 'passed')
+                WHERE age <= 2 * :window GROUP BY nodeid)
+            WHERE previous > 0 AND recent / previous >= :ratio ORDER BY ratio DESC LIMIT :limit
+        """, {"window": window, "ratio": min_ratio, "limit": limit}).fetchall()
+
+    def flaky(self, limit=10, runs=20):
+        """
+        Get the tests which flip between passed and failed in the last runs,
+        the first run of the window is not compared with the run before the window
+        :return: List of (nodeid, flips, failures, results count)
+        """
+        return self.connection.execute("""
+            SELECT nodeid, SUM(outcome != previous), SUM(outcome = 'failed'), COUNT(*) FROM (
+                SELECT nodeid, outcome, LAG(outcome) OVER (PARTITION BY nodeid ORDER BY finished_at) AS previous
+                FROM (SELECT nodeid, outcome, finished_at,
+                             ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY finished_at DESC) AS age
+                      FROM results WHERE outcome IN ('passed', 'failed'))
+                WHERE age <= ?)
+            GROUP BY nodeid HAVING SUM(outcome != previous) > 0
+            ORDER BY SUM(outcome != previous) DESC, SUM(outcome = 'failed') DESC LIMIT ?
+        """, (runs, limit)).fetchall()
+
+    def report(self, limit=10):
+        lines = ["Slowest tests (average of the last runs):"]
+        lines += [f"  {duration:8.2f}s  {nodeid} ({count} runs)" for nodeid, duration, count in self.slowest(limit)]
+        lines.append("Tests getting slower (recent / previous average):")
+        lines += [f"  {ratio:8.2f}x  {nodeid} ({previous:.2f}s -> {recent:.2f}s)"
+                  for nodeid, recent, previous, ratio in self.getting_slower(limit)]
+        lines.append("Flaky tests (passed/failed flips in the last runs):")
+        lines += [f"  {flips:8d}   {nodeid} ({failures} failures of {count} runs)"
+                  for nodeid, flips, failures, count in self.flaky(limit)]
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the test run history")
+    parser.add_argument("--db", default=RunHistory.db_file, help="Run history database file")
+    parser.add_argument("--limit", type=int, default=10, help="Tests count in each section")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"Run history {args.db} is not found")
+        return 1
+    history = RunHistory(args.db)
+    print(history.report(args.limit))
+    history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
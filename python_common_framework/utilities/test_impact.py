@@ -0,0 +1,293 @@
+import ast
+import glob
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import utilities.custom_logger as cl
+
+
+class TestImpact(object):
+    """
+    *****
+
+    The test impact plugin records which page classes, methods and locators each test used and
+    selects only the tests affected by the changes of pages/ and base/ since the given git revision.
+
+    Record the map on the full run:     pytest -m regression --impact-record
+    Run only the affected tests:        pytest -m regression --impact-select origin/master
+
+    A changed function or class attribute selects the tests which called that function or used
+    the old locator value, a module level change selects all tests which used the module.
+    Any change of the core files or outside pages/, base/ and tests/ selects all tests.
+    The tests which are not in the map yet are always selected.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    framework_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    map_file = os.path.join(framework_dir, "test_impact_map.json")
+    recorded_dirs = ("pages", "base")
+    core_files = ("base/selenium_driver.py", "tests/conftest.py", "pytest.ini")
+    # The function key which can not be resolved, the selection runs all tests if the map has it
+    unresolved_key = "<unresolved>"
+    # The class attributes with these suffixes are locators, the other attributes changes select the module
+    locator_suffixes = ("_css", "_xpath", "_id", "_name", "_link", "_class")
+    # SeleniumDriver/BasePage arguments which are recorded as the used locators
+    locator_arguments = ("locator", "selector", "list_selector", "list_item_selector", "child_locator")
+
+    def __init__(self, config):
+        self.config = config
+        self.worker_id = config.workerinput["workerid"] if hasattr(config, "workerinput") else None
+        self.record_enabled = config.getoption("--impact-record")
+        self.base_revision = config.getoption("--impact-select")
+        self._usage = {}
+        self._current = None
+        self._code_keys = {}
+        self._line_qualnames = {}
+        self._lock = threading.Lock()
+
+    # Recording
+
+    def _code_key(self, code):
+        """
+        Get the "module:qualified name" of the pages/ and base/ function, None for the other code
+        """
+        key = self._code_keys.get(code, False)
+        if key is False:
+            key = None
+            path = os.path.relpath(code.co_filename, self.framework_dir).replace(os.sep, "/")
+            if path.split("/")[0] in self.recorded_dirs and path.endswith(".py"):
+                qualname = getattr(code, "co_qualname", None) or self._qualname_by_line(code.co_filename,
+                                                                                       code.co_firstlineno)
+                key = f"{path}:{qualname or self.unresolved_key}"
+            self._code_keys[code] = key
+        return key
+
+    def _qualname_by_line(self, file_path, line):
+        """
+        Get the qualified name of the function by its first line, it is used before Python 3.11
+        :return: Qualified name or None
+        """
+        if file_path not in self._line_qualnames:
+            names = {}
+            try:
+                with open(file_path) as source:
+                    tree = ast.parse(source.read())
+            except (OSError, SyntaxError, ValueError):
+                tree = ast.Module(body=[], type_ignores=[])
+
+            def visit(nodes, prefix):
+                for node in nodes:
+                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        for decorator in node.decorator_list:
+                            names[decorator.lineno] = prefix + node.name
+                        names[node.lineno] = prefix + node.name
+                        visit(node.body, prefix + node.name + ".<locals>.")
+                    elif isinstance(node, ast.ClassDef):
+                        visit(node.body, prefix + node.name + ".")
+                    else:
+                        visit(ast.iter_child_nodes(node), prefix)
+
+            visit(tree.body, "")
+            self._line_qualnames[file_path] = names
+        return self._line_qualnames[file_path].get(line)
+
+    def _profile(self, frame, event, arg):
+        if event != "call" or self._current is None:
+            return
+        key = self._code_key(frame.f_code)
+        if key is None:
+            return
+        with self._lock:
+            self._current["functions"].add(key)
+            for name in self.locator_arguments:
+                value = frame.f_locals.get(name)
+                if isinstance(value, str) and value:
+                    self._current["locators"].add(value)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if not self.record_enabled:
+            yield
+            return
+        self._current = {"functions": set(), "locators": set()}
+        threading.setprofile(self._profile)
+        sys.setprofile(self._profile)
+        try:
+            yield
+        finally:
+            sys.setprofile(None)
+            threading.setprofile(None)
+            self._usage[item.nodeid] = {name: sorted(values) for name, values in self._current.items()}
+            self._current = None
+
+    def pytest_sessionfinish(self, session):
+        if not self.record_enabled:
+            return
+        if self.worker_id is not None:
+            self._write_json(self.map_file + f".{self.worker_id}.part", self._usage)
+            return
+        usage_map = self.load_map()
+        usage_map.update(self._usage)
+        for part_file in glob.glob(self.map_file + ".*.part"):
+            with open(part_file) as part:
+                usage_map.update(json.load(part))
+            os.remove(part_file)
+        self._write_json(self.map_file, usage_map)
+        self.log.info(f"Test impact map saved with {len(usage_map)} tests")
+
+    def _write_json(self, file_path, data):
+        with open(file_path + f".{os.getpid()}.tmp", "w") as json_file:
+            json.dump(data, json_file, indent=1, sort_keys=True)
+        os.replace(file_path + f".{os.getpid()}.tmp", file_path)
+
+    def load_map(self):
+        if not os.path.exists(self.map_file):
+            return {}
+        with open(self.map_file) as map_file:
+            return json.load(map_file)
+
+    # Selection
+
+    def _git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.framework_dir, capture_output=True, text=True,
+                              check=True).stdout
+
+    def changed_files(self, revision):
+        """
+        Get the framework files changed since the revision, including the uncommitted changes
+        :return: List of the paths relative to the framework folder
+        """
+        changed = self._git("diff", "--name-only", "--relative", revision).split()
+        changed += self._git("ls-files", "--others", "--exclude-standard").split()
+        return sorted(set(changed))
+
+    def _symbols(self, source):
+        """
+        Get the functions, the class attributes and the class headers of the module source
+        :return: (Dictionary qualified name -> source dump, Dictionary qualified name -> attribute value,
+                  Dictionary class qualified name -> header dump, module level source dump)
+        """
+        functions, attributes, headers, module_level = {}, {}, {}, []
+        if source is None:
+            return functions, attributes, headers, ""
+
+        def visit(nodes, prefix):
+            for node in nodes:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    functions[prefix + node.name] = ast.dump(node)
+                elif isinstance(node, ast.ClassDef):
+                    # The bases, keywords, decorators and the methods set define the methods resolution
+                    methods = sorted(item.name for item in node.body
+                                     if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)))
+                    headers[prefix + node.name] = "\n".join(
+                        [ast.dump(item) for item in node.bases + node.keywords + node.decorator_list] + methods)
+                    visit(node.body, prefix + node.name + ".")
+                elif prefix and isinstance(node, ast.Assign):
+                    value = node.value.value if isinstance(node.value, ast.Constant) else ast.dump(node.value)
+                    for target in node.targets:
+                        if isinstance(target, ast.Name):
+                            attributes[prefix + target.id] = value
+                elif not prefix:
+                    module_level.append(ast.dump(node))
+                else:
+                    headers[prefix + "<body>"] = headers.get(prefix + "<body>", "") + ast.dump(node)
+
+        visit(ast.parse(source).body, "")
+        return functions, attributes, headers, "\n".join(module_level)
+
+    def changed_symbols(self, revision, path):
+        """
+        Compare the file with its revision version
+        The class header, the not locator attribute or the module level change marks the whole module changed
+        :return: (changed function keys, old values of the changed locators, True if the module is changed)
+        """
+        try:
+            old_source = self._git("show", f"{revision}:./{path}")
+        except subprocess.CalledProcessError:
+            old_source = None
+        new_path = os.path.join(self.framework_dir, path)
+        new_source = None
+        if os.path.exists(new_path):
+            with open(new_path) as new_file:
+                new_source = new_file.read()
+        old_functions, old_attributes, old_headers, old_module = self._symbols(old_source)
+        new_functions, new_attributes, new_headers, new_module = self._symbols(new_source)
+        functions = {f"{path}:{name}" for name in set(old_functions) | set(new_functions)
+                     if old_functions.get(name) != new_functions.get(name)}
+        changed_attributes = {name for name in set(old_attributes) | set(new_attributes)
+                              if old_attributes.get(name) != new_attributes.get(name)}
+        locators = {old_attributes[name] for name in changed_attributes
+                    if name.endswith(self.locator_suffixes) and isinstance(old_attributes.get(name), str)}
+        module_changed = (old_module != new_module or old_headers != new_headers
+                          or any(not name.endswith(self.locator_suffixes) or name not in old_attributes
+                                 for name in changed_attributes))
+        return functions, locators, module_changed
+
+    def affected_tests(self, revision, nodeids):
+        """
+        Select the affected tests
+        :param revision: Git revision which the changes are compared with
+        :param nodeids: Collected test node ids
+        :return: Set of the selected node ids, None if all tests should run
+        """
+        usage_map = self.load_map()
+        if not usage_map:
+            self.log.info("Test impact map is empty, all tests are selected")
+            return None
+        if any(function.endswith(":" + self.unresolved_key)
+               for usage in usage_map.values() for function in usage["functions"]):
+            self.log.info("Test impact map has the unresolved functions, all tests are selected")
+            return None
+        changed_functions, changed_locators, changed_modules, changed_tests = set(), set(), set(), set()
+        for path in self.changed_files(revision):
+            if not path.endswith(".py") and path != "pytest.ini":
+                continue
+            top_dir = path.split("/")[0]
+            if path in self.core_files or top_dir not in self.recorded_dirs + ("tests",):
+                self.log.info(f"Core file {path} is changed, all tests are selected")
+                return None
+            if top_dir == "tests":
+                changed_tests.add(path)
+                continue
+            functions, locators, module_changed = self.changed_symbols(revision, path)
+            changed_functions |= functions
+            changed_locators |= locators
+            if module_changed:
+                changed_modules.add(path + ":")
+
+        selected = set()
+        for nodeid in nodeids:
+            usage = usage_map.get(nodeid)
+            if (usage is None or nodeid.split("::")[0] in changed_tests
+                    or changed_functions.intersection(usage["functions"])
+                    or changed_locators.intersection(usage["locators"])
+                    or any(function.startswith(module) for module in changed_modules
+                           for function in usage["functions"])):
+                selected.add(nodeid)
+        self.log.info(f"Test impact: {len(changed_functions)} changed functions, {len(changed_locators)} "
+                      f"changed locators, {len(selected)} of {len(nodeids)} tests selected")
+        return selected
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not self.base_revision:
+            return
+        try:
+            selected = self.affected_tests(self.base_revision, [item.nodeid for item in items])
+        except (subprocess.CalledProcessError, OSError, SyntaxError, ValueError):
+            self.log.error("Unable to select the affected tests, all tests are selected")
+            return
+        if selected is None:
+            return
+        deselected = [item for item in items if item.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in selected]
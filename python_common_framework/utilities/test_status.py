@@ -1,6 +1,7 @@
 from traceback import print_stack
 
 from base.selenium_driver import SeleniumDriver
+from utilities.result_collector import ResultCollector
 import utilities.custom_logger as cl
 import logging
 
@@ -8,53 +9,46 @@ import logging
 class TestStatus(SeleniumDriver):
     log = cl.custom_logger(logging.INFO)
 
-    def __init__(self, driver):
+    def __init__(self, driver, artifact_policy=None):
         """
                Inits CheckPoint class
+               :param driver: WebDriver
+               :param artifact_policy: When the screenshot is taken - first, final or none
         """
         self.driver = driver
         super(TestStatus, self).__init__(driver)
-        self.resultList = []
+        self.results = ResultCollector(artifact_policy)
 
-    def setResult(self, result, resultMessage):
+    def setResult(self, result, resultMessage, locator=None, final=False):
         try:
-            if result is not None:
-                if result:
-                    self.resultList.append("PASS")
-                    self.log.info(f"--- VERIFICATION SUCCESS {resultMessage}")
-                else:
-                    self.resultList.append("FAIL")
-                    self.log.error(f"--- VERIFICATION FAILED {resultMessage}")
-                    self.screen_shot(resultMessage)
+            if self.results.add(result, resultMessage, locator):
+                self.log.info(f"--- VERIFICATION SUCCESS {resultMessage}")
             else:
-                self.resultList.append("FAIL")
                 self.log.error(f"--- VERIFICATION FAILED {resultMessage}")
-                self.screen_shot(resultMessage)
         except:
-            self.resultList.append("FAIL")
+            self.results.add(False, resultMessage, locator)
             self.log.error("--- Exception occured!!! ---")
-            self.screen_shot(resultMessage)
             print_stack()
+        if self.results.should_capture_artifact(final):
+            self.results.artifact = self.screen_shot(resultMessage)
 
-    def mark(self, result, resultMessage):
+    def mark(self, result, resultMessage, locator=None):
         """
                Mark the result of the verification point in a test case
         """
-        self.setResult(result, resultMessage)
+        self.setResult(result, resultMessage, locator)
 
-    def mark_final(self, testName, result, resultMessage):
+    def mark_final(self, testName, result, resultMessage, locator=None):
         """
                 Mark the final result of the verification point in a test case
                 This needs to be called at least once in a test case
                 This should be final test status of the test case
         """
-        self.setResult(result, resultMessage)
+        self.setResult(result, resultMessage, locator, final=True)
 
-        if "FAIL" in self.resultList:
-            self.log.error(f"{testName} >>> FAILED")
-            self.resultList.clear()
-            assert True == False
+        report = self.results.finish(testName)
+        if report is not None:
+            self.log.error(report)
+            assert False, report
         else:
             self.log.info(f"{testName} >>> SUCCESS")
-            self.resultList.clear()
-            assert True == True
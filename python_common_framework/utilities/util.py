@@ -3,6 +3,9 @@ import traceback
 import random, string
 import utilities.custom_logger as cl
 import logging
+from utilities.collection_diff import CollectionDiff
+from utilities.data_factory import DataFactory
+from utilities.wait_audit import WaitAudit
 
 
 class Util(object):
@@ -10,13 +13,14 @@ class Util(object):
 
     def sleep(self, sec, info=""):
         '''
-        Wait a spcified time
+        Wait a spcified time, the sleep is recorded by the wait audit
         :param sec:
         :param info:
         :return: None
         '''
         if info is not None:
             self.log.info(f"Wait >> {sec} seconds for {info}")
+        WaitAudit().record_sleep(sec, info)
         try:
             time.sleep(sec)
         except InterruptedError:
@@ -30,7 +34,6 @@ class Util(object):
             symbol_type: Type of characters string should have. Default is letters
             Provide lower/upper/digits for different types
         """
-        alpha_num = ''
         if symbol_type == 'lower':
             case = string.ascii_lowercase
         elif symbol_type == 'upper':
@@ -41,13 +44,14 @@ class Util(object):
             case = string.ascii_letters + string.digits
         else:
             case = string.ascii_letters
-        return alpha_num.join(random.choice(case) for i in range(length))
+        return ''.join(random.choices(case, k=length))
 
     def get_unique_name(self, char_count=10):
         """
-        Get a unique name
+        Get a unique name, the name never collides between the xdist workers of the run and between the runs
+        The shorter names are widened to the unique part length, see DataFactory.get_unique_names_bulk
         """
-        return self.get_alpha_numeric(char_count, 'lower')
+        return DataFactory().get_unique_name(char_count)
 
     def get_unique_name_list(self, list_size=5, item_length=None):
         """
@@ -58,6 +62,8 @@ class Util(object):
             item_length: It should be a list containing number of items equal to the listSize
                         This determines the length of the each item in the list -> [1, 2, 3, 4, 5]
         """
+        if item_length is None:
+            return DataFactory().get_unique_names_bulk(list_size)
         name_list = []
         for i in range(0, list_size):
             name_list.append(self.get_unique_name(item_length[i]))
@@ -97,13 +103,17 @@ class Util(object):
 
     def verify_list_match(self, expected_list, actual_list):
         """
-        Verify two list matches
+        Verify two list matches as sets, the duplicates and the order are ignored
+        Use verify_collections_match to compare the duplicates and the order too
 
         Parameters:
             expected_list: Expected List
             actual_list: Actual List
         """
-        return set(expected_list) == set(actual_list)
+        diff = CollectionDiff()
+        # The unique items are compared, so the existing set comparison result is kept
+        return diff.compare(dict.fromkeys(diff.make_key(item) for item in expected_list),
+                            dict.fromkeys(diff.make_key(item) for item in actual_list)).matched
 
     def verify_list_contains(self, expected_list, actual_list):
         """
@@ -112,9 +122,32 @@ class Util(object):
             expected_list: Expected List
             actual_list: Actual List
         """
-        length = len(expected_list)
-        for i in range(0, length):
-            if expected_list[i] not in actual_list:
-                return False
-        else:
-            return True
\ No newline at end of file
+        diff = CollectionDiff()
+        actual_items = {diff.make_key(item) for item in actual_list}
+        return all(diff.make_key(item) in actual_items for item in expected_list)
+
+    def verify_collections_match(self, expected, actual, ordered=False, max_items=20):
+        """
+        Verify two collections match, duplicates are counted
+        The comparison is linear, the order is compared position by position,
+        the inputs can be generators
+        Parameters:
+            expected: Expected iterable
+            actual: Actual iterable
+            ordered: Set True to compare the items order too
+            max_items: Maximum number of reported differences of each kind
+        """
+        return CollectionDiff(max_items).compare(expected, actual, ordered).matched
+
+    def verify_collection_contains(self, expected, actual, max_items=20):
+        """
+        Verify actual collection contains all items of expected collection, duplicates are counted
+        Parameters:
+            expected: Expected iterable
+            actual: Actual iterable
+            max_items: Maximum number of reported differences of each kind
+        """
+        result = CollectionDiff(max_items).contains(expected, actual)
+        if not result.matched:
+            self.log.error(str(result))
+        return result.matched
\ No newline at end of file
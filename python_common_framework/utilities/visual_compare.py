@@ -0,0 +1,176 @@
+import logging
+import os
+import time
+from io import BytesIO
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+from base.selenium_driver import SeleniumDriver
+from utilities.lazy_import import lazy_import
+
+# numpy and Pillow are loaded on the first visual verification
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+
+class VisualCompare(SeleniumDriver):
+    """
+    *****
+
+    This class is implemented for visual verification of the page or element screenshots.
+    The equal images match at once, otherwise the masked pixel difference is checked against the tolerance.
+    The perceptual hash is only logged as the hint on mismatch, the equal hashes of the images which differ
+    in a label or a digit mean the local change, not the match.
+    The baselines are cached in memory for the session, the diff images are saved only on failure.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    baseline_dir = os.path.join(os.path.dirname(__file__), "../visual_baselines/")
+    diff_dir = os.path.join(os.path.dirname(__file__), "../visual_diffs/")
+    hash_size = 8
+    diff_color = (255, 0, 0)
+
+    # Session level baselines cache, baseline path -> (modification time, pixels)
+    _baselines = {}
+
+    def __init__(self, driver):
+        super(VisualCompare, self).__init__(driver)
+        self.driver = driver
+
+    def capture(self, locator="", locator_type="css", element=None):
+        """
+        Take the screenshot of the page or the element
+        :param locator: Any selenium locator, By default - "" which means the whole page
+        :param locator_type: locator type which are set, by default - css
+        :param element: WebElement object
+        :return: RGB pixels array
+        """
+        if locator:
+            element = self.get_element(locator, locator_type)
+        if element is not None:
+            png = element.screenshot_as_png
+        else:
+            png = self.driver.get_screenshot_as_png()
+        return np.asarray(Image.open(BytesIO(png)).convert("RGB"))
+
+    def perceptual_hash(self, pixels):
+        """
+        Calculate the difference hash (dHash) of the image
+        :param pixels: RGB pixels array
+        :return: Boolean array of hash bits
+        """
+        small = Image.fromarray(pixels).convert("L").resize((self.hash_size + 1, self.hash_size), Image.BILINEAR)
+        gray = np.asarray(small, dtype=np.int16)
+        return gray[:, 1:] > gray[:, :-1]
+
+    def get_baseline(self, name):
+        """
+        Get the baseline image from the session cache, the file is read only if it is changed
+        :param name: Baseline name
+        :return: RGB pixels array or None if the baseline is missing
+        """
+        path = os.path.join(self.baseline_dir, name + ".png")
+        if not os.path.exists(path):
+            return None
+        modified = os.path.getmtime(path)
+        cached = VisualCompare._baselines.get(path)
+        if cached is None or cached[0] != modified:
+            with Image.open(path) as image:
+                cached = (modified, np.asarray(image.convert("RGB")))
+            VisualCompare._baselines[path] = cached
+        return cached[1]
+
+    def save_baseline(self, name, pixels):
+        """
+        Save the image as the baseline
+        :param name: Baseline name
+        :param pixels: RGB pixels array
+        """
+        if not os.path.exists(self.baseline_dir):
+            os.makedirs(self.baseline_dir)
+        path = os.path.join(self.baseline_dir, name + ".png")
+        Image.fromarray(pixels).save(path)
+        VisualCompare._baselines[path] = (os.path.getmtime(path), pixels)
+        self.log.info(f"Visual baseline saved to {path}")
+
+    def apply_mask(self, pixels, mask_regions):
+        """
+        Fill the masked regions of the image with black color
+        :param pixels: RGB pixels array
+        :param mask_regions: List of (x, y, width, height) regions in screenshot pixels
+        :return: Masked copy of the pixels array
+        """
+        if not mask_regions:
+            return pixels
+        masked = pixels.copy()
+        for x, y, width, height in mask_regions:
+            masked[y:y + height, x:x + width] = 0
+        return masked
+
+    def save_diff(self, name, actual, diff):
+        """
+        Save the actual image with the different pixels highlighted
+        :param name: Baseline name
+        :param actual: Actual RGB pixels array
+        :param diff: Boolean array of the different pixels
+        :return: Diff image path
+        """
+        if not os.path.exists(self.diff_dir):
+            os.makedirs(self.diff_dir)
+        highlighted = actual.copy()
+        highlighted[diff] = self.diff_color
+        path = os.path.join(self.diff_dir, name + "." + str(round(time.time() * 1000)) + ".diff.png")
+        Image.fromarray(highlighted).save(path)
+        self.log.error(f"Visual diff saved to {path}")
+        return path
+
+    def verify_visual_match(self, name, locator="", locator_type="css", element=None, mask_regions=None,
+                            pixel_tolerance=0, max_diff_ratio=0.0, update_baseline=False):
+        """
+        Verify the page or the element screenshot matches the stored baseline
+        If the baseline is missing the screenshot is saved as the new baseline
+        :param name: Baseline name
+        :param locator: Any selenium locator, By default - "" which means the whole page
+        :param locator_type: locator type which are set, by default - css
+        :param element: WebElement object
+        :param mask_regions: List of (x, y, width, height) regions which are not compared
+        :param pixel_tolerance: Maximum allowed difference of the pixel color channel, 0 - 255
+        :param max_diff_ratio: Maximum allowed ratio of the different pixels, 0.0 - 1.0
+        :param update_baseline: Set True to replace the baseline with the current screenshot
+        :return: Boolean
+        """
+        try:
+            actual = self.capture(locator, locator_type, element)
+            baseline = None if update_baseline else self.get_baseline(name)
+            if baseline is None:
+                self.save_baseline(name, actual)
+                return True
+            if actual.shape != baseline.shape:
+                self.log.error(f"Visual size mismatch {name}: actual {actual.shape}, baseline {baseline.shape}")
+                self.save_diff(name, actual, np.ones(actual.shape[:2], dtype=bool))
+                return False
+
+            masked_actual = self.apply_mask(actual, mask_regions)
+            masked_baseline = self.apply_mask(baseline, mask_regions)
+            if np.array_equal(masked_actual, masked_baseline):
+                self.log.info(f"### VISUAL MATCH {name}")
+                return True
+
+            delta = np.abs(masked_actual.astype(np.int16) - masked_baseline.astype(np.int16)).max(axis=2)
+            diff = delta > pixel_tolerance
+            diff_ratio = float(diff.mean())
+            if diff_ratio <= max_diff_ratio:
+                self.log.info(f"### VISUAL MATCH {name}, different pixels ratio {diff_ratio:.5f}")
+                return True
+            self.log.error(f"### VISUAL MISMATCH {name}, different pixels ratio {diff_ratio:.5f}")
+            if np.array_equal(self.perceptual_hash(masked_actual), self.perceptual_hash(masked_baseline)):
+                self.log.error(f"The perceptual hash of {name} is equal, the change is local, like a text change")
+            self.save_diff(name, actual, diff)
+            return False
+        except:
+            self.log.error(f"Unable to verify the visual match {name}")
+            print_stack()
+            return False
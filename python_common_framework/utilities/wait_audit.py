@@ -0,0 +1,232 @@
+import glob
+import json
+import logging
+import math
+import os
+from traceback import print_stack
+
+import utilities.custom_logger as cl
+
+
+class WaitAudit(object):
+    """
+    *****
+
+    The wait audit records every fixed sleep and element wait of the session.
+    Sleeps are recorded as wasted time, waits are recorded with the time until the condition was met.
+    The wait times are kept in the history file per locator, from that history the timeout and
+    poll frequency of each locator are suggested and, if tuning is enabled, applied in wait_for_element.
+    Only the summaries and the last wait times are kept in memory, each xdist worker saves its wait times
+    to its own file and the controller merges them to the history file.
+
+    *****
+    """
+
+    log = cl.custom_logger(logging.INFO)
+
+    history_file = os.path.join(os.path.dirname(__file__), "../wait_history.json")
+    worker_file_pattern = "wait_history-*.json"
+    history_size = 50
+    min_samples = 5
+    timeout_margin = 2.0
+    min_timeout = 1.0
+    min_poll_frequency = 0.05
+
+    # Session level state, shared between all page objects
+    tuning_enabled = False
+    current_test = None
+    _test_summary = {}
+    _locator_summary = {}
+    _session_samples = {}
+    _history = None
+    _timed_out = set()
+
+    def __init__(self):
+        if WaitAudit._history is None:
+            WaitAudit._history = self._load_history()
+
+    def _load_history(self):
+        """
+        Load the wait history, locator key -> list of the last wait times in seconds
+        :return: History dictionary
+        """
+        if not os.path.exists(self.history_file):
+            return {}
+        try:
+            with open(self.history_file) as history:
+                return json.load(history)
+        except (OSError, ValueError):
+            self.log.error(f"Unable to read the wait history {self.history_file}")
+            return {}
+
+    def locator_key(self, locator, locator_type):
+        return f"{locator_type}={locator}"
+
+    def record_sleep(self, seconds, info=""):
+        """
+        Record the fixed sleep, all sleep time is counted as wasted
+        :param seconds: Sleep time
+        :param info: Sleep reason
+        """
+        item = self._test_item(WaitAudit.current_test)
+        item["sleeps"] += 1
+        item["sleep_time"] += seconds
+
+    def record_wait(self, locator, locator_type, timeout, elapsed, met):
+        """
+        Record the element wait
+        :param locator: Any selenium locator
+        :param locator_type: locator type
+        :param timeout: Requested timeout
+        :param elapsed: Time until the condition was met or the wait failed
+        :param met: True if the condition was met
+        """
+        key = self.locator_key(locator, locator_type)
+        item = self._test_item(WaitAudit.current_test)
+        item["waits"] += 1
+        item["wait_time"] += elapsed
+        item["timeouts"] += 0 if met else 1
+        item = WaitAudit._locator_summary.setdefault(key, {"waits": 0, "wait_time": 0.0, "max_wait": 0.0,
+                                                           "timeouts": 0, "requested": timeout})
+        item["waits"] += 1
+        item["wait_time"] += elapsed
+        item["max_wait"] = max(item["max_wait"], elapsed)
+        item["timeouts"] += 0 if met else 1
+        if not met:
+            WaitAudit._timed_out.add(key)
+        else:
+            for samples in (WaitAudit._history.setdefault(key, []), WaitAudit._session_samples.setdefault(key, [])):
+                samples.append(round(elapsed, 3))
+                del samples[:-self.history_size]
+
+    def mark_timed_out(self, locator, locator_type):
+        """
+        Stop tuning the locator wait in this session, the tuned timeout was too short
+        """
+        WaitAudit._timed_out.add(self.locator_key(locator, locator_type))
+
+    def _test_item(self, test):
+        return WaitAudit._test_summary.setdefault(test, {"sleeps": 0, "sleep_time": 0.0, "waits": 0,
+                                                         "wait_time": 0.0, "timeouts": 0})
+
+    def suggest(self, locator, locator_type, timeout=10, poll_frequency=0.5):
+        """
+        Suggest the timeout and poll frequency of the locator from the wait history
+        The timeout is the 95th percentile of the wait times multiplied by the margin,
+        it is never longer than the requested timeout
+        :param locator: Any selenium locator
+        :param locator_type: locator type
+        :param timeout: Requested timeout
+        :param poll_frequency: Requested poll frequency
+        :return: (timeout, poll_frequency) tuple
+        """
+        samples = WaitAudit._history.get(self.locator_key(locator, locator_type), [])
+        if len(samples) < self.min_samples:
+            return timeout, poll_frequency
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+        median = ordered[len(ordered) // 2]
+        suggested_timeout = min(timeout, max(self.min_timeout, math.ceil(p95 * self.timeout_margin * 2) / 2))
+        suggested_poll = min(poll_frequency, max(self.min_poll_frequency, round(median / 4, 2)))
+        return suggested_timeout, suggested_poll
+
+    def get_wait_settings(self, locator, locator_type, timeout, poll_frequency):
+        """
+        Get the timeout and poll frequency which should be used by the wait
+        :return: (timeout, poll_frequency) tuple, the suggested values if the tuning is enabled
+                 and the locator wait has not timed out in this session
+        """
+        if not WaitAudit.tuning_enabled or self.locator_key(locator, locator_type) in WaitAudit._timed_out:
+            return timeout, poll_frequency
+        return self.suggest(locator, locator_type, timeout, poll_frequency)
+
+    def summary_by_test(self, test=None):
+        """
+        Summarize the sleeps and waits per test
+        :param test: Test node id, by default all tests which are not logged yet
+        :return: Dictionary, test -> summary dictionary
+        """
+        if test is not None:
+            return {test: dict(WaitAudit._test_summary[test])} if test in WaitAudit._test_summary else {}
+        return {name: dict(item) for name, item in WaitAudit._test_summary.items()}
+
+    def summary_by_locator(self):
+        """
+        Summarize the waits per locator with the suggested settings
+        :return: Dictionary, locator key -> summary dictionary
+        """
+        summary = {}
+        for key, item in WaitAudit._locator_summary.items():
+            item = summary[key] = dict(item)
+            samples = WaitAudit._history.get(key, [])
+            if len(samples) >= self.min_samples:
+                locator_type, locator = key.split("=", 1)
+                item["suggested_timeout"], item["suggested_poll_frequency"] = \
+                    self.suggest(locator, locator_type, item["requested"])
+        return summary
+
+    def log_test_summary(self, test):
+        """
+        Log the test summary, the logged summary is dropped so the memory does not grow with the tests count
+        """
+        for name, item in self.summary_by_test(test).items():
+            self.log.info(f"Wait audit {name}: {item['sleeps']} sleeps {item['sleep_time']:.2f}s wasted, "
+                          f"{item['waits']} waits {item['wait_time']:.2f}s, {item['timeouts']} timeouts")
+        WaitAudit._test_summary.pop(test, None)
+
+    def log_locator_summary(self):
+        for key, item in sorted(self.summary_by_locator().items(), key=lambda pair: -pair[1]["wait_time"]):
+            suggestion = ""
+            if "suggested_timeout" in item:
+                suggestion = (f", suggested timeout {item['suggested_timeout']}s "
+                              f"poll {item['suggested_poll_frequency']}s")
+            self.log.info(f"Wait audit {key}: {item['waits']} waits {item['wait_time']:.2f}s, "
+                          f"max {item['max_wait']:.2f}s, {item['timeouts']} timeouts{suggestion}")
+
+    def save_history(self, worker_id="master"):
+        """
+        Save the session wait times to the worker file
+        Each xdist worker writes its own file, so the workers never overwrite each other
+        :param worker_id: xdist worker id
+        """
+        worker_file = os.path.join(os.path.dirname(self.history_file),
+                                   self.worker_file_pattern.replace("*", worker_id))
+        if not WaitAudit._session_samples:
+            return
+        try:
+            with open(worker_file, "w") as samples:
+                json.dump(WaitAudit._session_samples, samples)
+        except OSError:
+            self.log.error(f"Unable to save the wait times {worker_file}")
+            print_stack()
+
+    def merge_history(self):
+        """
+        Merge the worker files into the history file, it is called by the controller after the workers finished
+        The history file is replaced atomically
+        """
+        worker_files = sorted(glob.glob(os.path.join(os.path.dirname(self.history_file), self.worker_file_pattern)))
+        if not worker_files:
+            return
+        merged = self._load_history()
+        for worker_file in worker_files:
+            try:
+                with open(worker_file) as samples:
+                    worker_samples = json.load(samples)
+            except (OSError, ValueError):
+                self.log.error(f"Unable to read the wait times {worker_file}")
+                continue
+            for key, values in worker_samples.items():
+                samples = merged.setdefault(key, [])
+                samples.extend(values)
+                del samples[:-self.history_size]
+        temp_file = f"{self.history_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, "w") as history:
+                json.dump(merged, history)
+            os.replace(temp_file, self.history_file)
+            for worker_file in worker_files:
+                os.remove(worker_file)
+        except OSError:
+            self.log.error(f"Unable to save the wait history {self.history_file}")
+            print_stack()